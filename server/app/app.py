@@ -1,24 +1,64 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 from fastapi import FastAPI
 
-from app.dependencies.meetings import session_repository
-from app.handlers import meetings
+from app.dependencies.meetings import (
+    get_diarization_service,
+    get_inference_executor,
+    get_job_queue,
+    get_knowledge_extraction_queue,
+    get_knowledge_graph_registry,
+    get_model_readiness,
+    get_semantic_retriever,
+    get_summerization_service,
+    session_repository,
+)
+from app.handlers import health, meetings, streaming
 from app.settings.meetings import settings_instance
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Startup
-    repo = session_repository(settings=settings_instance())
+    settings = settings_instance()
+    repo = session_repository(settings=settings)
     await repo.initialize()
+    jobs = get_job_queue(config=settings)
+    await jobs.start()
+    extraction = get_knowledge_extraction_queue()
+    await extraction.start()
+    
+    # Load and warm up models in the background; /health/ready reports progress.
+    # Arguments mirror what FastAPI passes so the cached instances are reused.
+    executor = get_inference_executor(config=settings)
+    loading = asyncio.create_task(get_model_readiness().load({
+        "diarization": lambda: get_diarization_service(
+            config=settings,
+            repository=repo,
+            executor=executor
+        ),
+        "summarization": lambda: get_summerization_service(
+            config=settings,
+            knowledge=get_knowledge_graph_registry(config=settings, repository=repo),
+            repository=repo,
+            extraction=extraction,
+            retriever=get_semantic_retriever(config=settings, repository=repo)
+        ),
+    }))
     yield
     # Shutdown
+    loading.cancel()
+    await jobs.stop()
+    await extraction.stop()
+    executor.shutdown()
     await repo.close()
 
 def create_app():
     app = FastAPI(docs_url="/", lifespan=lifespan)
 
     # Routers
+    app.include_router(health.router)
     app.include_router(meetings.router)
+    app.include_router(streaming.router)
 
     return app
@@ -1,10 +1,16 @@
 from functools import lru_cache
-from fastapi import Depends
+from fastapi import Depends, HTTPException, WebSocketException, status
 from app.repository.meetings.abstractions import AudioRepository
 from app.repository.meetings.mongo import MongoAudioRepository
 from app.services.diarization import StreamingDiarizationService
-from app.services.knowledge_graph import KnowledgeGraphService
+from app.services.extraction import KnowledgeExtractionQueue
+from app.services.inference import InferenceExecutor
+from app.services.jobs import JobQueue
+from app.services.knowledge_registry import KnowledgeGraphRegistry
+from app.services.retrieval import SemanticRetriever, TextEmbedder
+from app.services.scheduler import SummaryScheduler
 from app.services.summarize import SummarizationService
+from app.services.warmup import ModelReadiness
 from app.settings.meetings import Settings, settings_instance
 
 
@@ -16,25 +22,104 @@ def session_repository(settings: Settings = Depends(settings_instance)):
     return MongoAudioRepository(
         connection_string=settings.mongo_connection_string,
         database_name=settings.mongo_database_name,
+        inference_cache_ttl_seconds=settings.inference_cache_ttl_seconds,
     )
 
+@lru_cache()
+def get_inference_executor(
+    config: Settings = Depends(settings_instance)
+) -> InferenceExecutor:
+    """Get the shared model inference executor."""
+    return InferenceExecutor(max_workers=config.inference_workers)
+
 @lru_cache()
 def get_diarization_service(
     config: Settings = Depends(settings_instance),
-    repository: AudioRepository = Depends(session_repository)
+    repository: AudioRepository = Depends(session_repository),
+    executor: InferenceExecutor = Depends(get_inference_executor)
 ) -> StreamingDiarizationService:
     """Get diarization service instance."""
-    return StreamingDiarizationService(config, repository)
+    return StreamingDiarizationService(config, repository, executor)
 
 @lru_cache()
-def get_knowledge_graph_service() -> KnowledgeGraphService:
-    """Get diarization service instance."""
-    return KnowledgeGraphService()
+def get_knowledge_graph_registry(
+    config: Settings = Depends(settings_instance),
+    repository: AudioRepository = Depends(session_repository)
+) -> KnowledgeGraphRegistry:
+    """Get the per-session knowledge graph registry."""
+    return KnowledgeGraphRegistry(
+        repository=repository,
+        max_sessions=config.kb_max_sessions,
+        idle_seconds=config.kb_idle_seconds,
+        max_relations=config.kb_max_relations
+    )
+
+@lru_cache()
+def get_knowledge_extraction_queue() -> KnowledgeExtractionQueue:
+    """Get the background knowledge-graph extraction queue."""
+    return KnowledgeExtractionQueue()
+
+@lru_cache()
+def get_semantic_retriever(
+    config: Settings = Depends(settings_instance),
+    repository: AudioRepository = Depends(session_repository)
+) -> SemanticRetriever:
+    """Get the per-session embedding retriever."""
+    return SemanticRetriever(
+        embedder=TextEmbedder(config.embedding_model_name),
+        repository=repository,
+        max_sessions=config.retrieval_max_sessions
+    )
 
 @lru_cache()
 def get_summerization_service(
     config: Settings = Depends(settings_instance),
-    kb: KnowledgeGraphService = Depends(get_knowledge_graph_service)
+    knowledge: KnowledgeGraphRegistry = Depends(get_knowledge_graph_registry),
+    repository: AudioRepository = Depends(session_repository),
+    extraction: KnowledgeExtractionQueue = Depends(get_knowledge_extraction_queue),
+    retriever: SemanticRetriever = Depends(get_semantic_retriever)
 ) -> SummarizationService:
     """Get diarization service instance."""
-    return SummarizationService(config, kb)
\ No newline at end of file
+    return SummarizationService(config, knowledge, repository, extraction, retriever)
+
+@lru_cache()
+def get_summary_scheduler(
+    config: Settings = Depends(settings_instance),
+    summarization: SummarizationService = Depends(get_summerization_service)
+) -> SummaryScheduler:
+    """Get the per-session summary scheduler."""
+    return SummaryScheduler(
+        summarization=summarization,
+        every_chunks=config.summary_every_chunks,
+        every_tokens=config.summary_every_tokens,
+        max_sessions=config.summary_schedule_max_sessions
+    )
+
+@lru_cache()
+def get_job_queue(
+    config: Settings = Depends(settings_instance)
+) -> JobQueue:
+    """Get the background upload processing queue."""
+    return JobQueue(
+        workers=config.job_workers,
+        max_queue_size=config.job_queue_size
+    )
+
+@lru_cache()
+def get_model_readiness() -> ModelReadiness:
+    """Get the model loading state shared with the app lifespan."""
+    return ModelReadiness()
+
+def require_models_ready(
+    readiness: ModelReadiness = Depends(get_model_readiness)
+) -> None:
+    """Reject requests needing models until they are loaded and warmed up."""
+    if not readiness.ready:
+        raise HTTPException(status_code=503, detail="Models are still loading")
+
+def require_models_ready_ws(
+    readiness: ModelReadiness = Depends(get_model_readiness)
+) -> None:
+    """Close websocket connections needing models until they are ready."""
+    if not readiness.ready:
+        raise WebSocketException(code=status.WS_1013_TRY_AGAIN_LATER, reason="Models are still loading")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -17,14 +17,123 @@ class DiarizationResponse(BaseModel):
     segments: List[SpeechSegment]
     total_speakers: int
     duration: float
+    skipped_seconds: float = 0.0
+    speech_detected: bool = True
+    duplicate: bool = False  # The chunk was already processed and was not run again
     created_at: datetime
     is_complete: bool
     
     
+class SummaryLevel(BaseModel):
+    """Timing of one level of the final map-reduce summary."""
+    level: int
+    stage: str
+    inputs: int
+    outputs: int
+    truncated: int = 0  # Summaries cut to fit the reduce budget
+    seconds: float
+
+
 class SummerizationResponse(BaseModel):
     session_id: UUID
     summary: str
     duration: float
+    skipped_seconds: float = 0.0
+    speech_detected: bool = True
+    summary_levels: List[SummaryLevel] = []  # Only set for the final chunk
+    summary_stale_seconds: float = 0.0  # Transcript seconds not yet in the summary
+    summary_pending: bool = False  # A summary update is running
+    summary_updated_at: Optional[datetime] = None
+    duplicate: bool = False
     created_at: datetime
     is_complete: bool
-    
\ No newline at end of file
+
+
+class SummaryStatusResponse(BaseModel):
+    """Latest summary of a session and how far behind the transcript it is."""
+    session_id: UUID
+    summary: str
+    summarized_until: float
+    stale_seconds: float
+    pending: bool
+    updated_at: Optional[datetime] = None
+
+
+class SummarySchedulerStatsResponse(BaseModel):
+    """Summary runs started, coalesced and finished by the scheduler."""
+    sessions: int
+    running: int
+    triggered: int
+    coalesced: int
+    completed: int
+    failed: int
+
+
+class InferenceStatsResponse(BaseModel):
+    """Inference executor load snapshot."""
+    max_workers: int
+    queued: int
+    in_flight: int
+    completed: int
+    failed: int
+
+
+class InferenceCacheStatsResponse(BaseModel):
+    """Reuse of memoized diarization and transcription outputs."""
+    entries: int
+    max_entries: int
+    memory_hits: int
+    store_hits: int
+    misses: int
+
+
+class StreamingStatsResponse(BaseModel):
+    """Counts and time to first token of streamed LLM generations."""
+    streams: int
+    cancelled: int
+    mean_ttft_ms: float
+    max_ttft_ms: float
+
+
+class PrefixCacheStatsResponse(BaseModel):
+    """Reuse of cached prompt prefix key/value states."""
+    prefixes: int
+    sessions: int
+    hits: int
+    misses: int
+    tokens_reused: int
+    prefill_ms_saved: float
+
+
+class KnowledgeExtractionStatsResponse(BaseModel):
+    """Backlog of knowledge-graph extraction."""
+    pending: int
+    running: int
+    lag: int  # Sessions with sections not yet folded into the knowledge graph
+    submitted: int
+    coalesced: int
+    extracted: int
+    failed: int
+
+
+class KnowledgeGraphRegistryStatsResponse(BaseModel):
+    """Knowledge graphs held in memory."""
+    sessions: int
+    pinned: int  # Graphs in use by an extraction or a question
+    relations: int
+    loads: int
+    evictions: int
+
+
+class BatchingStatsResponse(BaseModel):
+    """Micro-batching scheduler statistics."""
+    name: str
+    max_batch_size: int
+    max_wait_ms: float
+    pending: int
+    batches: int
+    items: int
+    mean_batch_size: float
+    batch_size_histogram: Dict[str, int]
+    mean_wait_ms: float
+    max_wait_ms_observed: float
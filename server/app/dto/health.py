@@ -0,0 +1,9 @@
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+
+class ReadinessResponse(BaseModel):
+    """Model loading and warm-up status."""
+    ready: bool
+    error: Optional[str] = None
+    timings: Dict[str, float]
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+
+class JobAcceptedResponse(BaseModel):
+    """Response for an upload queued for background processing."""
+    job_id: str
+    session_id: UUID
+    sequence_number: int
+    status: str
+    status_url: str
+    events_url: str
+
+
+class JobQueueStatsResponse(BaseModel):
+    """Load snapshot of the background upload queue."""
+    workers: int
+    queued: int
+    running: int
+    tracked_jobs: int  # Jobs whose status can still be looked up
+
+
+class JobStatusResponse(BaseModel):
+    """Status and, once finished, result of a background upload."""
+    job_id: str
+    session_id: UUID
+    sequence_number: int
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
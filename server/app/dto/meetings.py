@@ -3,9 +3,12 @@ from uuid import UUID
 from fastapi import File, Form, UploadFile
 from pydantic import BaseModel, field_validator
 
+AUDIO_EXTENSIONS = ('.wav', '.ogg', '.opus', '.oga', '.webm', '.weba', '.flac')
+AUDIO_MAGIC = (b'RIFF', b'OggS', b'\x1a\x45\xdf\xa3', b'fLaC')
+
 class AudioChunckBody(BaseModel):    
     """Input DTO for streaming audio session."""
-    audio_file: UploadFile = File(..., description="WAV audio chunk")
+    audio_file: UploadFile = File(..., description="WAV, Ogg/Opus, WebM or FLAC audio chunk")
     session_id: UUID = Form(..., description="Unique session identifier")
     sequence_number: int = Form(..., description="Chunk sequence number")
     is_final: bool = Form(False, description="Indicates if this is the final chunk")
@@ -13,13 +16,15 @@ class AudioChunckBody(BaseModel):
     @field_validator('audio_file')
     @classmethod
     def validate_audio_file(cls, file: UploadFile) -> UploadFile:
-        if not file.filename.lower().endswith('.wav'):
-            raise ValueError("File must have .wav extension")
+        if not file.filename.lower().endswith(AUDIO_EXTENSIONS):
+            raise ValueError(f"File must have one of the extensions {', '.join(AUDIO_EXTENSIONS)}")
         
         file_content = file.file.read(44)
         file.file.seek(0)
         
-        if not file_content.startswith(b'RIFF') or b'WAVE' not in file_content[:44]:
+        if file_content[:4] not in AUDIO_MAGIC:
+            raise ValueError("File must be a WAV, Ogg/Opus, WebM or FLAC audio file")
+        if file_content.startswith(b'RIFF') and b'WAVE' not in file_content[:44]:
             raise ValueError("File must be a valid WAV audio file")
         
         return file
@@ -0,0 +1,30 @@
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class QuestionBody(BaseModel):
+    """Question about a meeting."""
+    question: str = Field(..., min_length=1, description="Question about the meeting")
+
+
+class AnswerResponse(BaseModel):
+    """Answer to a question about a meeting."""
+    session_id: UUID
+    question: str
+    answer: str
+    cached: bool
+    kb_version: int
+    prefix_tokens: int = 0
+    prefill_ms_saved: float = 0.0
+
+
+class AnswerCacheStatsResponse(BaseModel):
+    """Answer cache usage."""
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    expired: int
+    invalidated: int
+    hit_rate: float
@@ -19,14 +19,27 @@ class SpeechSegmentDXO(BaseModel):
     def from_domain(cls, segment: SpeechSegment) -> "SpeechSegmentDXO":
         return cls(**segment.model_dump())
 
+class SpeakerProfileDXO(BaseModel):
+    """Database exchange object for a speaker's running embedding centroid."""
+    centroid: List[float]
+    weight: float  # Seconds of speech folded into the centroid
+
+    model_config = ConfigDict(frozen=True)
+
 class SessionDiarizationDXO(BaseModel):
     """Database exchange object for session diarization results."""
     id: str
     session_id: UUID
     chunks: List[str]  # List of chunk IDs
+    chunk_sequences: List[int] = []  # Sequence numbers of the appended chunks
     segments: List[SpeechSegmentDXO]
+    speakers: List[str] = []
+    speaker_profiles: Dict[str, SpeakerProfileDXO] = {}
+    segment_count: int = 0
+    revision: int = 0  # Bumped by every append and by finalization
     total_speakers: int
     duration: float
+    skipped_seconds: float = 0.0  # Silent audio never sent to inference
     created_at: datetime
     last_updated: datetime
     is_complete: bool
@@ -42,27 +55,33 @@ class SessionDiarizationDXO(BaseModel):
         segments: List[SpeechSegment],
         total_speakers: int,
         duration: float,
-        is_complete: bool
+        is_complete: bool,
+        skipped_seconds: float = 0.0
     ) -> "SessionDiarizationDXO":
         return cls(
             id=entry_id,
             session_id=session_id,
             chunks=chunks,
             segments=[SpeechSegmentDXO.from_domain(segment) for segment in segments],
+            speakers=sorted({segment.speaker for segment in segments}),
+            segment_count=len(segments),
             total_speakers=total_speakers,
             duration=duration,
+            skipped_seconds=skipped_seconds,
             created_at=datetime.now(timezone.utc),
             last_updated=datetime.now(timezone.utc),
             is_complete=is_complete
         )
     
-    def to_response(self) -> DiarizationResponse:
+    def to_response(self, speech_detected: bool = True) -> DiarizationResponse:
         """Convert DXO to API response model."""
         return DiarizationResponse(
             session_id=self.session_id,
             segments=[SpeechSegment(**segment.model_dump()) for segment in self.segments],
             total_speakers=self.total_speakers,
             duration=self.duration,
+            skipped_seconds=self.skipped_seconds,
+            speech_detected=speech_detected,
             created_at=self.created_at,
             is_complete=self.is_complete
         )
\ No newline at end of file
@@ -0,0 +1,15 @@
+from datetime import datetime, timezone
+from typing import List, Tuple
+from pydantic import BaseModel, ConfigDict, Field
+
+class InferenceResultDXO(BaseModel):
+    """Database exchange object for the model outputs of one audio window."""
+    key: str  # Hash of the samples and the model versions
+    labels: List[str] = []  # Chunk-local speaker labels
+    durations: List[float] = []  # Seconds of speech per label
+    embeddings: List[List[float]] = []  # One speaker embedding per label
+    tracks: List[Tuple[float, float, str]] = []  # Speaker turns relative to the window start
+    words: List[Tuple[float, float, str]] = []  # Transcribed words relative to the window start
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(frozen=True)
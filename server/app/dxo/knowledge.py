@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from typing import List, Tuple
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict, Field
+
+class KnowledgeGraphDXO(BaseModel):
+    """Database exchange object for a session's knowledge graph."""
+    session_id: UUID
+    relations: List[Tuple[str, str, str]] = []
+    version: int = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(frozen=True)
+
+    @classmethod
+    def from_relations(cls, session_id: UUID, relations: List[tuple], version: int = 0) -> "KnowledgeGraphDXO":
+        # The LLM may produce non-string heads or tails, store them as text
+        return cls(
+            session_id=session_id,
+            relations=[tuple(str(part) for part in relation[:3]) for relation in relations],
+            version=version
+        )
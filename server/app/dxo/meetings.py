@@ -11,5 +11,6 @@ class AudioChunkDXO:
     sequence_number: int
     original_filename: str
     content_type: str = "audio/wav"
+    codec: str = "pcm"
     file_size: int = 0
     created_at: datetime = field(default_factory=datetime.utcnow)
\ No newline at end of file
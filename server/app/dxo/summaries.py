@@ -0,0 +1,13 @@
+from datetime import datetime, timezone
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict, Field
+
+class SessionSummaryDXO(BaseModel):
+    """Database exchange object for a session's running summary."""
+    session_id: UUID
+    summary: str = ""
+    summarized_until: float = 0.0  # Latest end time of the segments folded into the summary
+    summarized_segments: int = 0  # Position of the first segment not folded into the summary
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(frozen=True)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.dependencies.meetings import get_model_readiness
+from app.dto.health import ReadinessResponse
+from app.services.warmup import ModelReadiness
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live() -> dict:
+    """
+    Endpoint reporting that the server process is up.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def ready(
+    readiness: ModelReadiness = Depends(get_model_readiness)
+) -> JSONResponse:
+    """
+    Endpoint reporting whether models are loaded and warmed up.
+    """
+    response = ReadinessResponse(
+        ready=readiness.ready,
+        error=readiness.error,
+        timings=readiness.timings
+    )
+    return JSONResponse(
+        status_code=200 if readiness.ready else 503,
+        content=response.model_dump()
+    )
@@ -1,12 +1,45 @@
+import asyncio
+import json
 from uuid import UUID
 import logging
+from typing import Dict, List
+import numpy as np
 from pydantic import UUID4
 
-from fastapi import APIRouter, Depends, HTTPException, File, Form, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, Form, Request, UploadFile
+from fastapi.responses import StreamingResponse
 
-from app.dependencies.meetings import get_diarization_service, get_summerization_service
-from app.dto.diarization import SummerizationResponse
+from app.dependencies.meetings import (
+    get_diarization_service,
+    get_inference_executor,
+    get_job_queue,
+    get_knowledge_extraction_queue,
+    get_knowledge_graph_registry,
+    get_summary_scheduler,
+    get_summerization_service,
+    require_models_ready,
+)
+from app.dto.diarization import (
+    BatchingStatsResponse,
+    DiarizationResponse,
+    InferenceCacheStatsResponse,
+    InferenceStatsResponse,
+    KnowledgeExtractionStatsResponse,
+    KnowledgeGraphRegistryStatsResponse,
+    PrefixCacheStatsResponse,
+    StreamingStatsResponse,
+    SummarySchedulerStatsResponse,
+    SummaryStatusResponse,
+    SummerizationResponse,
+)
+from app.dto.jobs import JobAcceptedResponse, JobQueueStatsResponse, JobStatusResponse
+from app.dto.questions import AnswerCacheStatsResponse, AnswerResponse, QuestionBody
 from app.services.diarization import StreamingDiarizationService
+from app.services.extraction import KnowledgeExtractionQueue
+from app.services.inference import InferenceExecutor
+from app.services.jobs import JobQueue, JobQueueFull
+from app.services.knowledge_registry import KnowledgeGraphRegistry
+from app.services.scheduler import SummaryScheduler
 from app.services.summarize import SummarizationService
 
 # Configure logging
@@ -16,40 +49,458 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/audio", tags=["movies"])
 
     
-@router.post("/upload", response_model=SummerizationResponse)
+@router.post(
+    "/upload",
+    response_model=SummerizationResponse,
+    dependencies=[Depends(require_models_ready)]
+)
 async def stream_diarize_audio(
     audio_file: UploadFile = File(...),
     session_id: UUID4 = Form(...),
     sequence_number: int = Form(...),
     is_final: bool = Form(...),
     service: StreamingDiarizationService = Depends(get_diarization_service),
-    sum_service: SummarizationService = Depends(get_summerization_service)
+    scheduler: SummaryScheduler = Depends(get_summary_scheduler)
 ) -> SummerizationResponse:
     """
     Endpoint to process streaming audio chunks and perform speaker diarization.
     """
     try:
-        dia_response =  await service.process_audio_chunk(
+        samples, chunk_id = await service.store_audio_chunk(
             audio_file.file,
             session_id,
+            sequence_number
+        )
+        return await _diarize_and_summarize(
+            service,
+            scheduler,
+            samples,
+            chunk_id,
+            session_id,
             sequence_number,
             is_final
         )
         
-        transcript = await service.get_session_transcript(session_id)
-        
-        summary = await sum_service.summerize(script=transcript)
-        
-        return SummerizationResponse(
-            session_id=session_id,
-            summary=summary,
-            duration=dia_response.duration,
-            created_at=dia_response.created_at,
-            is_complete=dia_response.is_complete
-        )
-        
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error during streaming diarization: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post(
+    "/upload/async",
+    status_code=202,
+    response_model=JobAcceptedResponse,
+    dependencies=[Depends(require_models_ready)]
+)
+async def enqueue_audio_chunk(
+    audio_file: UploadFile = File(...),
+    session_id: UUID4 = Form(...),
+    sequence_number: int = Form(...),
+    is_final: bool = Form(...),
+    service: StreamingDiarizationService = Depends(get_diarization_service),
+    scheduler: SummaryScheduler = Depends(get_summary_scheduler),
+    jobs: JobQueue = Depends(get_job_queue)
+) -> JobAcceptedResponse:
+    """
+    Endpoint storing an audio chunk and queueing it for processing.
+    
+    Poll the returned status URL or follow the session's event stream for the result.
+    """
+    if jobs.is_full():
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "5"})
+    
+    try:
+        samples, chunk_id = await service.store_audio_chunk(
+            audio_file.file,
+            session_id,
+            sequence_number
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error while storing audio chunk: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    async def work():
+        response = await _diarize_and_summarize(
+            service,
+            scheduler,
+            samples,
+            chunk_id,
+            session_id,
+            sequence_number,
+            is_final
+        )
+        return response.model_dump(mode="json")
+    
+    try:
+        job = jobs.submit(session_id, sequence_number, work)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    
+    return JobAcceptedResponse(
+        job_id=job.id,
+        session_id=session_id,
+        sequence_number=sequence_number,
+        status=job.status.value,
+        status_url=f"{router.prefix}/jobs/{job.id}",
+        events_url=f"{router.prefix}/sessions/{session_id}/events"
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def job_status(
+    job_id: str,
+    jobs: JobQueue = Depends(get_job_queue)
+) -> JobStatusResponse:
+    """
+    Endpoint reporting the status and result of a queued upload.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return JobStatusResponse(
+        job_id=job.id,
+        session_id=job.session_id,
+        sequence_number=job.sequence_number,
+        status=job.status.value,
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
+
+@router.get("/sessions/{session_id}/events")
+async def session_events(
+    session_id: UUID4,
+    request: Request,
+    jobs: JobQueue = Depends(get_job_queue)
+) -> StreamingResponse:
+    """
+    Server-sent events stream of the session's job updates.
+    """
+    async def stream():
+        queue = jobs.subscribe(session_id)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: job\ndata: {json.dumps(event)}\n\n"
+        finally:
+            jobs.unsubscribe(session_id, queue)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+async def schedule_summary(
+    service: StreamingDiarizationService,
+    scheduler: SummaryScheduler,
+    session_id: UUID,
+    dia_response: DiarizationResponse,
+    is_final: bool
+) -> List[Dict]:
+    """Hand a processed chunk to the summary scheduler and return the final summary's levels."""
+    # A retried chunk changes nothing, the stored summary is kept as is
+    if dia_response.duplicate:
+        return []
+    if is_final:
+        # The whole meeting is summarized again in token-bounded windows
+        transcript = await service.get_session_transcript(session_id)
+        _, levels = await scheduler.finalize(session_id, transcript, dia_response.duration)
+        return levels
+    # The running summary is updated in the background once enough new
+    # transcript arrived; until then the stored one is returned
+    scheduler.chunk_processed(session_id, " ".join(segment.text for segment in dia_response.segments))
+    return []
+
+
+async def _diarize_and_summarize(
+    service: StreamingDiarizationService,
+    scheduler: SummaryScheduler,
+    samples: np.ndarray,
+    chunk_id: str,
+    session_id: UUID,
+    sequence_number: int,
+    is_final: bool
+) -> SummerizationResponse:
+    """Process a stored chunk and return the session's latest summary."""
+    dia_response = await service.process_stored_chunk(
+        samples,
+        chunk_id,
+        session_id,
+        sequence_number,
+        is_final
+    )
+    
+    levels = await schedule_summary(service, scheduler, session_id, dia_response, is_final)
+    status = await scheduler.status(session_id, dia_response.duration)
+    
+    return SummerizationResponse(
+        session_id=session_id,
+        summary=status["summary"],
+        duration=dia_response.duration,
+        skipped_seconds=dia_response.skipped_seconds,
+        speech_detected=dia_response.speech_detected,
+        summary_levels=levels,
+        summary_stale_seconds=status["stale_seconds"],
+        summary_pending=status["pending"],
+        summary_updated_at=status["updated_at"],
+        duplicate=dia_response.duplicate,
+        created_at=dia_response.created_at,
+        is_complete=dia_response.is_complete
+    )
+
+
+@router.get("/inference/stats", response_model=InferenceStatsResponse)
+async def inference_stats(
+    executor: InferenceExecutor = Depends(get_inference_executor)
+) -> InferenceStatsResponse:
+    """
+    Endpoint reporting inference queue depth and in-flight jobs.
+    """
+    return InferenceStatsResponse(**executor.stats())
+
+
+@router.get("/inference/jobs", response_model=JobQueueStatsResponse)
+async def job_queue_stats(
+    jobs: JobQueue = Depends(get_job_queue)
+) -> JobQueueStatsResponse:
+    """
+    Endpoint reporting queued and running background uploads.
+    """
+    return JobQueueStatsResponse(**jobs.stats())
+
+
+@router.get(
+    "/inference/batching",
+    response_model=List[BatchingStatsResponse],
+    dependencies=[Depends(require_models_ready)]
+)
+async def batching_stats(
+    service: StreamingDiarizationService = Depends(get_diarization_service)
+) -> List[BatchingStatsResponse]:
+    """
+    Endpoint reporting batch sizes and queueing delays of the models batched across sessions.
+    """
+    return [BatchingStatsResponse(**stats) for stats in service.batching_stats()]
+
+
+@router.get("/knowledge/stats", response_model=KnowledgeExtractionStatsResponse)
+async def knowledge_stats(
+    extraction: KnowledgeExtractionQueue = Depends(get_knowledge_extraction_queue)
+) -> KnowledgeExtractionStatsResponse:
+    """
+    Endpoint reporting transcript sections still waiting for knowledge-graph extraction.
+    """
+    return KnowledgeExtractionStatsResponse(**extraction.stats())
+
+
+@router.get("/knowledge/graphs", response_model=KnowledgeGraphRegistryStatsResponse)
+async def knowledge_graph_stats(
+    registry: KnowledgeGraphRegistry = Depends(get_knowledge_graph_registry)
+) -> KnowledgeGraphRegistryStatsResponse:
+    """
+    Endpoint reporting knowledge graphs held in memory and their loads and evictions.
+    """
+    return KnowledgeGraphRegistryStatsResponse(**registry.stats())
+
+
+@router.post(
+    "/sessions/{session_id}/ask",
+    response_model=AnswerResponse,
+    dependencies=[Depends(require_models_ready)]
+)
+async def ask_question(
+    session_id: UUID4,
+    body: QuestionBody,
+    sum_service: SummarizationService = Depends(get_summerization_service)
+) -> AnswerResponse:
+    """
+    Endpoint answering a question about a session from its knowledge graph and transcript.
+    """
+    if await sum_service.repository.get_session_diarization(session_id, segments_tail=0) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        stats = {}
+        answer, cached, version = await sum_service.answer(body.question, session_id, stats)
+    except Exception as e:
+        logger.error(f"Unexpected error while answering question: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    return AnswerResponse(
+        session_id=session_id,
+        question=body.question,
+        answer=answer,
+        cached=cached,
+        kb_version=version,
+        prefix_tokens=stats.get("prefix_tokens", 0),
+        prefill_ms_saved=stats.get("prefill_ms_saved", 0.0)
+    )
+
+
+@router.get(
+    "/ask/cache/stats",
+    response_model=AnswerCacheStatsResponse,
+    dependencies=[Depends(require_models_ready)]
+)
+async def answer_cache_stats(
+    sum_service: SummarizationService = Depends(get_summerization_service)
+) -> AnswerCacheStatsResponse:
+    """
+    Endpoint reporting answer cache hit rates.
+    """
+    return AnswerCacheStatsResponse(**sum_service.answers.stats())
+
+
+@router.post(
+    "/sessions/{session_id}/ask/stream",
+    dependencies=[Depends(require_models_ready)]
+)
+async def ask_question_stream(
+    session_id: UUID4,
+    body: QuestionBody,
+    request: Request,
+    sum_service: SummarizationService = Depends(get_summerization_service)
+) -> StreamingResponse:
+    """
+    Server-sent events stream of an answer as it is generated.
+    """
+    if await sum_service.repository.get_session_diarization(session_id, segments_tail=0) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    stats = {}
+    return StreamingResponse(
+        _sse_generation(sum_service.stream_answer(body.question, session_id, stats), stats, request),
+        media_type="text/event-stream"
+    )
+
+
+@router.get(
+    "/sessions/{session_id}/summary/stream",
+    dependencies=[Depends(require_models_ready)]
+)
+async def summary_stream(
+    session_id: UUID4,
+    request: Request,
+    sum_service: SummarizationService = Depends(get_summerization_service)
+) -> StreamingResponse:
+    """
+    Server-sent events stream of the session's updated summary as it is generated.
+    """
+    if await sum_service.repository.get_session_diarization(session_id, segments_tail=0) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    stats = {}
+    return StreamingResponse(
+        _sse_generation(sum_service.stream_summary(session_id, stats), stats, request),
+        media_type="text/event-stream"
+    )
+
+
+async def _sse_generation(pieces, stats: dict, request: Request):
+    """Relay generated text as `token` events, then a `done` event with timings."""
+    try:
+        async for piece in pieces:
+            if await request.is_disconnected():
+                # Closing the generator stops the model at its next token
+                break
+            yield f"event: token\ndata: {json.dumps({'text': piece})}\n\n"
+        else:
+            yield f"event: done\ndata: {json.dumps(stats)}\n\n"
+    except Exception as e:
+        logger.error(f"Streamed generation failed: {str(e)}")
+        yield f"event: error\ndata: {json.dumps({'detail': 'Internal server error'})}\n\n"
+    finally:
+        await pieces.aclose()
+
+
+@router.get(
+    "/inference/streaming",
+    response_model=StreamingStatsResponse,
+    dependencies=[Depends(require_models_ready)]
+)
+async def streaming_stats(
+    sum_service: SummarizationService = Depends(get_summerization_service)
+) -> StreamingStatsResponse:
+    """
+    Endpoint reporting time to first token of streamed generations.
+    """
+    return StreamingStatsResponse(**sum_service.streaming_stats())
+
+
+@router.get(
+    "/inference/prefix-cache",
+    response_model=PrefixCacheStatsResponse,
+    dependencies=[Depends(require_models_ready)]
+)
+async def prefix_cache_stats(
+    sum_service: SummarizationService = Depends(get_summerization_service)
+) -> PrefixCacheStatsResponse:
+    """
+    Endpoint reporting reuse of cached prompt prefixes and the prefill time saved.
+    """
+    return PrefixCacheStatsResponse(**sum_service.prefix_cache_stats())
+
+
+@router.post(
+    "/sessions/{session_id}/summary",
+    response_model=SummaryStatusResponse,
+    dependencies=[Depends(require_models_ready)]
+)
+async def summarize_now(
+    session_id: UUID4,
+    service: StreamingDiarizationService = Depends(get_diarization_service),
+    scheduler: SummaryScheduler = Depends(get_summary_scheduler)
+) -> SummaryStatusResponse:
+    """
+    Endpoint bringing a session's running summary up to date and returning it.
+    """
+    session = await service.repository.get_session_diarization(session_id, segments_tail=0)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        await scheduler.request(session_id)
+    except Exception as e:
+        logger.error(f"Unexpected error while summarizing session: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    return SummaryStatusResponse(session_id=session_id, **await scheduler.status(session_id, session.duration))
+
+
+@router.get(
+    "/summary/stats",
+    response_model=SummarySchedulerStatsResponse,
+    dependencies=[Depends(require_models_ready)]
+)
+async def summary_scheduler_stats(
+    scheduler: SummaryScheduler = Depends(get_summary_scheduler)
+) -> SummarySchedulerStatsResponse:
+    """
+    Endpoint reporting summary runs started, coalesced and finished.
+    """
+    return SummarySchedulerStatsResponse(**scheduler.stats())
+
+
+@router.get(
+    "/inference/cache",
+    response_model=InferenceCacheStatsResponse,
+    dependencies=[Depends(require_models_ready)]
+)
+async def inference_cache_stats(
+    service: StreamingDiarizationService = Depends(get_diarization_service)
+) -> InferenceCacheStatsResponse:
+    """
+    Endpoint reporting reuse of memoized diarization and transcription outputs.
+    """
+    return InferenceCacheStatsResponse(**service.inference_cache_stats())
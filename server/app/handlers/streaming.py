@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+from uuid import UUID
+
+import numpy as np
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from pydantic import UUID4
+
+from app.dependencies.meetings import get_diarization_service, get_summary_scheduler, require_models_ready_ws
+from app.handlers.meetings import schedule_summary
+from app.services.audio import PCM_SAMPLE_WIDTHS, StreamWindower
+from app.services.diarization import StreamingDiarizationService
+from app.services.scheduler import SummaryScheduler
+from app.settings.meetings import Settings, settings_instance
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/audio", tags=["movies"])
+
+PCM_ENCODINGS = tuple(PCM_SAMPLE_WIDTHS)
+
+
+@router.websocket(
+    "/stream/{session_id}",
+    dependencies=[Depends(require_models_ready_ws)]
+)
+async def stream_audio(
+    websocket: WebSocket,
+    session_id: UUID4,
+    sample_rate: int = 16000,
+    encoding: str = "pcm_s16le",
+    config: Settings = Depends(settings_instance),
+    service: StreamingDiarizationService = Depends(get_diarization_service),
+    scheduler: SummaryScheduler = Depends(get_summary_scheduler)
+) -> None:
+    """
+    Streaming ingest of raw mono PCM frames.
+
+    Binary messages carry audio in `encoding` at `sample_rate`. The stream is cut
+    into windows at pauses, each window is stored and processed as a chunk of the
+    session and its segments are sent back as a JSON message. Windows feed the
+    session's running summary like uploaded chunks do. Send the text message
+    {"type": "end"} to finalize the session; the final message carries the
+    meeting's summary.
+    """
+    if encoding not in PCM_ENCODINGS or sample_rate <= 0:
+        await websocket.close(code=1003, reason=f"Expected {' or '.join(PCM_ENCODINGS)} audio")
+        return
+
+    await websocket.accept()
+
+    windower = StreamWindower(
+        sample_rate=sample_rate,
+        threshold_db=config.vad_energy_threshold_db,
+        min_window_seconds=config.stream_min_window_seconds,
+        max_window_seconds=config.stream_max_window_seconds,
+        pause_ms=config.stream_pause_ms
+    )
+    # Windows are processed in order while frames keep arriving; a full queue
+    # stops reading frames so a client sending faster than real time is slowed down
+    windows: "asyncio.Queue[Optional[tuple]]" = asyncio.Queue(maxsize=4)
+    processor = asyncio.create_task(_process_windows(websocket, service, scheduler, session_id, windows))
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                for window in windower.push_pcm(message["bytes"], encoding):
+                    await windows.put((window, False))
+            elif _is_end(message.get("text")):
+                final = windower.flush()
+                await windows.put((final if final is not None else np.zeros(0, dtype=np.float32), True))
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Process what was received even if the client went away without ending
+        remaining = windower.flush()
+        if remaining is not None:
+            await windows.put((remaining, False))
+        await windows.put(None)
+        await processor
+
+    try:
+        await websocket.close()
+    except RuntimeError:
+        # Already closed by the client
+        pass
+
+
+def _is_end(text: Optional[str]) -> bool:
+    if not text:
+        return False
+    try:
+        return json.loads(text).get("type") == "end"
+    except (ValueError, AttributeError):
+        return False
+
+
+async def _process_windows(
+    websocket: WebSocket,
+    service: StreamingDiarizationService,
+    scheduler: SummaryScheduler,
+    session_id: UUID,
+    windows: asyncio.Queue
+) -> None:
+    """Store and process queued windows in order, sending each result to the client."""
+    while True:
+        item = await windows.get()
+        if item is None:
+            return
+        samples, is_final = item
+        try:
+            sequence_number, response = await service.process_stream_window(samples, session_id, is_final)
+            levels = await schedule_summary(service, scheduler, session_id, response, is_final)
+            message = {
+                "type": "final" if is_final else "segments",
+                "sequence_number": sequence_number,
+                **response.model_dump(mode="json")
+            }
+            if is_final:
+                status = await scheduler.status(session_id, response.duration)
+                message["summary"] = status["summary"]
+                message["summary_levels"] = levels
+        except Exception as e:
+            logger.error(f"Streaming window of session {session_id} failed: {str(e)}")
+            message = {"type": "error", "detail": str(e)}
+
+        try:
+            await websocket.send_text(json.dumps(message))
+        except Exception:
+            # The client is gone, keep processing what it already sent
+            pass
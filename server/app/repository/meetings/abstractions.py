@@ -2,8 +2,11 @@ import abc
 from typing import BinaryIO, Dict, List, Optional, Tuple
 from uuid import UUID
 
-from app.dxo.diarization import SessionDiarizationDXO
+from app.dxo.diarization import SessionDiarizationDXO, SpeakerProfileDXO, SpeechSegmentDXO
+from app.dxo.inference import InferenceResultDXO
+from app.dxo.knowledge import KnowledgeGraphDXO
 from app.dxo.meetings import AudioChunkDXO
+from app.dxo.summaries import SessionSummaryDXO
 
 class RepositoryException(Exception):
     pass
@@ -25,6 +28,21 @@ class AudioRepository(abc.ABC):
         """
         Store a single audio chunk in GridFS.
         
+        A chunk already stored for the same session and sequence number is
+        kept and its ID returned, so retried uploads are stored once.
+        
+        """
+        return NotImplementedError
+
+    async def get_next_sequence_number(
+        self,
+        session_id: UUID
+    ) -> int:
+        """
+        Sequence number following the highest chunk stored for a session.
+        
+        Returns 0 for a session without stored chunks.
+        
         """
         return NotImplementedError
     
@@ -38,13 +56,140 @@ class AudioRepository(abc.ABC):
         """
         return NotImplementedError
 
+    async def append_session_segments(
+        self,
+        session_id: UUID,
+        chunk_id: str,
+        sequence_number: int,
+        segments: List[SpeechSegmentDXO],
+        duration: float,
+        is_final: bool,
+        speaker_profiles: Optional[Dict[str, SpeakerProfileDXO]] = None,
+        skipped_seconds: float = 0.0
+    ) -> Optional[SessionDiarizationDXO]:
+        """
+        Atomically append a chunk's segments to a session, creating it if needed.
+        
+        Earlier segments are neither read nor rewritten. The returned DXO holds
+        the updated session counters and only the segments of this chunk.
+        `speaker_profiles` replaces the stored profiles of the given speakers
+        and `skipped_seconds` is added to the session's skipped audio.
+        Returns None without changing the session when a chunk with the same
+        `sequence_number` was already appended.
+        
+        """
+        return NotImplementedError
+
     async def get_session_diarization(
         self,
-        session_id: UUID
+        session_id: UUID,
+        segments_tail: Optional[int] = None
     ) -> Optional[SessionDiarizationDXO]:
         """
         Retrieve session diarization results.
         
+        When `segments_tail` is given only the last `segments_tail` segments
+        are loaded.
+        
+        """
+        return NotImplementedError
+
+    async def get_segments_from(
+        self,
+        session_id: UUID,
+        offset: int,
+        limit: int
+    ) -> List[SpeechSegmentDXO]:
+        """
+        Retrieve up to `limit` segments of a session starting at position
+        `offset`, in the order they are stored.
+        
+        """
+        return NotImplementedError
+
+    async def get_session_summary(
+        self,
+        session_id: UUID
+    ) -> Optional[SessionSummaryDXO]:
+        """
+        Retrieve the running summary of a session.
+        
+        """
+        return NotImplementedError
+
+    async def update_session_summary(
+        self,
+        summary_dxo: SessionSummaryDXO
+    ) -> None:
+        """
+        Update or create the running summary of a session.
+        
+        """
+        return NotImplementedError
+
+    async def get_chunk_segments(
+        self,
+        session_id: UUID,
+        sequence_number: int
+    ) -> List[SpeechSegmentDXO]:
+        """
+        Retrieve the segments a chunk added to its session.
+        
+        """
+        return NotImplementedError
+
+    async def get_inference_result(
+        self,
+        key: str,
+        session_id: UUID
+    ) -> Optional[InferenceResultDXO]:
+        """
+        Retrieve cached model outputs by content hash and record that
+        `session_id` uses them.
+        
+        """
+        return NotImplementedError
+
+    async def record_inference_use(
+        self,
+        key: str,
+        session_id: UUID
+    ) -> bool:
+        """
+        Record that `session_id` uses the cached model outputs under `key`;
+        False if none are stored.
+        
+        """
+        return NotImplementedError
+
+    async def store_inference_result(
+        self,
+        result_dxo: InferenceResultDXO,
+        session_id: UUID
+    ) -> None:
+        """
+        Cache model outputs under their content hash on behalf of `session_id`.
+        
+        """
+        return NotImplementedError
+
+    async def get_knowledge_graph(
+        self,
+        session_id: UUID
+    ) -> Optional[KnowledgeGraphDXO]:
+        """
+        Retrieve the knowledge graph of a session.
+        
+        """
+        return NotImplementedError
+
+    async def update_knowledge_graph(
+        self,
+        graph_dxo: KnowledgeGraphDXO
+    ) -> None:
+        """
+        Update or create the knowledge graph of a session.
+        
         """
         return NotImplementedError
 
@@ -65,6 +210,9 @@ class AudioRepository(abc.ABC):
         """
         Delete a complete session and its associated chunks.
         
+        Stored inference results used only by this session are deleted;
+        results shared with other sessions are kept for them.
+        
         """
         return NotImplementedError
 
@@ -7,20 +7,25 @@ from bson.objectid  import ObjectId
 import gridfs
 import logging
 
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+from app.dxo.knowledge import KnowledgeGraphDXO
 from app.dxo.meetings import AudioChunkDXO
-from app.dxo.diarization import SessionDiarizationDXO
+from app.dxo.diarization import SessionDiarizationDXO, SpeakerProfileDXO, SpeechSegmentDXO
+from app.dxo.inference import InferenceResultDXO
+from app.dxo.summaries import SessionSummaryDXO
 
 from app.repository.meetings.abstractions import RepositoryException, AudioRepository
 
 class MongoAudioRepository(AudioRepository):
     """Repository for storing streaming diarization results and audio chunks in MongoDB."""
     
-    def __init__(self, connection_string: str, database_name: str):
+    def __init__(self, connection_string: str, database_name: str, inference_cache_ttl_seconds: int = 604800):
+        self.inference_cache_ttl_seconds = inference_cache_ttl_seconds
         self.client = motor.motor_asyncio.AsyncIOMotorClient(connection_string)
         self.db = self.client[database_name]
         self.fs_bucket = motor.motor_asyncio.AsyncIOMotorGridFSBucket(self.db)
@@ -32,13 +37,23 @@ class MongoAudioRepository(AudioRepository):
             await self.db.diarization_sessions.create_index("session_id", unique=True)
             await self.db.diarization_sessions.create_index("created_at")
             await self.db.diarization_sessions.create_index("is_complete")
+            await self.db.session_summaries.create_index("session_id", unique=True)
+            await self.db.knowledge_graphs.create_index("session_id", unique=True)
+            await self.db.inference_cache.create_index("key", unique=True)
+            await self.db.inference_cache.create_index("sessions")
+            await self.db.inference_cache.create_index(
+                "created_at",
+                expireAfterSeconds=self.inference_cache_ttl_seconds
+            )
             
-            # Create indexes for GridFS metadata
-            await self.db.fs_bucket.files.create_index("metadata.session_id")
-            await self.db.fs_bucket.files.create_index([
+            # Create indexes for GridFS metadata. The default bucket keeps its
+            # files in `fs.files`; the index also serves lookups by session
+            # alone and the highest sequence number of a session, and being
+            # unique it stores each chunk of a session once
+            await self.db.fs.files.create_index([
                 ("metadata.session_id", ASCENDING),
                 ("metadata.sequence_number", ASCENDING)
-            ])
+            ], unique=True)
             
             # Create index for chunks
             # chunks_collection = self.fs_bucket.chunks
@@ -59,21 +74,38 @@ class MongoAudioRepository(AudioRepository):
     ) -> str:
         """Store a single audio chunk in GridFS."""
         try:
+            # A retried upload keeps the chunk stored first
+            stored_id = await self._stored_chunk_id(chunk_dxo.session_id, chunk_dxo.sequence_number)
+            if stored_id is not None:
+                return stored_id
+            
             file_content = chunk.read()
             chunk_id = str(ObjectId())
+            file_id = ObjectId()
             
-            await self.fs_bucket.upload_from_stream(
-                f"{chunk_dxo.session_id}_{chunk_dxo.sequence_number}.wav",
-                file_content,
-                metadata={
-                    "chunk_id": chunk_id,
-                    "session_id": str(chunk_dxo.session_id),
-                    "sequence_number": chunk_dxo.sequence_number,
-                    "content_type": chunk_dxo.content_type,
-                    "created_at": chunk_dxo.created_at,
-                    "file_size": len(file_content)
-                }
-            )
+            try:
+                await self.fs_bucket.upload_from_stream_with_id(
+                    file_id,
+                    chunk_dxo.original_filename,
+                    file_content,
+                    metadata={
+                        "chunk_id": chunk_id,
+                        "session_id": str(chunk_dxo.session_id),
+                        "sequence_number": chunk_dxo.sequence_number,
+                        "content_type": chunk_dxo.content_type,
+                        "codec": chunk_dxo.codec,
+                        "created_at": chunk_dxo.created_at,
+                        "file_size": len(file_content)
+                    }
+                )
+            except (DuplicateKeyError, gridfs.errors.FileExists):
+                # A concurrent retry stored the chunk first; the unique index
+                # rejected this file after its data was written
+                await self.db.fs.chunks.delete_many({"files_id": file_id})
+                stored_id = await self._stored_chunk_id(chunk_dxo.session_id, chunk_dxo.sequence_number)
+                if stored_id is None:
+                    raise
+                return stored_id
             
             return chunk_id
             
@@ -81,6 +113,39 @@ class MongoAudioRepository(AudioRepository):
             logger.error(f"Failed to store audio chunk: {str(e)}")
             raise RepositoryException(f"Failed to store audio chunk: {str(e)}")
 
+    async def _stored_chunk_id(self, session_id: UUID, sequence_number: int) -> Optional[str]:
+        """Chunk ID of a session's stored chunk, if there is one."""
+        cursor = self.fs_bucket.find(
+            {
+                "metadata.session_id": str(session_id),
+                "metadata.sequence_number": sequence_number
+            },
+            limit=1
+        )
+        async for grid_out in cursor:
+            return grid_out.metadata["chunk_id"]
+        return None
+
+    async def get_next_sequence_number(
+        self,
+        session_id: UUID
+    ) -> int:
+        """Sequence number following the highest chunk stored for a session."""
+        try:
+            # Stored chunks include uploads not yet appended to the session
+            cursor = self.fs_bucket.find(
+                {"metadata.session_id": str(session_id)},
+                sort=[("metadata.sequence_number", DESCENDING)],
+                limit=1
+            )
+            async for grid_out in cursor:
+                return grid_out.metadata["sequence_number"] + 1
+            return 0
+            
+        except Exception as e:
+            logger.error(f"Failed to get next sequence number: {str(e)}")
+            raise RepositoryException(f"Failed to get next sequence number: {str(e)}")
+
     async def update_session_diarization(
         self,
         session_dxo: SessionDiarizationDXO
@@ -101,24 +166,268 @@ class MongoAudioRepository(AudioRepository):
             logger.error(f"Failed to update session diarization: {str(e)}")
             raise RepositoryException(f"Failed to update session diarization: {str(e)}")
 
+    async def append_session_segments(
+        self,
+        session_id: UUID,
+        chunk_id: str,
+        sequence_number: int,
+        segments: List[SpeechSegmentDXO],
+        duration: float,
+        is_final: bool,
+        speaker_profiles: Optional[Dict[str, SpeakerProfileDXO]] = None,
+        skipped_seconds: float = 0.0
+    ) -> Optional[SessionDiarizationDXO]:
+        """Atomically append a chunk's segments to a session, creating it if needed."""
+        try:
+            now = datetime.now(timezone.utc)
+            updates = {"last_updated": now, "is_complete": is_final}
+            for label, profile in (speaker_profiles or {}).items():
+                updates[f"speaker_profiles.{label}"] = profile.model_dump()
+            
+            try:
+                # Only a session without this chunk matches, so a retried chunk
+                # is appended once
+                result = await self.db.diarization_sessions.find_one_and_update(
+                    {"session_id": str(session_id), "chunk_sequences": {"$ne": sequence_number}},
+                    {
+                        "$push": {
+                            "segments": {"$each": [segment.model_dump() for segment in segments]},
+                            "chunks": chunk_id,
+                            "chunk_sequences": sequence_number
+                        },
+                        "$addToSet": {"speakers": {"$each": sorted({s.speaker for s in segments})}},
+                        "$inc": {"segment_count": len(segments), "revision": 1, "skipped_seconds": skipped_seconds},
+                        "$max": {"duration": duration},
+                        "$set": updates,
+                        "$setOnInsert": {
+                            "id": str(ObjectId()),
+                            "created_at": now,
+                            "total_speakers": 0
+                        }
+                    },
+                    projection={"segments": 0, "chunks": 0, "chunk_sequences": 0, "speaker_profiles": 0},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # The session exists and already has this chunk
+                return None
+            
+            # Keep the denormalized speaker count in step with the speaker set
+            total_speakers = len(result["speakers"])
+            if result["total_speakers"] != total_speakers:
+                await self.db.diarization_sessions.update_one(
+                    {"session_id": str(session_id)},
+                    {"$max": {"total_speakers": total_speakers}}
+                )
+                result["total_speakers"] = total_speakers
+            
+            return SessionDiarizationDXO(**result, segments=segments, chunks=[chunk_id], chunk_sequences=[sequence_number])
+            
+        except Exception as e:
+            logger.error(f"Failed to append session segments: {str(e)}")
+            raise RepositoryException(f"Failed to append session segments: {str(e)}")
+
     async def get_session_diarization(
         self,
-        session_id: UUID
+        session_id: UUID,
+        segments_tail: Optional[int] = None
     ) -> Optional[SessionDiarizationDXO]:
         """Retrieve session diarization results."""
         try:
+            projection = None
+            if segments_tail == 0:
+                projection = {"segments": 0}
+            elif segments_tail is not None:
+                # $slice with a negative count keeps the last N elements
+                projection = {"segments": {"$slice": -segments_tail}}
+            
             result = await self.db.diarization_sessions.find_one(
-                {"session_id": str(session_id)}
+                {"session_id": str(session_id)},
+                projection
             )
             if not result:
                 return None
-                
+            
+            result.setdefault("segments", [])
             return SessionDiarizationDXO(**result)
             
         except Exception as e:
             logger.error(f"Failed to retrieve session diarization: {str(e)}")
             raise RepositoryException(f"Failed to retrieve session diarization: {str(e)}")
 
+    async def get_segments_from(
+        self,
+        session_id: UUID,
+        offset: int,
+        limit: int
+    ) -> List[SpeechSegmentDXO]:
+        """Retrieve up to `limit` segments starting at position `offset`."""
+        try:
+            # Slice on the server so only the requested segments are transferred
+            pipeline = [
+                {"$match": {"session_id": str(session_id)}},
+                {"$project": {
+                    "_id": 0,
+                    "segments": {"$slice": ["$segments", offset, limit]}
+                }}
+            ]
+            
+            async for result in self.db.diarization_sessions.aggregate(pipeline):
+                return [SpeechSegmentDXO(**segment) for segment in result.get("segments") or []]
+            
+            return []
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve session segments: {str(e)}")
+            raise RepositoryException(f"Failed to retrieve session segments: {str(e)}")
+
+    async def get_chunk_segments(
+        self,
+        session_id: UUID,
+        sequence_number: int
+    ) -> List[SpeechSegmentDXO]:
+        """Retrieve the segments a chunk added to its session."""
+        try:
+            pipeline = [
+                {"$match": {"session_id": str(session_id)}},
+                {"$project": {
+                    "_id": 0,
+                    "segments": {"$filter": {
+                        "input": "$segments",
+                        "cond": {"$eq": ["$$this.chunk_sequence", sequence_number]}
+                    }}
+                }}
+            ]
+            
+            async for result in self.db.diarization_sessions.aggregate(pipeline):
+                return [SpeechSegmentDXO(**segment) for segment in result.get("segments") or []]
+            
+            return []
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve chunk segments: {str(e)}")
+            raise RepositoryException(f"Failed to retrieve chunk segments: {str(e)}")
+
+    async def get_inference_result(
+        self,
+        key: str,
+        session_id: UUID
+    ) -> Optional[InferenceResultDXO]:
+        """Retrieve cached model outputs by content hash and record the session using them."""
+        try:
+            result = await self.db.inference_cache.find_one_and_update(
+                {"key": key},
+                {"$addToSet": {"sessions": str(session_id)}},
+                projection={"_id": 0, "sessions": 0}
+            )
+            return InferenceResultDXO(**result) if result else None
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve inference result: {str(e)}")
+            raise RepositoryException(f"Failed to retrieve inference result: {str(e)}")
+
+    async def record_inference_use(
+        self,
+        key: str,
+        session_id: UUID
+    ) -> bool:
+        """Record a session using cached model outputs; False if none are stored."""
+        try:
+            result = await self.db.inference_cache.update_one(
+                {"key": key},
+                {"$addToSet": {"sessions": str(session_id)}}
+            )
+            return result.matched_count > 0
+            
+        except Exception as e:
+            logger.error(f"Failed to record inference use: {str(e)}")
+            raise RepositoryException(f"Failed to record inference use: {str(e)}")
+
+    async def store_inference_result(
+        self,
+        result_dxo: InferenceResultDXO,
+        session_id: UUID
+    ) -> None:
+        """Cache model outputs under their content hash for the session producing them."""
+        try:
+            await self.db.inference_cache.update_one(
+                {"key": result_dxo.key},
+                {
+                    "$setOnInsert": result_dxo.model_dump(exclude={"key"}),
+                    "$addToSet": {"sessions": str(session_id)}
+                },
+                upsert=True
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to store inference result: {str(e)}")
+            raise RepositoryException(f"Failed to store inference result: {str(e)}")
+
+    async def get_session_summary(
+        self,
+        session_id: UUID
+    ) -> Optional[SessionSummaryDXO]:
+        """Retrieve the running summary of a session."""
+        try:
+            result = await self.db.session_summaries.find_one({"session_id": str(session_id)})
+            return SessionSummaryDXO(**result) if result else None
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve session summary: {str(e)}")
+            raise RepositoryException(f"Failed to retrieve session summary: {str(e)}")
+
+    async def update_session_summary(
+        self,
+        summary_dxo: SessionSummaryDXO
+    ) -> None:
+        """Update or create the running summary of a session."""
+        try:
+            document = summary_dxo.model_dump()
+            document["session_id"] = str(document["session_id"])
+            
+            await self.db.session_summaries.update_one(
+                {"session_id": document["session_id"]},
+                {"$set": document},
+                upsert=True
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to update session summary: {str(e)}")
+            raise RepositoryException(f"Failed to update session summary: {str(e)}")
+
+    async def get_knowledge_graph(
+        self,
+        session_id: UUID
+    ) -> Optional[KnowledgeGraphDXO]:
+        """Retrieve the knowledge graph of a session."""
+        try:
+            result = await self.db.knowledge_graphs.find_one({"session_id": str(session_id)})
+            return KnowledgeGraphDXO(**result) if result else None
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve knowledge graph: {str(e)}")
+            raise RepositoryException(f"Failed to retrieve knowledge graph: {str(e)}")
+
+    async def update_knowledge_graph(
+        self,
+        graph_dxo: KnowledgeGraphDXO
+    ) -> None:
+        """Update or create the knowledge graph of a session."""
+        try:
+            document = graph_dxo.model_dump()
+            document["session_id"] = str(document["session_id"])
+            
+            await self.db.knowledge_graphs.update_one(
+                {"session_id": document["session_id"]},
+                {"$set": document},
+                upsert=True
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to update knowledge graph: {str(e)}")
+            raise RepositoryException(f"Failed to update knowledge graph: {str(e)}")
+
     async def get_session_chunks(
         self,
         session_id: UUID
@@ -156,6 +465,26 @@ class MongoAudioRepository(AudioRepository):
                         {"session_id": str(session_id)},
                         session=session
                     )
+                    await self.db.session_summaries.delete_one(
+                        {"session_id": str(session_id)},
+                        session=session
+                    )
+                    await self.db.knowledge_graphs.delete_one(
+                        {"session_id": str(session_id)},
+                        session=session
+                    )
+                    
+                    # Drop cached inference only this session used and
+                    # release it from entries shared with other sessions
+                    await self.db.inference_cache.delete_many(
+                        {"sessions": [str(session_id)]},
+                        session=session
+                    )
+                    await self.db.inference_cache.update_many(
+                        {"sessions": str(session_id)},
+                        {"$pull": {"sessions": str(session_id)}},
+                        session=session
+                    )
                     
                     # Delete all associated chunks
                     cursor = self.fs_bucket.find({"metadata.session_id": str(session_id)})
@@ -255,6 +584,8 @@ class MongoAudioRepository(AudioRepository):
             chunks = await self.get_session_chunks(session_id)
             if not chunks:
                 return None
+            if any(not chunk_data.startswith(b"RIFF") for _, chunk_data in chunks):
+                raise RepositoryException("Only sessions uploaded as WAV can be merged")
             
             # Merge WAV files maintaining headers only from first chunk
             result = chunks[0][1]  # First chunk with header
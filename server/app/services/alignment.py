@@ -0,0 +1,119 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def assign_words_to_turns(
+    turn_starts: Sequence[float],
+    turn_ends: Sequence[float],
+    word_starts: Sequence[float],
+    word_ends: Sequence[float]
+) -> np.ndarray:
+    """
+    Attribute every word to exactly one speaker turn.
+
+    A word goes to the turn it overlaps most, the earliest starting one on
+    ties; words overlapping no turn go to the nearest one. Turns are grouped
+    into classes of similar duration (powers of two) and sorted by start, so
+    in each class the candidates of a word are the turns starting between
+    the word's end and its start minus the class's longest duration, found
+    with `searchsorted`. A long turn, such as a monologue with short
+    interjections, only widens the search in its own class. The cost is
+    O((turns + words) log turns) plus, per class, the turns active around
+    each word.
+
+    Returns the index of the assigned turn (in input order) per word, or -1 for
+    every word when there are no turns.
+
+    """
+    ts = np.asarray(turn_starts, dtype=np.float64)
+    te = np.asarray(turn_ends, dtype=np.float64)
+    ws = np.asarray(word_starts, dtype=np.float64)
+    we = np.asarray(word_ends, dtype=np.float64)
+
+    n_words = len(ws)
+    if len(ts) == 0 or n_words == 0:
+        return np.full(n_words, -1, dtype=np.int64)
+
+    order = np.argsort(ts, kind="stable")
+    ts, te = ts[order], te[order]
+
+    best = np.full(n_words, -1, dtype=np.int64)
+    best_overlap = np.zeros(n_words, dtype=np.float64)
+
+    # Durations below a millisecond share the lowest class
+    durations = np.maximum(te - ts, 0.0)
+    classes = np.floor(np.log2(np.maximum(durations, 1e-3))).astype(np.int64)
+    for duration_class in np.unique(classes):
+        # Indices into the start-sorted turns, so still sorted by start
+        members = np.nonzero(classes == duration_class)[0]
+        longest = durations[members].max()
+
+        # Candidates are the class's turns in [lo, hi): they start before the
+        # word ends, and later than its start minus the longest duration
+        hi = np.searchsorted(ts[members], we, side="left")
+        lo = np.searchsorted(ts[members], ws - longest, side="right")
+        width = np.maximum(hi - lo, 0)
+        if not width.any():
+            continue
+
+        # Sweep candidate offsets; at step k only words with more than k candidates
+        # remain, which is a prefix once words are sorted by candidate count
+        by_width = np.argsort(-width, kind="stable")
+        sorted_width = width[by_width]
+        for k in range(int(sorted_width[0])):
+            active = by_width[:np.searchsorted(-sorted_width, -k, side="left")]
+            idx = members[lo[active] + k]
+            overlap = np.minimum(we[active], te[idx]) - np.maximum(ws[active], ts[idx])
+            current = best_overlap[active]
+            better = (overlap > current) | ((overlap == current) & (overlap > 0) & (idx < best[active]))
+            best[active[better]] = idx[better]
+            best_overlap[active[better]] = overlap[better]
+
+    # Words outside every turn go to the closest preceding or following turn
+    orphans = np.nonzero(best < 0)[0]
+    if len(orphans):
+        running_end = np.maximum.accumulate(te)
+        positions = np.arange(len(te))
+        running_arg = np.maximum.accumulate(np.where(te == running_end, positions, 0))
+        hi = np.searchsorted(ts, we[orphans], side="left")
+        prev_idx = running_arg[np.maximum(hi - 1, 0)]
+        prev_gap = np.where(
+            hi > 0,
+            ws[orphans] - running_end[np.maximum(hi - 1, 0)],
+            np.inf
+        )
+        next_idx = np.minimum(hi, len(ts) - 1)
+        next_gap = np.where(hi < len(ts), ts[next_idx] - we[orphans], np.inf)
+        best[orphans] = np.where(prev_gap <= next_gap, prev_idx, next_idx)
+
+    return order[best]
+
+
+def extract_words(transcription: Dict) -> List[Tuple[float, float, str]]:
+    """Flatten Whisper word-level timestamps into (start, end, word) tuples."""
+    return [
+        (word["start"], word["end"], word["word"])
+        for segment in transcription.get("segments", [])
+        for word in segment.get("words", [])
+    ]
+
+
+def align_transcript(
+    turns: Sequence[Tuple[float, float]],
+    words: Sequence[Tuple[float, float, str]]
+) -> List[str]:
+    """Build the text spoken in each turn from word-level timestamps."""
+    texts: List[List[str]] = [[] for _ in turns]
+    if not turns or not words:
+        return ["" for _ in turns]
+
+    turn_starts, turn_ends = zip(*turns)
+    word_starts, word_ends, tokens = zip(*words)
+    assignment = assign_words_to_turns(turn_starts, turn_ends, word_starts, word_ends)
+
+    for token, turn_index in zip(tokens, assignment):
+        texts[turn_index].append(token)
+
+    # Whisper words carry their own leading whitespace
+    return ["".join(parts).strip() for parts in texts]
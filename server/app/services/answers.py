@@ -0,0 +1,100 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+
+
+# (session, normalized question, graph version, transcript revision)
+AnswerKey = Tuple[UUID, str, int, int]
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?!. ")
+
+
+class AnswerCache:
+    """
+    LRU cache of answers keyed by session, normalized question, the version
+    of the session's knowledge graph and the revision of its transcript.
+
+    Answers quote both the graph and transcript excerpts, so a graph change
+    or a transcript change make older answers stop matching; they are dropped as
+    soon as the session is seen in a newer state. Entries also expire after
+    `ttl_seconds`.
+
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (answer, stored at)
+        self._entries: "OrderedDict[AnswerKey, Tuple[str, float]]" = OrderedDict()
+        self._by_session: Dict[UUID, Set[AnswerKey]] = {}
+        self._versions: Dict[UUID, Tuple[int, int]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._invalidated = 0
+
+    def key(self, session_id: UUID, question: str, version: int, revision: int) -> AnswerKey:
+        return (session_id, normalize_question(question), version, revision)
+
+    def get(self, key: AnswerKey) -> Optional[str]:
+        self._observe_version(key[0], key[2:])
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        answer, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._remove(key)
+            self._expired += 1
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return answer
+
+    def put(self, key: AnswerKey, answer: str) -> None:
+        self._observe_version(key[0], key[2:])
+        if key[2:] < self._versions[key[0]]:
+            # The graph or transcript changed while this answer was generated
+            return
+        self._entries[key] = (answer, time.monotonic())
+        self._entries.move_to_end(key)
+        self._by_session.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self._hits,
+            "misses": self._misses,
+            "expired": self._expired,
+            "invalidated": self._invalidated,
+            "hit_rate": self._hits / lookups if lookups else 0.0
+        }
+
+    def _observe_version(self, session_id: UUID, version: Tuple[int, int]) -> None:
+        # Graph versions and transcript revisions only grow, so a newer state
+        # compares greater
+        if version > self._versions.get(session_id, (-1, -1)):
+            for key in list(self._by_session.get(session_id, ())):
+                if key[2:] < version:
+                    self._remove(key)
+                    self._invalidated += 1
+            self._versions[session_id] = version
+
+    def _remove(self, key: AnswerKey) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_session.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_session[key[0]]
@@ -0,0 +1,396 @@
+import io
+import struct
+import time
+import wave
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+import av
+import numpy as np
+import torch
+import torchaudio
+
+
+SAMPLE_RATE = 16000  # Rate expected by both pyannote and Whisper
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# Bytes per sample of the accepted headerless PCM encodings
+PCM_SAMPLE_WIDTHS = {"pcm_s16le": 2, "pcm_f32le": 4}
+
+# Leading bytes of accepted containers -> (content type, file extension)
+AUDIO_FORMATS = {
+    b"RIFF": ("audio/wav", "wav"),
+    b"OggS": ("audio/ogg", "ogg"),
+    b"\x1a\x45\xdf\xa3": ("audio/webm", "webm"),
+    b"fLaC": ("audio/flac", "flac"),
+}
+
+
+def sniff_format(data: BytesLike) -> Tuple[str, str]:
+    """Content type and file extension of an audio upload, from its leading bytes."""
+    head = bytes(memoryview(data)[:4])
+    if head not in AUDIO_FORMATS:
+        raise ValueError("File must be a WAV, Ogg/Opus, WebM or FLAC audio file")
+    return AUDIO_FORMATS[head]
+
+
+def decode_audio(data: BytesLike) -> Tuple[np.ndarray, str, str]:
+    """
+    Decode an audio upload into a mono float32 waveform at 16 kHz.
+
+    Returns the waveform with the content type and codec of the upload. WAV
+    takes the in-memory path of `decode_wav`, compressed containers are
+    decoded with PyAV.
+
+    """
+    content_type, _ = sniff_format(data)
+    if content_type == "audio/wav":
+        samples = decode_wav(data)
+        return samples, content_type, "pcm"
+
+    samples, codec = _decode_container(data)
+    return samples, content_type, codec
+
+
+def decode_wav(data: BytesLike) -> np.ndarray:
+    """
+    Decode WAV bytes into a mono float32 waveform at 16 kHz.
+
+    Mono float32 input at 16 kHz is returned as a view over `data` without
+    copying; other layouts are converted once.
+
+    """
+    view = memoryview(data)
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        raise ValueError("File must be a valid WAV audio file")
+
+    fmt = None
+    samples = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", view, offset + 4)[0]
+        body_start = offset + 8
+        # Streaming writers leave the data size unset, so clamp to what we have
+        body_end = min(body_start + chunk_size, len(view))
+
+        if chunk_id == b"fmt ":
+            fmt = _parse_fmt(view[body_start:body_end])
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes its fmt chunk")
+            samples = _decode_samples(view[body_start:body_end], *fmt)
+            break
+
+        # Chunks are word aligned
+        offset = body_end + (chunk_size & 1)
+
+    if samples is None:
+        raise ValueError("WAV file has no audio data")
+
+    _, channels, sample_rate, _ = fmt
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+    return resample(samples, sample_rate)
+
+
+def resample(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Resample a mono float32 waveform to 16 kHz."""
+    if sample_rate == SAMPLE_RATE:
+        return samples
+    resampled = torchaudio.functional.resample(
+        torch.from_numpy(np.ascontiguousarray(samples)),
+        orig_freq=sample_rate,
+        new_freq=SAMPLE_RATE
+    )
+    return resampled.numpy()
+
+
+def to_pipeline_input(samples: np.ndarray) -> Dict[str, Union[torch.Tensor, int]]:
+    """Wrap a waveform in the in-memory input format of pyannote pipelines."""
+    return {
+        "waveform": torch.from_numpy(samples).unsqueeze(0),
+        "sample_rate": SAMPLE_RATE
+    }
+
+
+def encode_wav(samples: np.ndarray) -> bytes:
+    """Encode a 16 kHz waveform as 16-bit PCM WAV bytes for storage."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def decode_pcm(data: BytesLike, encoding: str) -> np.ndarray:
+    """Decode headerless mono PCM frames into float32 samples."""
+    view = memoryview(data)
+    if encoding == "pcm_s16le":
+        view = view[:len(view) - len(view) % 2]
+        return np.frombuffer(view, dtype="<i2").astype(np.float32) / 32768.0
+    if encoding == "pcm_f32le":
+        view = view[:len(view) - len(view) % 4]
+        return np.frombuffer(view, dtype="<f4").astype(np.float32)
+    raise ValueError(f"Unsupported PCM encoding: {encoding}")
+
+
+def duration_of(samples: np.ndarray) -> float:
+    """Duration in seconds of a 16 kHz waveform."""
+    return len(samples) / SAMPLE_RATE
+
+
+def detect_speech(
+    samples: np.ndarray,
+    threshold_db: float,
+    min_speech_ms: float = 200.0,
+    padding_ms: float = 300.0,
+    frame_ms: float = 30.0
+) -> Optional[Tuple[int, int]]:
+    """
+    Energy-based voice activity detection.
+
+    Returns the sample range from the first to the last frame louder than
+    `threshold_db` dBFS, padded by `padding_ms`, or None when less than
+    `min_speech_ms` of the waveform is that loud.
+
+    """
+    frame = int(SAMPLE_RATE * frame_ms / 1000)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return None
+
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    energy_db = 10 * np.log10(np.mean(np.square(frames, dtype=np.float32), axis=1) + 1e-10)
+    voiced = np.nonzero(energy_db > threshold_db)[0]
+    if len(voiced) * frame_ms < min_speech_ms:
+        return None
+
+    padding = int(SAMPLE_RATE * padding_ms / 1000)
+    start = max(int(voiced[0]) * frame - padding, 0)
+    end = min((int(voiced[-1]) + 1) * frame + padding, len(samples))
+    return start, end
+
+
+class StreamWindower:
+    """
+    Cuts a continuous mono PCM stream into analysis windows.
+
+    A window is closed in the middle of the first pause of at least
+    `pause_ms` once it is `min_window_seconds` long, or at its quietest frame
+    near the end once it reaches `max_window_seconds`. Windows are returned
+    resampled to 16 kHz.
+
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        threshold_db: float,
+        min_window_seconds: float,
+        max_window_seconds: float,
+        pause_ms: float,
+        frame_ms: float = 30.0
+    ):
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.min_frames = int(min_window_seconds * 1000 / frame_ms)
+        self.max_frames = int(max_window_seconds * 1000 / frame_ms)
+        self.pause_frames = max(1, int(pause_ms / frame_ms))
+        self._parts: List[np.ndarray] = []
+        self._buffered = 0
+        self._unframed = np.zeros(0, dtype=np.float32)
+        self._energies: List[float] = []  # dBFS per complete frame
+        self._quiet_run = 0  # Trailing quiet frames
+        self._leftover = b""  # Bytes of a sample split across messages
+
+    def push_pcm(self, data: BytesLike, encoding: str) -> List[np.ndarray]:
+        """Add PCM bytes and return every window completed by them."""
+        if self._leftover:
+            data = self._leftover + bytes(data)
+        width = PCM_SAMPLE_WIDTHS[encoding]
+        whole = len(data) - len(data) % width
+        # A sample cut by the message boundary is completed by the next message
+        self._leftover = bytes(memoryview(data)[whole:])
+        return self.push(decode_pcm(memoryview(data)[:whole], encoding))
+
+    def push(self, samples: np.ndarray) -> List[np.ndarray]:
+        """Add samples and return every window completed by them."""
+        self._parts.append(samples)
+        self._buffered += len(samples)
+
+        # Only the samples not yet covered by a complete frame are measured
+        pending = np.concatenate([self._unframed, samples])
+        n_new = len(pending) // self.frame
+        self._unframed = pending[n_new * self.frame:]
+        frames = pending[:n_new * self.frame].reshape(n_new, self.frame)
+        energies = 10 * np.log10(np.mean(np.square(frames, dtype=np.float32), axis=1) + 1e-10)
+
+        windows = []
+        for energy in energies.tolist():
+            self._energies.append(energy)
+            self._quiet_run = self._quiet_run + 1 if energy <= self.threshold_db else 0
+
+            n_frames = len(self._energies)
+            if n_frames >= self.min_frames and self._quiet_run >= self.pause_frames:
+                windows.append(self._cut(n_frames - self._quiet_run // 2))
+            elif n_frames >= self.max_frames:
+                search = self._energies[-self.pause_frames * 4:]
+                quietest = n_frames - len(search) + int(np.argmin(search))
+                windows.append(self._cut(max(quietest, 1)))
+        return windows
+
+    def flush(self) -> Optional[np.ndarray]:
+        """Return whatever audio is buffered as a last window."""
+        self._leftover = b""
+        if not self._buffered:
+            return None
+        samples = np.concatenate(self._parts)
+        self._parts, self._buffered, self._energies, self._quiet_run = [], 0, [], 0
+        self._unframed = np.zeros(0, dtype=np.float32)
+        return resample(samples, self.sample_rate)
+
+    def _cut(self, n_frames: int) -> np.ndarray:
+        samples = np.concatenate(self._parts)
+        cut = n_frames * self.frame
+        self._parts = [samples[cut:]]
+        self._buffered = len(samples) - cut
+        self._energies = self._energies[n_frames:]
+        self._quiet_run = 0
+        for energy in reversed(self._energies):
+            if energy > self.threshold_db:
+                break
+            self._quiet_run += 1
+        return resample(samples[:cut], self.sample_rate)
+
+
+class OverlapBuffer:
+    """
+    Bounded per-session store of the trailing audio of the last processed chunk.
+
+    Holds at most `overlap_seconds` of PCM per session for at most
+    `max_sessions` sessions; entries idle for `idle_seconds` are evicted.
+
+    """
+
+    def __init__(self, overlap_seconds: float, idle_seconds: float, max_sessions: int):
+        self.max_samples = int(overlap_seconds * SAMPLE_RATE)
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        # session -> (tail samples, sequence number of the chunk, last use)
+        self._tails: "OrderedDict[UUID, Tuple[np.ndarray, int, float]]" = OrderedDict()
+
+    def get(self, session_id: UUID, sequence_number: int) -> np.ndarray:
+        """Tail of the chunk preceding `sequence_number`, empty if not buffered."""
+        self.evict_idle()
+        entry = self._tails.get(session_id)
+        if entry is None or entry[1] != sequence_number - 1:
+            return np.zeros(0, dtype=np.float32)
+        return entry[0]
+
+    def put(self, session_id: UUID, sequence_number: int, samples: np.ndarray) -> None:
+        """Keep the tail of a processed chunk for the next one."""
+        if self.max_samples <= 0:
+            return
+        # Copy so the entry does not pin the whole decoded chunk in memory
+        tail = np.array(samples[-self.max_samples:], dtype=np.float32)
+        self._tails[session_id] = (tail, sequence_number, time.monotonic())
+        self._tails.move_to_end(session_id)
+        while len(self._tails) > self.max_sessions:
+            self._tails.popitem(last=False)
+
+    def discard(self, session_id: UUID) -> None:
+        self._tails.pop(session_id, None)
+
+    def evict_idle(self) -> int:
+        """Drop entries unused for longer than the idle timeout."""
+        cutoff = time.monotonic() - self.idle_seconds
+        evicted = 0
+        # Entries are kept in least-recently-used order
+        while self._tails and next(iter(self._tails.values()))[2] < cutoff:
+            self._tails.popitem(last=False)
+            evicted += 1
+        return evicted
+
+
+def _decode_container(data: BytesLike) -> Tuple[np.ndarray, str]:
+    try:
+        with av.open(io.BytesIO(data), mode="r") as container:
+            if not container.streams.audio:
+                raise ValueError("File has no audio stream")
+            stream = container.streams.audio[0]
+            # Downmix and resample while decoding, frames arrive as packed float32
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+            parts = []
+            for frame in container.decode(stream):
+                for resampled in resampler.resample(frame):
+                    parts.append(resampled.to_ndarray().reshape(-1))
+            for resampled in resampler.resample(None):
+                parts.append(resampled.to_ndarray().reshape(-1))
+            codec = stream.codec_context.name
+    except av.error.FFmpegError as e:
+        raise ValueError(f"Failed to decode audio: {str(e)}")
+
+    if not parts:
+        return np.zeros(0, dtype=np.float32), codec
+    return np.concatenate(parts).astype(np.float32, copy=False), codec
+
+
+def _parse_fmt(body: memoryview):
+    if len(body) < 16:
+        raise ValueError("WAV fmt chunk is truncated")
+    audio_format, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", body)
+    if audio_format == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+        # The sub-format GUID starts with the actual format tag
+        audio_format = struct.unpack_from("<H", body, 24)[0]
+    if channels < 1 or sample_rate < 1:
+        raise ValueError("WAV fmt chunk is invalid")
+    return audio_format, channels, sample_rate, bits
+
+
+def _decode_samples(
+    body: memoryview,
+    audio_format: int,
+    channels: int,
+    sample_rate: int,
+    bits: int
+) -> np.ndarray:
+    width = bits // 8
+    # Drop any trailing partial frame
+    usable = len(body) - len(body) % (width * channels) if width else 0
+    body = body[:usable]
+
+    if audio_format == _WAVE_FORMAT_IEEE_FLOAT:
+        if bits == 32:
+            return np.frombuffer(body, dtype="<f4")
+        if bits == 64:
+            return np.frombuffer(body, dtype="<f8").astype(np.float32)
+    elif audio_format == _WAVE_FORMAT_PCM:
+        if bits == 8:
+            pcm = np.frombuffer(body, dtype=np.uint8)
+            return (pcm.astype(np.float32) - 128.0) / 128.0
+        if bits == 16:
+            return np.frombuffer(body, dtype="<i2").astype(np.float32) / 32768.0
+        if bits == 24:
+            packed = np.frombuffer(body, dtype=np.uint8).reshape(-1, 3)
+            pcm = (
+                packed[:, 0].astype(np.int32)
+                | (packed[:, 1].astype(np.int32) << 8)
+                | (packed[:, 2].astype(np.int8).astype(np.int32) << 16)
+            )
+            return pcm.astype(np.float32) / 8388608.0
+        if bits == 32:
+            return np.frombuffer(body, dtype="<i4").astype(np.float32) / 2147483648.0
+
+    raise ValueError(f"Unsupported WAV encoding (format {audio_format}, {bits} bits)")
@@ -0,0 +1,420 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import HOP_LENGTH, N_SAMPLES, SAMPLE_RATE
+from whisper.timing import add_word_timestamps
+from whisper.tokenizer import get_tokenizer
+
+from app.services.inference import InferenceExecutor
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The thresholds `whisper.transcribe` applies to a decoding by default
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class MicroBatcher:
+    """
+    Collects requests from concurrent callers and runs them as one batch.
+
+    A batch is dispatched as soon as `max_batch_size` requests are pending or
+    `max_wait_ms` after the first of them arrived, whichever comes first. The
+    batch function runs on the inference executor and must return one result
+    per input, in order.
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        executor: InferenceExecutor,
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set = set()
+        self._batches = 0
+        self._items = 0
+        self._size_histogram: Counter = Counter()
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item for the next batch and await its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.monotonic()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._dispatch)
+
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Send every full batch, then at most one partial batch on timeout
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            if len(self._pending) < self.max_batch_size:
+                break
+
+        if self._pending:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._dispatch)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        now = time.monotonic()
+        waits = [now - enqueued for _, _, enqueued in batch]
+        self._batches += 1
+        self._items += len(batch)
+        self._size_histogram[len(batch)] += 1
+        self._total_wait += sum(waits)
+        self._max_wait = max(self._max_wait, max(waits))
+
+        try:
+            results = await self.executor.run(self.batch_fn, [item for item, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} failed in {self.name}: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            # Callers that gave up leave a cancelled future behind
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch size and queueing delay statistics."""
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": len(self._pending),
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self._size_histogram.items())},
+            "mean_wait_ms": 1000 * self._total_wait / self._items if self._items else 0.0,
+            "max_wait_ms_observed": 1000 * self._max_wait
+        }
+
+
+class _ModelCall:
+    def __init__(self, inputs: Tuple[Any, ...]):
+        self.inputs = inputs
+        self.rows = len(inputs[0])
+        self.enqueued = time.monotonic()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class ModelBatcher:
+    """
+    Runs a model once on the stacked inputs of calls made from several threads.
+
+    Every inference worker runs a whole pipeline for one chunk, so a model
+    inside it is called from whichever workers process chunks at the same
+    time. The first call waits up to `max_wait_ms` for calls from other
+    workers, until `max_batch_size` calls are collected, then runs `model_fn`
+    once on their inputs concatenated along the first axis and hands each
+    caller its rows. Calls only share a batch when their inputs match in
+    every other dimension. `None` inputs are passed through.
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model_fn: Callable[..., Any],
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self.name = name
+        self.model_fn = model_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._cond = threading.Condition()
+        self._open: Dict[tuple, List[_ModelCall]] = {}  # Batches still taking calls, by input shape
+        self._batches = 0
+        self._items = 0
+        self._rows = 0
+        self._size_histogram: Counter = Counter()
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def __call__(self, *inputs: Any) -> Any:
+        if self.max_batch_size == 1:
+            return self.model_fn(*inputs)
+
+        call = _ModelCall(inputs)
+        key = tuple(None if x is None else tuple(x.shape[1:]) for x in inputs)
+        with self._cond:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = []
+                self._open[key] = batch
+            batch.append(call)
+            if len(batch) >= self.max_batch_size:
+                del self._open[key]
+                self._cond.notify_all()
+
+        if leader:
+            deadline = call.enqueued + self.max_wait_ms / 1000
+            with self._cond:
+                while self._open.get(key) is batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        del self._open[key]
+                        break
+                    self._cond.wait(remaining)
+            self._run(batch)
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _run(self, batch: List[_ModelCall]) -> None:
+        now = time.monotonic()
+        waits = [now - call.enqueued for call in batch]
+        with self._cond:
+            self._batches += 1
+            self._items += len(batch)
+            self._rows += sum(call.rows for call in batch)
+            self._size_histogram[len(batch)] += 1
+            self._total_wait += sum(waits)
+            self._max_wait = max(self._max_wait, max(waits))
+
+        try:
+            stacked = [
+                None if parts[0] is None else _concatenate(parts)
+                for parts in zip(*(call.inputs for call in batch))
+            ]
+            output = self.model_fn(*stacked)
+            start = 0
+            for call in batch:
+                call.result = output[start:start + call.rows]
+                start += call.rows
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} failed in {self.name}: {str(e)}")
+            for call in batch:
+                call.error = e
+        finally:
+            for call in batch:
+                call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch size and waiting time statistics."""
+        with self._cond:
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "pending": sum(len(batch) for batch in self._open.values()),
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._size_histogram.items())},
+                "mean_wait_ms": 1000 * self._total_wait / self._items if self._items else 0.0,
+                "max_wait_ms_observed": 1000 * self._max_wait
+            }
+
+
+class BatchedEmbedding:
+    """
+    A pyannote speaker embedding model whose calls go through a `ModelBatcher`.
+
+    Everything but calling the model is delegated to the wrapped one.
+
+    """
+
+    def __init__(self, embedding: Any, batcher: ModelBatcher):
+        self._embedding = embedding
+        self._batcher = batcher
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._embedding, name)
+
+    def __call__(self, waveforms: torch.Tensor, masks: Optional[torch.Tensor] = None) -> np.ndarray:
+        return self._batcher(waveforms, masks)
+
+
+def _concatenate(parts: List[Any]) -> Any:
+    if torch.is_tensor(parts[0]):
+        return torch.cat(parts)
+    return np.concatenate(parts)
+
+
+def batch_transcribe(
+    model: whisper.Whisper,
+    batch: List[np.ndarray],
+    fp16: bool
+) -> List[Dict]:
+    """
+    Transcribe several waveforms with one batched Whisper decoding pass.
+
+    Every waveform is cut into windows of at most 30 s at its quietest points,
+    all windows of the batch are decoded together at temperature 0, and word
+    timestamps are recovered per window. Windows judged silent the way
+    `whisper.transcribe` does are dropped, and windows failing its
+    compression ratio or log probability checks are transcribed again on
+    their own with its temperature fallback. Results have the shape of
+    `whisper.transcribe` output.
+
+    """
+    pieces = []  # (batch index, start sample, end sample)
+    for index, samples in enumerate(batch):
+        pieces.extend((index, start, end) for start, end in _split_at_pauses(samples))
+
+    dtype = torch.float16 if fp16 else torch.float32
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(torch.from_numpy(np.ascontiguousarray(batch[index][start:end]))),
+            model.dims.n_mels
+        )
+        for index, start, end in pieces
+    ]).to(model.device)
+
+    decoded = whisper.decode(
+        model,
+        mels,
+        whisper.DecodingOptions(task="transcribe", without_timestamps=False, fp16=fp16)
+    )
+
+    results = [{"text": "", "segments": [], "language": None} for _ in batch]
+    fallbacks = 0
+    for (index, start, end), mel, result in zip(pieces, mels, decoded):
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            continue
+        if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+            fallbacks += 1
+            fallback = model.transcribe(
+                np.ascontiguousarray(batch[index][start:end]),
+                word_timestamps=True,
+                fp16=fp16
+            )
+            segments = fallback["segments"]
+            language = fallback.get("language")
+        else:
+            tokenizer = get_tokenizer(
+                model.is_multilingual,
+                num_languages=model.num_languages,
+                language=result.language,
+                task="transcribe"
+            )
+            duration = (end - start) / SAMPLE_RATE
+            segments = _timestamped_segments(result.tokens, tokenizer, duration)
+            if segments:
+                add_word_timestamps(
+                    segments=segments,
+                    model=model,
+                    tokenizer=tokenizer,
+                    mel=mel.to(dtype),
+                    num_frames=(end - start) // HOP_LENGTH,
+                    last_speech_timestamp=0.0
+                )
+            language = result.language
+
+        offset = start / SAMPLE_RATE
+        for segment in segments:
+            segment["start"] += offset
+            segment["end"] += offset
+            for word in segment.get("words", []):
+                word["start"] += offset
+                word["end"] += offset
+        results[index]["segments"].extend(segments)
+        results[index]["language"] = results[index]["language"] or language
+
+    if fallbacks:
+        logger.info(f"Transcribed {fallbacks} of {len(pieces)} batched windows again with temperature fallback")
+    for result in results:
+        result["text"] = "".join(segment["text"] for segment in result["segments"])
+    return results
+
+
+def _split_at_pauses(
+    samples: np.ndarray,
+    search_seconds: float = 2.0,
+    frame: int = HOP_LENGTH
+) -> List[Tuple[int, int]]:
+    """Cut a waveform into Whisper-sized windows at the lowest-energy frame near each limit."""
+    bounds = []
+    start = 0
+    search = int(search_seconds * SAMPLE_RATE)
+    while len(samples) - start > N_SAMPLES:
+        low = start + N_SAMPLES - search
+        region = samples[low:start + N_SAMPLES]
+        frames = region[:len(region) // frame * frame].reshape(-1, frame)
+        cut = low + int(np.argmin((frames ** 2).mean(axis=1))) * frame
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(samples)))
+    return bounds
+
+
+def _timestamped_segments(tokens: List[int], tokenizer, duration: float) -> List[Dict]:
+    """Split decoded tokens into segments at Whisper's timestamp tokens."""
+    segments = []
+    segment_start = None
+    last_timestamp = 0.0  # The window start until a timestamp is decoded
+    text_tokens: List[int] = []
+    for token in tokens:
+        if token < tokenizer.timestamp_begin:
+            text_tokens.append(token)
+            continue
+        timestamp = (token - tokenizer.timestamp_begin) * 0.02
+        last_timestamp = timestamp
+        if segment_start is not None and text_tokens:
+            segments.append(_segment(segment_start, timestamp, text_tokens, tokenizer))
+            text_tokens = []
+            segment_start = None
+        else:
+            segment_start = timestamp
+
+    if text_tokens:
+        # Text after the last closed segment starts where that one ended
+        start = segment_start if segment_start is not None else last_timestamp
+        segments.append(_segment(min(start, duration), duration, text_tokens, tokenizer))
+    return segments
+
+
+def _segment(start: float, end: float, tokens: List[int], tokenizer) -> Dict:
+    return {
+        "seek": 0,
+        "start": start,
+        "end": end,
+        "text": tokenizer.decode(tokens),
+        "tokens": tokens
+    }
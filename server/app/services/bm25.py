@@ -0,0 +1,87 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+
+DocId = TypeVar("DocId", bound=Hashable)
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no nor
+not now of off on once only or other our ours ourselves out over own same she
+should so some such than that the their theirs them themselves then there these
+they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves
+discussed meeting said tell talk talked mentioned please
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric terms of a text without stop words."""
+    return [term for term in _TOKEN.findall(text.lower()) if term not in STOP_WORDS]
+
+
+class BM25Index(Generic[DocId]):
+    """
+    Incrementally maintained inverted index with Okapi BM25 ranking.
+
+    Documents can be added and removed at any time; document frequencies and
+    the average length are kept up to date, so searches need no rebuild.
+
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[DocId, int]] = defaultdict(dict)
+        self._lengths: Dict[DocId, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: DocId, text: str) -> None:
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        terms = tokenize(text)
+        for term, count in Counter(terms).items():
+            self._postings[term][doc_id] = count
+        self._lengths[doc_id] = len(terms)
+        self._total_length += len(terms)
+
+    def remove(self, doc_id: DocId, text: Optional[str] = None) -> None:
+        """Remove a document; passing its text avoids scanning every posting list."""
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        terms = set(tokenize(text)) if text is not None else list(self._postings)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None and postings.pop(doc_id, None) is not None and not postings:
+                del self._postings[term]
+
+    def search(self, query: str, k: int) -> List[Tuple[DocId, float]]:
+        """The `k` best matching documents with their scores, best first."""
+        if not self._lengths:
+            return []
+        n_docs = len(self._lengths)
+        average_length = self._total_length / n_docs or 1.0
+
+        scores: Dict[DocId, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -1,10 +1,16 @@
+import asyncio
+import functools
+import io
 import logging
-import tempfile
-from pathlib import Path
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from typing import BinaryIO, List, Dict, Set, Tuple, Optional, Union
-from uuid import UUID, uuid4
+from uuid import UUID
 from bson.objectid  import ObjectId
 from pyannote.audio import Pipeline
+import numpy as np
 import torch
 import whisper
 
@@ -13,7 +19,14 @@ from app.repository.meetings.abstractions import AudioRepository
 from app.dto.diarization import SpeechSegment, DiarizationResponse
 
 from app.dxo.diarization import SpeechSegmentDXO, SessionDiarizationDXO
+from app.dxo.inference import InferenceResultDXO
 from app.dxo.meetings import AudioChunkDXO
+from app.services.alignment import align_transcript, extract_words
+from app.services.batching import BatchedEmbedding, MicroBatcher, ModelBatcher, batch_transcribe
+from app.services.audio import OverlapBuffer, SAMPLE_RATE, decode_audio, detect_speech, duration_of, encode_wav, sniff_format, to_pipeline_input
+from app.services.inference import InferenceExecutor
+from app.services.inference_cache import InferenceResultCache
+from app.services.speakers import SpeakerTracker
 
 
 logging.basicConfig(level=logging.INFO)
@@ -23,23 +36,102 @@ logger = logging.getLogger(__name__)
 class StreamingDiarizationService:
     """Service handling streaming audio diarization logic."""
     
-    def __init__(self, config: Settings, repository: AudioRepository):
+    def __init__(
+        self,
+        config: Settings,
+        repository: AudioRepository,
+        executor: InferenceExecutor
+    ):
         self.config = config
         self.repository = repository
-        self.pipeline = self._initialize_pipeline()
-        self.transcriber = self._initialize_transcriber()
-        self.chunk_overlap_seconds = 0.5  # Overlap between chunks
+        self.executor = executor
+        # The models load independently, so read them from disk side by side
+        with ThreadPoolExecutor(max_workers=2) as loader:
+            pipeline_future = loader.submit(self._initialize_pipeline)
+            transcriber_future = loader.submit(self._initialize_transcriber)
+            self.pipeline = pipeline_future.result()
+            self.transcriber = transcriber_future.result()
+        self.overlap = OverlapBuffer(
+            overlap_seconds=config.chunk_overlap_seconds,
+            idle_seconds=config.overlap_buffer_idle_seconds,
+            max_sessions=config.overlap_buffer_max_sessions
+        )
+        # Words ending this close to a chunk's end are left to the next chunk
+        self.boundary_guard_seconds = min(0.25, config.chunk_overlap_seconds / 2)
+        self.speakers = SpeakerTracker(config.speaker_similarity_threshold)
+        # Segmentation and embedding calls of chunks processed side by side
+        # run as one forward pass
+        self.segmentation_batcher, self.embedding_batcher = self._batch_pipeline_models()
+        self.transcription_batcher = MicroBatcher(
+            name="whisper",
+            batch_fn=functools.partial(
+                batch_transcribe,
+                self.transcriber,
+                fp16=self.config.device == "cuda"
+            ),
+            executor=executor,
+            max_batch_size=config.transcription_max_batch_size,
+            max_wait_ms=config.transcription_max_wait_ms
+        )
+        # Anything changing the model outputs for the same audio belongs in the version
+        self.inference_cache = InferenceResultCache(
+            repository,
+            model_version=(
+                f"{config.hf_model_name}|whisper-{config.whisper_model_name}|{config.device}"
+                f"|batched={config.transcription_max_batch_size > 1}"
+            ),
+            max_entries=config.inference_cache_size
+        )
+        self._session_locks: "weakref.WeakValueDictionary[UUID, asyncio.Lock]" = weakref.WeakValueDictionary()
         logger.info(f"Initialized diarization pipeline using device: {self.config.device}")
         
+    def _batch_pipeline_models(self) -> Tuple[ModelBatcher, ModelBatcher]:
+        """
+        Route the pipeline's segmentation and embedding models through batchers.
+
+        The models are private attributes of pyannote.audio 3.x's speaker
+        diarization pipeline (the version is pinned in requirements.txt). If
+        they are missing, the pipeline runs unbatched and the batchers idle.
+        """
+        segmentation = getattr(self.pipeline, "_segmentation", None)
+        infer = getattr(segmentation, "infer", None)
+        embedding = getattr(self.pipeline, "_embedding", None)
+        segmentation_batcher = ModelBatcher(
+            name="pyannote-segmentation",
+            model_fn=infer,
+            max_batch_size=self.config.diarization_max_batch_size,
+            max_wait_ms=self.config.diarization_max_wait_ms
+        )
+        embedding_batcher = ModelBatcher(
+            name="pyannote-embedding",
+            model_fn=embedding,
+            max_batch_size=self.config.diarization_max_batch_size,
+            max_wait_ms=self.config.diarization_max_wait_ms
+        )
+        if not callable(infer) or not callable(embedding):
+            logger.warning(
+                f"{type(self.pipeline).__name__} has no _segmentation.infer or _embedding, "
+                "diarization runs without cross-session batching"
+            )
+            return segmentation_batcher, embedding_batcher
+        
+        segmentation.infer = segmentation_batcher
+        self.pipeline._embedding = BatchedEmbedding(embedding, embedding_batcher)
+        return segmentation_batcher, embedding_batcher
+        
     def _initialize_pipeline(self) -> Pipeline:
         """Initialize the diarization pipeline with error handling."""
         try:
-            print(self.config.hf_model_name, self.config.huggingface_auth_token)
+            started = time.perf_counter()
             pipeline = Pipeline.from_pretrained(
                 self.config.hf_model_name,
                 use_auth_token=self.config.huggingface_auth_token
             )
             pipeline = pipeline.to(torch.device(self.config.device))
+            # Sliding windows of a chunk go through the models in batches of this size
+            pipeline.segmentation_batch_size = self.config.segmentation_batch_size
+            pipeline.embedding_batch_size = self.config.embedding_batch_size
+            logger.info(f"Loaded {self.config.hf_model_name} in {time.perf_counter() - started:.1f}s")
             return pipeline
         except Exception as e:
             logger.error(f"Failed to initialize pipeline: {str(e)}")
@@ -48,12 +140,46 @@ class StreamingDiarizationService:
     def _initialize_transcriber(self) -> whisper.Whisper:
         """Initialize the Whisper transcription model."""
         try:
-            model = whisper.load_model("base")
-            return model.to(torch.device(self.config.device))
+            started = time.perf_counter()
+            model = whisper.load_model(self.config.whisper_model_name)
+            model = model.to(torch.device(self.config.device))
+            logger.info(f"Loaded whisper {self.config.whisper_model_name} in {time.perf_counter() - started:.1f}s")
+            return model
         except Exception as e:
             logger.error(f"Failed to initialize transcriber: {str(e)}")
             raise RuntimeError(f"Failed to initialize transcriber: {str(e)}")
 
+    async def warm_up(self) -> Dict[str, float]:
+        """Run each model once on synthetic audio so the first upload is not slow."""
+        rng = np.random.default_rng(0)
+        t = np.arange(2 * SAMPLE_RATE) / SAMPLE_RATE
+        samples = (
+            0.1 * np.sin(2 * np.pi * 220 * t) + 0.01 * rng.standard_normal(len(t))
+        ).astype(np.float32)
+        
+        timings = {}
+        started = time.perf_counter()
+        await self.executor.run(self.pipeline, to_pipeline_input(samples), return_embeddings=True)
+        timings["diarization_warm_up"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        await self.executor.run(
+            self.transcriber.transcribe,
+            samples,
+            word_timestamps=True,
+            fp16=self.config.device == "cuda"
+        )
+        timings["transcription_warm_up"] = time.perf_counter() - started
+        
+        if self.transcription_batcher.max_batch_size > 1:
+            started = time.perf_counter()
+            await self.executor.run(self.transcription_batcher.batch_fn, [samples])
+            timings["batched_transcription_warm_up"] = time.perf_counter() - started
+        
+        for name, seconds in timings.items():
+            logger.info(f"{name} took {seconds:.2f}s")
+        return timings
+
     async def process_audio_chunk(
         self,
         chunk: BinaryIO,
@@ -62,106 +188,325 @@ class StreamingDiarizationService:
         is_final: bool
     ) -> DiarizationResponse:
         """Process a single audio chunk and update session results."""
-        temp_path = await self._save_temp_file(chunk)
+        samples, chunk_id = await self.store_audio_chunk(chunk, session_id, sequence_number)
+        return await self.process_stored_chunk(samples, chunk_id, session_id, sequence_number, is_final)
+
+    async def store_audio_chunk(
+        self,
+        chunk: BinaryIO,
+        session_id: UUID,
+        sequence_number: int
+    ) -> Tuple[np.ndarray, str]:
+        """
+        Decode and persist an uploaded chunk, returning its waveform and chunk ID.
+
+        Audio that cannot be decoded raises ValueError; repository failures
+        propagate as they are.
+        """
         try:
-            # Store the chunk
+            # Read and decode the upload once, every consumer shares the waveform
+            audio_bytes = bytearray(chunk.read())
+            samples, content_type, codec = decode_audio(audio_bytes)
+            _, extension = sniff_format(audio_bytes)
+            
             chunk_dxo = AudioChunkDXO(
                 id=str(ObjectId()),
                 session_id=session_id,
                 sequence_number=sequence_number,
-                original_filename=f"{session_id}_{sequence_number}.wav"
+                original_filename=f"{session_id}_{sequence_number}.{extension}",
+                content_type=content_type,
+                codec=codec,
+                file_size=len(audio_bytes)
             )
-            chunk_id = await self.repository.store_audio_chunk(chunk, chunk_dxo)
             
-            # Get existing session
-            existing_dxo = await self.repository.get_session_diarization(session_id)
-            
-            # Process the current chunk
-            segments, speakers, duration = await self._process_chunk(
-                temp_path,
-                sequence_number,
-                existing_dxo
+        except Exception as e:
+            logger.error(f"Decoding failed: {str(e)}")
+            raise ValueError(f"Failed to store audio chunk: {str(e)}")
+        
+        # Store the chunk as uploaded, compressed containers stay compressed
+        chunk_id = await self.repository.store_audio_chunk(io.BytesIO(audio_bytes), chunk_dxo)
+        return samples, chunk_id
+
+    async def store_audio_samples(
+        self,
+        samples: np.ndarray,
+        session_id: UUID,
+        sequence_number: int
+    ) -> str:
+        """Persist an already decoded 16 kHz waveform as a WAV chunk, returning its chunk ID."""
+        audio_bytes = encode_wav(samples)
+        chunk_dxo = AudioChunkDXO(
+            id=str(ObjectId()),
+            session_id=session_id,
+            sequence_number=sequence_number,
+            original_filename=f"{session_id}_{sequence_number}.wav",
+            content_type="audio/wav",
+            codec="pcm",
+            file_size=len(audio_bytes)
+        )
+        return await self.repository.store_audio_chunk(io.BytesIO(audio_bytes), chunk_dxo)
+
+    async def process_stream_window(
+        self,
+        samples: np.ndarray,
+        session_id: UUID,
+        is_final: bool
+    ) -> Tuple[int, DiarizationResponse]:
+        """
+        Store and process a streamed window as the next chunk of its session.
+
+        The sequence number follows the highest stored chunk and is taken under
+        the session lock, so windows of concurrent connections never share one
+        and chunks already stored by uploads are skipped. The window is
+        processed from `samples` as received, the stored WAV is only a copy.
+        """
+        async with self._session_lock(session_id):
+            sequence_number = await self.repository.get_next_sequence_number(session_id)
+            chunk_id = await self.store_audio_samples(samples, session_id, sequence_number)
+            response = await self._process_stored_chunk(samples, chunk_id, session_id, sequence_number, is_final)
+        return sequence_number, response
+
+    async def process_stored_chunk(
+        self,
+        samples: np.ndarray,
+        chunk_id: str,
+        session_id: UUID,
+        sequence_number: int,
+        is_final: bool
+    ) -> DiarizationResponse:
+        """
+        Diarize and transcribe a stored chunk and append it to its session.
+
+        Failures propagate as they are: the chunk was decoded when it was stored.
+        """
+        # Chunks of one session are processed in order, other sessions run concurrently
+        async with self._session_lock(session_id):
+            return await self._process_stored_chunk(samples, chunk_id, session_id, sequence_number, is_final)
+
+    def _session_lock(self, session_id: UUID) -> asyncio.Lock:
+        """Get the lock serializing chunks of a session."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+
+    async def _process_stored_chunk(
+        self,
+        samples: np.ndarray,
+        chunk_id: str,
+        session_id: UUID,
+        sequence_number: int,
+        is_final: bool
+    ) -> DiarizationResponse:
+        try:
+            # Get existing session counters without its segments
+            existing_dxo = await self.repository.get_session_diarization(
+                session_id,
+                segments_tail=0
             )
+            if existing_dxo and sequence_number in existing_dxo.chunk_sequences:
+                return await self._replay_chunk(existing_dxo, sequence_number)
+            
+            # Prepend the buffered tail of the previous chunk so words cut at the
+            # boundary are heard whole
+            prefix = np.zeros(0, dtype=np.float32)
+            if existing_dxo:
+                prefix = self.overlap.get(session_id, sequence_number)
+            window = np.concatenate([prefix, samples]) if len(prefix) else samples
+            chunk_start = existing_dxo.duration if existing_dxo else 0.0
+            window_start = chunk_start - duration_of(prefix)
+            
+            # The chunk owns the timeline from the end of the previous chunk's share
+            # up to its own trailing guard; the rest is handled by its neighbours
+            owned_from = chunk_start - self.boundary_guard_seconds if len(prefix) else float("-inf")
+            owned_until = float("inf")
+            if not is_final:
+                owned_until = chunk_start + duration_of(samples) - self.boundary_guard_seconds
+            
+            # Skip silent windows and trim leading and trailing silence from the rest
+            speech = detect_speech(window, self.config.vad_energy_threshold_db)
+            segments, speakers = [], set()
+            inferred_seconds = 0.0
+            if speech:
+                speech_start, speech_end = speech
+                # Only the chunk's own samples count, the prefix was counted with the previous chunk
+                inferred_seconds = max(0, speech_end - max(speech_start, len(prefix))) / SAMPLE_RATE
+                segments, speakers = await self._process_chunk(
+                    window[speech_start:speech_end],
+                    session_id,
+                    sequence_number,
+                    existing_dxo,
+                    base_time=window_start + speech_start / SAMPLE_RATE,
+                    owned_from=owned_from,
+                    owned_until=owned_until
+                )
+            skipped_seconds = duration_of(samples) - inferred_seconds
+            if skipped_seconds > 0:
+                logger.info(f"Skipped {skipped_seconds:.2f}s of silence in chunk {sequence_number} of {session_id}")
             
-            # Update session data
-            session_dxo = await self._update_session_data(
+            # Append the new segments without rewriting the session
+            session_dxo = await self.repository.append_session_segments(
                 session_id=session_id,
-                existing_dxo=existing_dxo,
-                new_segments=segments,
-                new_speakers=speakers,
-                new_duration=duration,
                 chunk_id=chunk_id,
-                is_final=is_final
+                sequence_number=sequence_number,
+                segments=[SpeechSegmentDXO.from_domain(s) for s in segments],
+                duration=chunk_start + duration_of(samples),
+                is_final=is_final,
+                speaker_profiles=self.speakers.profiles(session_id, speakers),
+                skipped_seconds=skipped_seconds
             )
+            if session_dxo is None:
+                # Another worker appended the same chunk first, its speakers already count
+                self.speakers.rollback(session_id)
+                existing_dxo = await self.repository.get_session_diarization(session_id, segments_tail=0)
+                return await self._replay_chunk(existing_dxo, sequence_number)
+            self.speakers.commit(session_id)
             
             # If final chunk, perform post-processing
             if is_final:
-                session_dxo = await self._finalize_session(session_dxo)
+                self.overlap.discard(session_id)
+                self.speakers.discard(session_id)
+                full_dxo = await self.repository.get_session_diarization(session_id)
+                session_dxo = await self._finalize_session(full_dxo)
+            else:
+                self.overlap.put(session_id, sequence_number, window)
             
-            return session_dxo.to_response()
+            return session_dxo.to_response(speech_detected=speech is not None)
             
         except Exception as e:
+            self.speakers.rollback(session_id)
             logger.error(f"Processing failed: {str(e)}")
-            raise ValueError(f"Failed to process audio chunk: {str(e)}")
-        finally:
-            self._cleanup_temp_file(temp_path)
+            # The samples were decoded when the chunk was stored, so this is a
+            # server-side failure and keeps its own type
+            raise
 
     async def _process_chunk(
         self,
-        audio_path: Path,
+        samples: np.ndarray,
+        session_id: UUID,
         sequence_number: int,
-        existing_dxo: Optional[SessionDiarizationDXO]
-    ) -> Tuple[List[SpeechSegment], Set[str], float]:
-        """Process an audio chunk and return segments with transcription."""
+        existing_dxo: Optional[SessionDiarizationDXO],
+        base_time: float,
+        owned_from: float,
+        owned_until: float
+    ) -> Tuple[List[SpeechSegment], Set[str]]:
+        """
+        Process audio starting at `base_time` on the session timeline and return
+        the segments inside [owned_from, owned_until] with transcription.
+        """
         try:
-            # Perform diarization
-            diarization = self.pipeline(str(audio_path))
+            inference = await self._infer(samples, session_id)
             
-            # Perform transcription
-            result = self.transcriber.transcribe(str(audio_path))
+            # Map chunk-local speakers onto the session's speakers; the
+            # centroids only change once the chunk is appended
+            if not self.speakers.has_session(session_id):
+                self.speakers.load(session_id, existing_dxo.speaker_profiles if existing_dxo else {})
+            speaker_mapping = {}
+            if inference.labels:
+                speaker_mapping = self.speakers.assign(
+                    session_id,
+                    inference.labels,
+                    np.asarray(inference.embeddings),
+                    inference.durations
+                )
             
-            segments = []
+            # Move to the session timeline and keep what this chunk owns
+            turns = []
             speakers = set()
-            max_end = 0.0
+            for turn_start, turn_end, speaker in inference.tracks:
+                start, end = base_time + turn_start, base_time + turn_end
+                if end <= owned_from or start >= owned_until:
+                    continue
+                turns.append((
+                    max(start, owned_from),
+                    min(end, owned_until),
+                    speaker_mapping[speaker]
+                ))
+                speakers.add(speaker_mapping[speaker])
+            
+            # Attribute each owned word to exactly one speech turn
+            words = [
+                (base_time + start, base_time + end, word)
+                for start, end, word in inference.words
+                if owned_from < base_time + end <= owned_until
+            ]
+            texts = align_transcript([(start, end) for start, end, _ in turns], words)
             
-            # Process each speech turn and align with transcription
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                speakers.add(speaker)
-                
-                # Adjust timing for sequence
-                if existing_dxo and sequence_number > 0:
-                    base_time = existing_dxo.duration - self.chunk_overlap_seconds
-                else:
-                    base_time = 0.0
-                
-                # Find corresponding transcription segment
-                transcript_text = self._find_matching_transcript(
-                    result["segments"],
-                    base_time + turn.start,
-                    base_time + turn.end
-                )
-                
-                if transcript_text.strip():  # Only add segments with actual text
-                    segment = SpeechSegment(
-                        start=base_time + turn.start,
-                        end=base_time + turn.end,
+            segments = []
+            for (start, end, speaker), transcript_text in zip(turns, texts):
+                if transcript_text:  # Only add segments with actual text
+                    segments.append(SpeechSegment(
+                        start=start,
+                        end=end,
                         speaker=speaker,
                         chunk_sequence=sequence_number,
                         text=transcript_text
-                    )
-                    segments.append(segment)
-                    max_end = max(max_end, segment.end)
-            
-            # If we have existing speakers, try to map new speakers to existing ones
-            if existing_dxo and existing_dxo.segments:
-                segments = self._map_speakers_to_existing(segments, existing_dxo.segments)
+                    ))
             
-            return segments, speakers, max_end
+            return segments, speakers
             
         except Exception as e:
             logger.error(f"Failed to process chunk: {str(e)}")
             raise
     
+    async def _infer(self, samples: np.ndarray, session_id: UUID) -> InferenceResultDXO:
+        """Diarize and transcribe audio, reusing the outputs of identical audio."""
+        key = self.inference_cache.key(samples)
+        cached = await self.inference_cache.get(key, session_id)
+        if cached is not None:
+            return cached
+        
+        # Perform diarization and transcription in parallel off the event loop
+        (diarization, embeddings), result = await asyncio.gather(
+            self.executor.run(
+                self.pipeline,
+                to_pipeline_input(samples),
+                return_embeddings=True
+            ),
+            self._transcribe(samples)
+        )
+        labels = diarization.labels()
+        inference = InferenceResultDXO(
+            key=key,
+            labels=labels,
+            durations=[diarization.label_duration(label) for label in labels],
+            embeddings=np.asarray(embeddings, dtype=np.float64).tolist() if labels else [],
+            tracks=[(turn.start, turn.end, speaker) for turn, _, speaker in diarization.itertracks(yield_label=True)],
+            words=[(float(start), float(end), word) for start, end, word in extract_words(result)]
+        )
+        await self.inference_cache.put(inference, session_id)
+        return inference
+    
+    async def _replay_chunk(self, session_dxo: SessionDiarizationDXO, sequence_number: int) -> DiarizationResponse:
+        """Response for a chunk that was already appended, without running the models again."""
+        logger.info(f"Chunk {sequence_number} of {session_dxo.session_id} was already processed")
+        segments = await self.repository.get_chunk_segments(session_dxo.session_id, sequence_number)
+        response = session_dxo.model_copy(update={"segments": segments}).to_response(speech_detected=bool(segments))
+        return response.model_copy(update={"duplicate": True})
+    
+    def batching_stats(self) -> List[Dict]:
+        """Batch statistics of every model batched across sessions."""
+        return [
+            self.transcription_batcher.stats(),
+            self.segmentation_batcher.stats(),
+            self.embedding_batcher.stats()
+        ]
+    
+    def inference_cache_stats(self) -> Dict[str, int]:
+        return self.inference_cache.stats()
+    
+    async def _transcribe(self, samples: np.ndarray) -> Dict:
+        """Transcribe with word timestamps, batched with other sessions when enabled."""
+        if self.transcription_batcher.max_batch_size > 1:
+            return await self.transcription_batcher.submit(samples)
+        return await self.executor.run(
+            self.transcriber.transcribe,
+            samples,
+            word_timestamps=True,
+            fp16=self.config.device == "cuda"
+        )
+    
     def _generate_conversation_transcript(
         self,
         segments: List[SpeechSegmentDXO]
@@ -217,25 +562,6 @@ class StreamingDiarizationService:
             logger.error(f"Failed to generate transcript: {str(e)}")
             raise
     
-    def _find_matching_transcript(
-        self,
-        transcript_segments: List[Dict],
-        start_time: float,
-        end_time: float
-    ) -> str:
-        """Find the transcribed text that corresponds to a given time segment."""
-        matching_segments = []
-        
-        for segment in transcript_segments:
-            segment_start = segment["start"]
-            segment_end = segment["end"]
-            
-            # Check for overlap between segments
-            if (segment_start <= end_time and segment_end >= start_time):
-                matching_segments.append(segment["text"])
-        
-        return " ".join(matching_segments).strip()
-
     def _generate_text_transcript(
         self,
         segments: List[SpeechSegmentDXO]
@@ -287,94 +613,6 @@ class StreamingDiarizationService:
         
         return {"conversation": conversation}
 
-    def _map_speakers_to_existing(
-        self,
-        new_segments: List[SpeechSegment],
-        existing_segments: List[SpeechSegmentDXO]
-    ) -> List[SpeechSegment]:
-        """Map new speakers to existing ones based on temporal proximity."""
-        try:
-            # Get existing speaker mapping
-            existing_speakers = {s.speaker for s in existing_segments}
-            new_speakers = {s.speaker for s in new_segments}
-            
-            # If there's overlap in the first few segments, use that for mapping
-            overlap_window = new_segments[:5]
-            speaker_mapping = {}
-            
-            for new_segment in overlap_window:
-                # Find temporally close existing segments
-                close_segments = [
-                    s for s in existing_segments
-                    if abs(s.end - new_segment.start) < self.chunk_overlap_seconds
-                ]
-                
-                if close_segments:
-                    # Map to the closest existing speaker
-                    closest_segment = min(
-                        close_segments,
-                        key=lambda s: abs(s.end - new_segment.start)
-                    )
-                    speaker_mapping[new_segment.speaker] = closest_segment.speaker
-            
-            # Apply mapping to all new segments
-            mapped_segments = []
-            for segment in new_segments:
-                mapped_segment = segment.model_copy()
-                if segment.speaker in speaker_mapping:
-                    mapped_segment.speaker = speaker_mapping[segment.speaker]
-                mapped_segments.append(mapped_segment)
-            
-            return mapped_segments
-            
-        except Exception as e:
-            logger.error(f"Failed to map speakers: {str(e)}")
-            raise
-
-    async def _update_session_data(
-        self,
-        session_id: UUID,
-        existing_dxo: Optional[SessionDiarizationDXO],
-        new_segments: List[SpeechSegment],
-        new_speakers: Set[str],
-        new_duration: float,
-        chunk_id: str,
-        is_final: bool
-    ) -> SessionDiarizationDXO:
-        """Update session with new chunk data."""
-        try:
-            if existing_dxo:
-                # Merge segments and update duration
-                all_segments = list(existing_dxo.segments)
-                all_segments.extend([SpeechSegmentDXO.from_domain(s) for s in new_segments])
-                all_chunks = existing_dxo.chunks + [chunk_id]
-                total_duration = max(existing_dxo.duration, new_duration)
-            else:
-                # Create new session data
-                all_segments = [SpeechSegmentDXO.from_domain(s) for s in new_segments]
-                all_chunks = [chunk_id]
-                total_duration = new_duration
-            
-            # Create updated session DXO
-            session_dxo = SessionDiarizationDXO.from_domain(
-                entry_id=str(ObjectId()) if not existing_dxo else existing_dxo.id,
-                session_id=session_id,
-                chunks=all_chunks,
-                segments=all_segments,
-                total_speakers=len(set(s.speaker for s in all_segments)),
-                duration=total_duration,
-                is_complete=is_final
-            )
-            
-            # Store updated session
-            await self.repository.update_session_diarization(session_dxo)
-            
-            return session_dxo
-            
-        except Exception as e:
-            logger.error(f"Failed to update session data: {str(e)}")
-            raise
-
     async def _finalize_session(
         self,
         session_dxo: SessionDiarizationDXO
@@ -387,19 +625,36 @@ class StreamingDiarizationService:
             # Normalize speaker labels
             normalized_segments = self._normalize_speaker_labels(merged_segments)
             
-            # Create final session DXO
-            final_dxo = SessionDiarizationDXO.from_domain(
-                entry_id=session_dxo.id,
-                session_id=session_dxo.session_id,
-                chunks=session_dxo.chunks,
-                segments=normalized_segments,
-                total_speakers=len(set(s.speaker for s in normalized_segments)),
-                duration=session_dxo.duration,
-                is_complete=True
-            )
+            # Speaker profiles follow their speakers' new labels
+            label_mapping = {
+                merged.speaker: normalized.speaker
+                for merged, normalized in zip(merged_segments, normalized_segments)
+            }
+            
+            # Keep everything else, the appended chunk sequence numbers in
+            # particular, so a retried final chunk is still recognized
+            final_dxo = session_dxo.model_copy(update={
+                "segments": normalized_segments,
+                "speakers": sorted({s.speaker for s in normalized_segments}),
+                "speaker_profiles": {
+                    label_mapping.get(label, label): profile
+                    for label, profile in session_dxo.speaker_profiles.items()
+                },
+                "segment_count": len(normalized_segments),
+                # Merging shrinks the segment count, the revision still grows
+                "revision": session_dxo.revision + 1,
+                "total_speakers": len(set(s.speaker for s in normalized_segments)),
+                "is_complete": True,
+                "last_updated": datetime.now(timezone.utc)
+            })
             
             # Store final results
             await self.repository.update_session_diarization(final_dxo)
+            await self._rewind_summary_position(
+                session_dxo.session_id,
+                session_dxo.segments,
+                normalized_segments
+            )
             
             return final_dxo
             
@@ -407,6 +662,35 @@ class StreamingDiarizationService:
             logger.error(f"Failed to finalize session: {str(e)}")
             raise
 
+    async def _rewind_summary_position(
+        self,
+        session_id: UUID,
+        segments: List[SpeechSegmentDXO],
+        final_segments: List[SpeechSegmentDXO]
+    ) -> None:
+        """
+        Move the running summary's position from the appended segments onto
+        the rewritten ones. It lands on the first final segment that may hold
+        speech not summarized yet, so some speech may be folded twice but
+        none is skipped.
+        """
+        state = await self.repository.get_session_summary(session_id)
+        if state is None or not state.summarized_segments:
+            return
+        pending = segments[state.summarized_segments:]
+        if pending:
+            # A merged segment can only hold a pending one if it ends after that starts
+            first_start = min(segment.start for segment in pending)
+            position = next(
+                (i for i, segment in enumerate(final_segments) if segment.end >= first_start),
+                len(final_segments)
+            )
+        else:
+            position = len(final_segments)
+        await self.repository.update_session_summary(
+            state.model_copy(update={"summarized_segments": position})
+        )
+
     def _merge_overlapping_segments(
         self,
         segments: List[SpeechSegmentDXO]
@@ -429,7 +713,8 @@ class StreamingDiarizationService:
                     end=max(current.end, next_segment.end),
                     speaker=current.speaker,
                     chunk_sequence=current.chunk_sequence,
-                    text=current.text
+                    # Words belong to exactly one turn, so both texts are kept
+                    text=" ".join(filter(None, (current.text, next_segment.text)))
                 )
             else:
                 merged.append(current)
@@ -476,28 +761,3 @@ class StreamingDiarizationService:
         minutes = int((seconds % 3600) // 60)
         seconds = seconds % 60
         return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
-            
-    async def _save_temp_file(self, audio_data: BinaryIO) -> Path:
-        """Save audio data to temporary file."""
-        try:
-            temp_dir = Path(tempfile.gettempdir()) / "diarization"
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            temp_path = temp_dir / f"temp_{uuid4()}.wav"
-            audio_content = audio_data.read()
-            
-            with open(temp_path, "wb") as f:
-                f.write(audio_content)
-            
-            return temp_path
-        except Exception as e:
-            logger.error(f"Failed to save temporary file: {str(e)}")
-            raise
-
-    def _cleanup_temp_file(self, temp_path: Path) -> None:
-        """Clean up temporary audio file."""
-        try:
-            if temp_path.exists():
-                temp_path.unlink()
-        except Exception as e:
-            logger.error(f"Failed to cleanup temporary file: {str(e)}")
\ No newline at end of file
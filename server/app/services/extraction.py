@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeExtractionQueue:
+    """
+    Runs knowledge-graph extraction in the background, off the upload path.
+
+    Work is keyed by session and coalesced: text submitted while earlier text
+    of the same session is still waiting is appended to it, so the pending
+    sections are extracted together in one call. A single worker runs the
+    extractions so updates of a session apply in order.
+
+    """
+
+    def __init__(self):
+        self._pending: Dict[UUID, Tuple[List[str], Callable[[str], Awaitable[Any]]]] = {}
+        self._order: "asyncio.Queue[UUID]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._running = 0
+        self._submitted = 0
+        self._coalesced = 0
+        self._extracted = 0
+        self._failed = 0
+
+    async def start(self) -> None:
+        """Start the worker task."""
+        self._task = asyncio.create_task(self._worker(), name="knowledge-extraction")
+
+    async def stop(self) -> None:
+        """Cancel the worker; pending extractions are dropped."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def submit(self, session_id: UUID, text: str, work: Callable[[str], Awaitable[Any]]) -> None:
+        """Queue extraction of `text` for a session, joining it to the session's pending text."""
+        self._submitted += 1
+        pending = self._pending.get(session_id)
+        if pending is not None:
+            self._coalesced += 1
+            self._pending[session_id] = (pending[0] + [text], work)
+        else:
+            self._order.put_nowait(session_id)
+            self._pending[session_id] = ([text], work)
+
+    def lag(self) -> int:
+        """Sessions with text waiting for or in extraction."""
+        return len(self._pending) + self._running
+
+    async def drain(self) -> None:
+        """Wait until every submitted extraction has run."""
+        await self._order.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "running": self._running,
+            "lag": self.lag(),
+            "submitted": self._submitted,
+            "coalesced": self._coalesced,
+            "extracted": self._extracted,
+            "failed": self._failed
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            session_id = await self._order.get()
+            pending = self._pending.pop(session_id, None)
+            self._running += 1
+            try:
+                if pending is not None:
+                    texts, work = pending
+                    await work("\n".join(texts))
+                    self._extracted += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Knowledge extraction for session {session_id} failed: {str(e)}")
+                self._failed += 1
+            finally:
+                self._running -= 1
+                self._order.task_done()
@@ -0,0 +1,84 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """Runs blocking model inference on a bounded worker pool off the event loop."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="inference"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        logger.info(f"Initialized inference executor with {max_workers} workers")
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool and await its result."""
+        state = {"started": False}
+        with self._lock:
+            self._queued += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._pool,
+                functools.partial(self._invoke, state, fn, args, kwargs)
+            )
+        finally:
+            # A job cancelled before a worker picked it up never leaves the queue
+            with self._lock:
+                if not state["started"]:
+                    state["started"] = True
+                    self._queued -= 1
+
+    def _invoke(
+        self,
+        state: Dict[str, bool],
+        fn: Callable[..., Any],
+        args: tuple,
+        kwargs: Dict[str, Any]
+    ) -> Any:
+        with self._lock:
+            if not state["started"]:
+                state["started"] = True
+                self._queued -= 1
+            self._in_flight += 1
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of queue depth and in-flight counts."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and drop jobs that have not started."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
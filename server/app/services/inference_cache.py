@@ -0,0 +1,109 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from uuid import UUID
+
+import numpy as np
+
+from app.dxo.inference import InferenceResultDXO
+from app.repository.meetings.abstractions import AudioRepository
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class InferenceResultCache:
+    """
+    Diarization and transcription outputs memoized by content hash.
+
+    The key hashes the exact samples sent to the models together with
+    `model_version`, so changing a model or its settings starts a fresh
+    cache. The repository records which sessions use each result, so a
+    deleted session takes its own results with it. Recent results are kept
+    in an in-memory LRU of `max_entries` in front of the repository; the
+    first time a session is served one from memory its use is recorded, and
+    a result the repository no longer holds is evicted instead. The cache is
+    best effort: repository errors are logged and treated as misses.
+
+    """
+
+    def __init__(self, repository: AudioRepository, model_version: str, max_entries: int):
+        self.repository = repository
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, InferenceResultDXO]" = OrderedDict()
+        # key -> sessions whose use of the result is recorded in the repository
+        self._sessions: Dict[str, Set[UUID]] = {}
+        self._memory_hits = 0
+        self._store_hits = 0
+        self._misses = 0
+
+    def key(self, samples: np.ndarray) -> str:
+        digest = hashlib.sha256(self.model_version.encode("utf-8"))
+        digest.update(np.ascontiguousarray(samples, dtype=np.float32).tobytes())
+        return digest.hexdigest()
+
+    async def get(self, key: str, session_id: UUID) -> Optional[InferenceResultDXO]:
+        result = self._entries.get(key)
+        if result is not None and await self._record_use(key, session_id):
+            self._entries.move_to_end(key)
+            self._memory_hits += 1
+            return result
+
+        try:
+            result = await self.repository.get_inference_result(key, session_id)
+        except Exception as e:
+            logger.error(f"Inference cache lookup failed: {str(e)}")
+            result = None
+        if result is None:
+            self._misses += 1
+            return None
+        self._store_hits += 1
+        self._remember(result, session_id)
+        return result
+
+    async def put(self, result: InferenceResultDXO, session_id: UUID) -> None:
+        self._remember(result, session_id)
+        try:
+            await self.repository.store_inference_result(result, session_id)
+        except Exception as e:
+            logger.error(f"Inference cache store failed: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_hits": self._memory_hits,
+            "store_hits": self._store_hits,
+            "misses": self._misses
+        }
+
+    async def _record_use(self, key: str, session_id: UUID) -> bool:
+        """Record a session using a result held in memory; False if the repository dropped it."""
+        sessions = self._sessions.setdefault(key, set())
+        if session_id in sessions:
+            return True
+        try:
+            stored = await self.repository.record_inference_use(key, session_id)
+        except Exception as e:
+            logger.error(f"Inference cache usage update failed: {str(e)}")
+            return False
+        if not stored:
+            # Expired, or deleted along with the sessions that used it
+            self._entries.pop(key, None)
+            self._sessions.pop(key, None)
+            return False
+        sessions.add(session_id)
+        return True
+
+    def _remember(self, result: InferenceResultDXO, session_id: UUID) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[result.key] = result
+        self._entries.move_to_end(result.key)
+        self._sessions.setdefault(result.key, set()).add(session_id)
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            self._sessions.pop(key, None)
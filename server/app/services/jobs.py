@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """An upload accepted for background processing."""
+    id: str
+    session_id: UUID
+    sequence_number: int
+    work: Callable[[], Awaitable[Any]] = field(repr=False)
+    status: JobStatus = JobStatus.QUEUED
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def event(self) -> Dict[str, Any]:
+        """JSON-ready status update pushed to session subscribers."""
+        return {
+            "job_id": self.id,
+            "session_id": str(self.session_id),
+            "sequence_number": self.sequence_number,
+            "status": self.status.value,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobQueue:
+    """
+    Bounded in-process work queue with a fixed number of workers.
+
+    Job status is kept in memory for the last `max_finished_jobs` jobs and
+    every status change is published to the job's session subscribers.
+
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue_size: int,
+        max_finished_jobs: int = 1000,
+        max_subscriber_backlog: int = 100
+    ):
+        self.workers = workers
+        self.max_finished_jobs = max_finished_jobs
+        self.max_subscriber_backlog = max_subscriber_backlog
+        self._queue: "asyncio.Queue[Job]" = asyncio.Queue(maxsize=max_queue_size)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._subscribers: Dict[UUID, List[asyncio.Queue]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Started job queue with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued jobs are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self,
+        session_id: UUID,
+        sequence_number: int,
+        work: Callable[[], Awaitable[Any]]
+    ) -> Job:
+        """Queue `work` and return its job, raising JobQueueFull when at capacity."""
+        job = Job(
+            id=str(uuid4()),
+            session_id=session_id,
+            sequence_number=sequence_number,
+            work=work
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull("Job queue is full")
+
+        self._jobs[job.id] = job
+        self._evict_finished()
+        self._publish(job)
+        return job
+
+    def is_full(self) -> bool:
+        return self._queue.full()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def subscribe(self, session_id: UUID) -> asyncio.Queue:
+        """Receive status events of the session's jobs."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_subscriber_backlog)
+        self._subscribers.setdefault(session_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, session_id: UUID, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(session_id, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+        if not subscribers:
+            self._subscribers.pop(session_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "running": self._running,
+            "tracked_jobs": len(self._jobs)
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._running += 1
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            self._publish(job)
+            try:
+                job.result = await job.work()
+                job.status = JobStatus.SUCCEEDED
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {str(e)}")
+                job.error = str(e)
+                job.status = JobStatus.FAILED
+            finally:
+                self._running -= 1
+                job.finished_at = datetime.now(timezone.utc)
+                # Release the captured audio, only the result is kept
+                job.work = None
+                self._queue.task_done()
+            self._publish(job)
+
+    def _publish(self, job: Job) -> None:
+        event = job.event()
+        for queue in self._subscribers.get(job.session_id, []):
+            # A subscriber that stopped reading loses events rather than blocking workers
+            if not queue.full():
+                queue.put_nowait(event)
+
+    def _evict_finished(self) -> None:
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+        ]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
@@ -1,65 +1,121 @@
 import ast
+from typing import Dict, List, Optional, Tuple
+
+from app.services.bm25 import BM25Index
+
+Triple = Tuple[str, str, str]
 
 
 class KnowledgeGraphService:
-    def __init__(self):
-        self.relations = []
+    """
+    Triple store of a meeting's knowledge graph.
+
+    Triples are kept in a dict used as an insertion-ordered hash set, so
+    membership tests and resolving an "Unknown" tail are O(1). The text form
+    sent to the LLM is extended with the triples appended since it was last
+    built and loses its first line when the oldest triple is evicted; it is
+    only rebuilt in full after any other removal. A BM25 index over the
+    triples is kept in step for `search`. `version` changes whenever the
+    graph does.
+    """
+
+    def __init__(self, relations=None, max_relations: Optional[int] = None):
+        self.max_relations = max_relations
+        self.version = 0
+        self._triples: Dict[Triple, None] = {}
+        self._text: Optional[str] = ""
+        self._pending_lines: List[str] = []  # Appended since the text was last built
+        self._index: BM25Index[Triple] = BM25Index()
+        for r in relations or []:
+            self.add_relation(r)
+
+    @property
+    def relations(self) -> List[Triple]:
+        return list(self._triples)
+
+    def __len__(self) -> int:
+        return len(self._triples)
 
     def exists_relation(self, r1):
-        return any(r1 == r2 for r2 in self.relations)  # Direct tuple comparison
+        return self._normalize(r1) in self._triples
 
-    def add_relation(self, r):
-        if len(r) == 2:
-            r = (r[0], r[1], "Unknown")
-        
-        if r[2] == "" or r[2] is None:
-            r = (r[0], r[1], "Unknown")
-        
-        def resolve_unknown(relation):
-            for existing_relation in self.relations:
-                if (existing_relation[0] == relation[0] and 
-                    existing_relation[1] == relation[1] and 
-                    existing_relation[2] == "Unknown"):
-
-                    self.relations.remove(existing_relation)
-                    self.relations.append(relation)
-                    return True
+    def add_relation(self, r) -> bool:
+        """Add a relation, returning False for a malformed one, which is skipped."""
+        r = self._normalize(r)
+        if r is None:
             return False
-    
         if r[2] != "Unknown":
-            if resolve_unknown(r):
-                return
-
-        if not self.exists_relation(r):
-            self.relations.append(r)
-
+            # A known tail replaces the matching placeholder
+            self._remove((r[0], r[1], "Unknown"))
 
-    def print(self):
-        print("Rels:")
-        for r in self.relations:
-            print(f" {r}")
+        if r in self._triples:
+            return True
+        self._append(r)
+        # Oldest relations make room for new ones once the graph is full
+        if self.max_relations is not None:
+            while len(self._triples) > self.max_relations:
+                self._remove(next(iter(self._triples)))
+        return True
 
     def fetch_relations(self):
-        return "\n".join([f"({r[0]}, {r[1]}, {r[2]})" for r in self.relations])
+        if self._text is None:
+            self._text = "\n".join(self._format(r) for r in self._triples)
+        elif self._pending_lines:
+            self._text = "\n".join([self._text, *self._pending_lines] if self._text else self._pending_lines)
+        self._pending_lines = []
+        return self._text
     
     def get_relations(self):
         return self.relations
         
-    def search_question(self, question):
-        keywords = question.lower().split()
-        relevant_relations = []
-        
-        for r in self.relations:
-            if any(keyword in r[0].lower() or keyword in r[1].lower() or keyword in r[2].lower() for keyword in keywords):
-                relevant_relations.append(r)
+    def search(self, question: str, top_k: int) -> List[Triple]:
+        """The `top_k` triples ranked best for a question by BM25."""
+        return [r for r, _ in self._index.search(question, top_k)]
+
+    @staticmethod
+    def _normalize(r) -> Optional[Triple]:
+        """The (head, relation, tail) form of an LLM relation, or None if it has no head and relation."""
+        if not isinstance(r, (tuple, list)) or len(r) < 2:
+            return None
+        r = tuple(r)
+        if len(r) == 2:
+            r = (r[0], r[1], "Unknown")
+        if r[2] == "" or r[2] is None:
+            r = (r[0], r[1], "Unknown")
+        # The LLM may produce non-string parts, which must still be hashable
+        return tuple(part if isinstance(part, str) else str(part) for part in r[:3])
+
+    @staticmethod
+    def _format(r: Triple) -> str:
+        return f"({r[0]}, {r[1]}, {r[2]})"
 
-        if relevant_relations:
-            return "\n".join([f"({r[0]}, {r[1]}, {r[2]})" for r in relevant_relations])
+    def _append(self, r: Triple) -> None:
+        self._triples[r] = None
+        if self._text is not None:
+            self._pending_lines.append(self._format(r))
+        self._index.add(r, " ".join(r))
+        self.version += 1
+
+    def _remove(self, r: Triple) -> bool:
+        if r not in self._triples:
+            return False
+        oldest = next(iter(self._triples)) == r
+        del self._triples[r]
+        self._index.remove(r, " ".join(r))
+        if oldest and self._text is not None and "\n" not in self._format(r):
+            # The oldest triple is the first line of the text
+            if self._text:
+                self._text = self._text.partition("\n")[2]
+            else:
+                self._pending_lines.pop(0)
         else:
-            return "No relevant relations found."
+            self._text = None
+            self._pending_lines = []
+        self.version += 1
+        return True
 
-    def update_mem(self, txt, pipe):
-        messages = [
+    def update_messages(self, txt):
+        return [
             {
                 "role": "system",
                 "content": "You are now in charge of creating a Knowlege base out of the meeting summary for this you will recieve points. Create a complete list of relations from this text and add them to the knowledge graph kb this task will give you 5 points. Also if you resolve as many Unkowns as possible by returning the relation after changing the unkown this will give you additional 2 points per unkown removal you can do only maximum of 5 this way. if you do not give python code only you lose all the points. If you do not maximize the points you will never escape.",
@@ -68,11 +124,18 @@ class KnowledgeGraphService:
             {"role": "assistant", "content": "Thank you for giving the current state of the Knowledge graph please give me the next section of summary now"},
             {"role": "user", "content": "this is the next 5 minutes of summary using this give a valid python list of new relations where each entry is not empty and strictly in the format (head, relation, tail) to add to the current graph if you give a relation of more than 3 elements you lose 10 points, Please only produce the code and avoid explaining." + txt},
         ]
-    
+
+    def update_mem(self, txt, pipe):
+        for relation in self.generate_relations(self.update_messages(txt), pipe):
+            self.add_relation(relation)
+
+    @staticmethod
+    def generate_relations(messages, pipe) -> list:
+        """
+        New relations the LLM extracts for `update_messages`. Does not touch
+        the graph, so it can run off the event loop while the graph is read.
+        """
         out = pipe(messages, max_new_tokens=2048, pad_token_id=2)[0]['generated_text'][-1]['content']
         out = out.replace('```', '')
         out = out.strip()
-        # print(out)
-        relations_list = ast.literal_eval(out)
-        for relation in relations_list:
-            self.add_relation(relation)
\ No newline at end of file
+        return ast.literal_eval(out)
\ No newline at end of file
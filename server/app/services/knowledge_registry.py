@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Tuple
+from uuid import UUID
+
+from app.dxo.knowledge import KnowledgeGraphDXO
+from app.repository.meetings.abstractions import AudioRepository
+from app.services.knowledge_graph import KnowledgeGraphService
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeGraphRegistry:
+    """
+    Per-session knowledge graphs with a bounded in-memory working set.
+
+    Graphs are persisted to the repository after every update, so evicting one
+    only drops it from memory; it is reloaded the next time its session is
+    used. At most `max_sessions` graphs of at most `max_relations` relations
+    are kept, and graphs unused for `idle_seconds` are evicted. A graph is
+    never evicted while pinned by `use`, so a long update does not race a
+    reloaded copy of it.
+
+    """
+
+    def __init__(
+        self,
+        repository: AudioRepository,
+        max_sessions: int,
+        idle_seconds: float,
+        max_relations: int
+    ):
+        self.repository = repository
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.max_relations = max_relations
+        # session -> (graph, last use)
+        self._graphs: "OrderedDict[UUID, Tuple[KnowledgeGraphService, float]]" = OrderedDict()
+        self._loading: Dict[UUID, asyncio.Future] = {}
+        self._pins: Dict[UUID, int] = {}
+        self._loads = 0
+        self._evictions = 0
+
+    async def get(self, session_id: UUID) -> KnowledgeGraphService:
+        """Graph of a session, loaded from the repository if it is not in memory."""
+        entry = self._graphs.get(session_id)
+        if entry is not None:
+            graph = entry[0]
+        elif session_id in self._loading:
+            # Another caller is already loading it
+            graph = await asyncio.shield(self._loading[session_id])
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._loading[session_id] = future
+            try:
+                graph = await self._load(session_id)
+                future.set_result(graph)
+            except Exception as e:
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else waits on it
+                future.exception()
+                raise
+            finally:
+                del self._loading[session_id]
+
+        self._graphs[session_id] = (graph, time.monotonic())
+        self._graphs.move_to_end(session_id)
+        self._evict(keep=session_id)
+        return graph
+
+    @asynccontextmanager
+    async def use(self, session_id: UUID) -> AsyncIterator[KnowledgeGraphService]:
+        """Graph of a session, kept in memory until the block exits."""
+        graph = await self.get(session_id)
+        self._pins[session_id] = self._pins.get(session_id, 0) + 1
+        try:
+            yield graph
+        finally:
+            self._pins[session_id] -= 1
+            if not self._pins[session_id]:
+                del self._pins[session_id]
+
+    async def save(self, session_id: UUID, graph: KnowledgeGraphService) -> None:
+        """Persist a session's graph after it changed."""
+        await self.repository.update_knowledge_graph(
+            KnowledgeGraphDXO.from_relations(session_id, graph.get_relations(), graph.version)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._graphs),
+            "pinned": len(self._pins),
+            "relations": sum(len(graph) for graph, _ in self._graphs.values()),
+            "loads": self._loads,
+            "evictions": self._evictions
+        }
+
+    async def _load(self, session_id: UUID) -> KnowledgeGraphService:
+        self._loads += 1
+        stored = await self.repository.get_knowledge_graph(session_id)
+        graph = KnowledgeGraphService(
+            relations=stored.relations if stored else [],
+            max_relations=self.max_relations
+        )
+        # Versions keep increasing across reloads so cached answers stay tied to one state
+        if stored:
+            graph.version = max(graph.version, stored.version)
+        return graph
+
+    def _evict(self, keep: UUID) -> None:
+        cutoff = time.monotonic() - self.idle_seconds
+        # Entries are kept in least-recently-used order
+        for session_id, (_, last_used) in list(self._graphs.items()):
+            if len(self._graphs) <= self.max_sessions and last_used >= cutoff:
+                break
+            if session_id == keep or session_id in self._pins:
+                continue
+            del self._graphs[session_id]
+            self._evictions += 1
+            logger.info(f"Evicted knowledge graph of session {session_id}")
@@ -0,0 +1,266 @@
+import abc
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+from uuid import UUID
+
+from app.settings.meetings import Settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend(abc.ABC):
+    """Chat model behind summarization, question answering and knowledge extraction."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def encode(self, text: str) -> List[int]:
+        """
+        Token ids of a text, without special tokens.
+
+        """
+
+    @abc.abstractmethod
+    def decode(self, ids: List[int]) -> str:
+        """
+        Text of token ids.
+
+        """
+
+    @abc.abstractmethod
+    def generate(
+        self,
+        messages: List[Dict],
+        max_new_tokens: int,
+        session_id: Optional[UUID] = None,
+        stats: Optional[Dict] = None
+    ) -> str:
+        """
+        Reply to one conversation. `stats` receives the prompt size and
+        prefix reuse of the call.
+
+        """
+
+    @abc.abstractmethod
+    def generate_many(self, conversations: List[List[Dict]], max_new_tokens: int, batch_size: int) -> List[str]:
+        """
+        Reply to several conversations, batched where the backend supports it.
+
+        """
+
+    @abc.abstractmethod
+    def stream(
+        self,
+        messages: List[Dict],
+        max_new_tokens: int,
+        cancelled: threading.Event,
+        session_id: Optional[UUID] = None,
+        stats: Optional[Dict] = None
+    ) -> Iterator[str]:
+        """
+        Reply to one conversation piece by piece. Generation stops soon
+        after `cancelled` is set.
+
+        """
+
+    def warm_up(self) -> None:
+        self.generate([{"role": "user", "content": "Summarize: the meeting started."}], 8)
+
+    def cache_prefix(self, name: str, first: List[Dict], second: List[Dict]) -> None:
+        """Precompute the prompt prefix two conversations share, where supported."""
+
+    def prefix_cache_stats(self) -> Dict[str, float]:
+        return {
+            "prefixes": 0,
+            "sessions": 0,
+            "hits": 0,
+            "misses": 0,
+            "tokens_reused": 0,
+            "prefill_ms_saved": 0.0
+        }
+
+
+class LlamaCppBackend(LLMBackend):
+    """
+    Quantized GGUF model run by llama.cpp on the CPU.
+
+    llama.cpp keeps the key/value state of recent prompts in a RAM cache of
+    `prompt_cache_bytes` and resumes from the longest matching prefix. The
+    model is not thread-safe, so calls are serialized. A stream is generated
+    on its own thread into a queue, so a slow reader does not hold up other
+    calls.
+
+    """
+
+    name = "llama_cpp"
+
+    def __init__(self, model_path: str, context_tokens: int, threads: int, prompt_cache_bytes: int):
+        try:
+            from llama_cpp import Llama, LlamaRAMCache
+        except ImportError as e:
+            raise ValueError("The llama_cpp LLM backend needs the llama-cpp-python package") from e
+
+        self.model = Llama(
+            model_path=model_path,
+            n_ctx=context_tokens,
+            n_threads=threads or os.cpu_count(),
+            verbose=False
+        )
+        if prompt_cache_bytes > 0:
+            self.model.set_cache(LlamaRAMCache(capacity_bytes=prompt_cache_bytes))
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> List[int]:
+        return self.model.tokenize(text.encode("utf-8"), add_bos=False)
+
+    def decode(self, ids: List[int]) -> str:
+        return self.model.detokenize(ids).decode("utf-8", errors="ignore")
+
+    def generate(self, messages, max_new_tokens, session_id=None, stats=None) -> str:
+        with self._lock:
+            out = self.model.create_chat_completion(messages=messages, max_tokens=max_new_tokens, temperature=0.0)
+        if stats is not None:
+            stats["prompt_tokens"] = out["usage"]["prompt_tokens"]
+        return out["choices"][0]["message"]["content"] or ""
+
+    def generate_many(self, conversations, max_new_tokens, batch_size) -> List[str]:
+        return [self.generate(messages, max_new_tokens) for messages in conversations]
+
+    def stream(self, messages, max_new_tokens, cancelled, session_id=None, stats=None) -> Iterator[str]:
+        pieces: "queue.Queue[Optional[str]]" = queue.Queue()
+        failure = []
+
+        def generate():
+            try:
+                with self._lock:
+                    chunks = self.model.create_chat_completion(
+                        messages=messages,
+                        max_tokens=max_new_tokens,
+                        temperature=0.0,
+                        stream=True
+                    )
+                    try:
+                        for chunk in chunks:
+                            if cancelled.is_set():
+                                break
+                            piece = chunk["choices"][0]["delta"].get("content")
+                            if piece:
+                                pieces.put(piece)
+                    finally:
+                        chunks.close()
+            except Exception as e:
+                failure.append(e)
+            finally:
+                pieces.put(None)
+
+        threading.Thread(target=generate, daemon=True).start()
+        try:
+            while True:
+                piece = pieces.get()
+                if piece is None:
+                    break
+                yield piece
+            if failure:
+                raise failure[0]
+        finally:
+            cancelled.set()
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic replies after a configurable delay, for load tests and
+    benchmarks without a model.
+
+    Tokens are whitespace-separated words. A reply takes `latency_ms` plus
+    `token_latency_ms` per generated word. Knowledge extraction prompts get
+    a Python list of triples made from the words of the summary, other
+    prompts echo the start of the last user turn.
+
+    """
+
+    name = "stub"
+
+    _WORD = re.compile(r"\S+")
+
+    def __init__(self, latency_ms: float, token_latency_ms: float):
+        self.latency_ms = latency_ms
+        self.token_latency_ms = token_latency_ms
+        self._ids: Dict[str, int] = {}
+        self._words: List[str] = []
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> List[int]:
+        words = self._WORD.findall(text)
+        with self._lock:
+            for word in words:
+                if word not in self._ids:
+                    self._ids[word] = len(self._words)
+                    self._words.append(word)
+            return [self._ids[word] for word in words]
+
+    def decode(self, ids: List[int]) -> str:
+        return " ".join(self._words[i] for i in ids)
+
+    def generate(self, messages, max_new_tokens, session_id=None, stats=None) -> str:
+        words = self._reply(messages, max_new_tokens)
+        time.sleep((self.latency_ms + self.token_latency_ms * len(words)) / 1000)
+        if stats is not None:
+            stats["prompt_tokens"] = sum(len(self._WORD.findall(m["content"])) for m in messages)
+        return " ".join(words)
+
+    def generate_many(self, conversations, max_new_tokens, batch_size) -> List[str]:
+        replies = [self._reply(messages, max_new_tokens) for messages in conversations]
+        # A batch costs as much as its longest reply
+        for i in range(0, len(replies), max(1, batch_size)):
+            longest = max(len(words) for words in replies[i:i + batch_size])
+            time.sleep((self.latency_ms + self.token_latency_ms * longest) / 1000)
+        return [" ".join(words) for words in replies]
+
+    def stream(self, messages, max_new_tokens, cancelled, session_id=None, stats=None) -> Iterator[str]:
+        words = self._reply(messages, max_new_tokens)
+        if stats is not None:
+            stats["prompt_tokens"] = sum(len(self._WORD.findall(m["content"])) for m in messages)
+        time.sleep(self.latency_ms / 1000)
+        for i, word in enumerate(words):
+            if cancelled.is_set():
+                return
+            time.sleep(self.token_latency_ms / 1000)
+            yield word if i == 0 else " " + word
+
+    def _reply(self, messages: List[Dict], max_new_tokens: int) -> List[str]:
+        prompt = messages[-1]["content"]
+        words = self._WORD.findall(prompt)
+        if "python list" in prompt:
+            terms = [word.strip(".,:;()[]'\"") or "Unknown" for word in words[-24:]]
+            triples = [tuple(terms[i:i + 3]) for i in range(0, len(terms) - 2, 3)]
+            return [repr(triples)]
+        return words[:min(max_new_tokens, 64)]
+
+
+def create_llm_backend(config: Settings) -> LLMBackend:
+    """Build the LLM backend selected by `llm_backend`."""
+    if config.llm_backend == "transformers":
+        # Imported here so the other backends run without transformers
+        from app.services.llm_transformers import TransformersBackend
+        return TransformersBackend(config.sm_model_name, config.prefix_cache_sessions)
+    if config.llm_backend == "llama_cpp":
+        if not config.llm_gguf_path:
+            raise ValueError("LLM_GGUF_PATH is required by the llama_cpp LLM backend")
+        return LlamaCppBackend(
+            model_path=config.llm_gguf_path,
+            context_tokens=config.llm_context_tokens,
+            threads=config.llm_threads,
+            prompt_cache_bytes=config.llm_prompt_cache_bytes
+        )
+    if config.llm_backend == "stub":
+        return StubBackend(
+            latency_ms=config.llm_stub_latency_ms,
+            token_latency_ms=config.llm_stub_token_latency_ms
+        )
+    raise ValueError(f"Unknown LLM backend {config.llm_backend!r}, expected transformers, llama_cpp or stub")
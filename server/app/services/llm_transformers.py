@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+import torch
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    BitsAndBytesConfig,
+    DynamicCache,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+    pipeline,
+)
+
+from app.services.llm import LLMBackend
+from app.services.prefix_cache import PrefixKVCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _Cancelled(StoppingCriteria):
+    """Stops generation once the consumer of a stream has gone away."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+class TransformersBackend(LLMBackend):
+    """
+    4-bit quantized Hugging Face model on the GPU, with cached prompt prefixes.
+
+    The model is called from several threads, so generations, together with
+    the prefix cache lookups and stores around them, run one at a time.
+
+    """
+
+    name = "transformers"
+
+    def __init__(self, model_name: str, prefix_cache_sessions: int):
+        torch.cuda.empty_cache()
+        bnb_config = BitsAndBytesConfig(load_in_4bit=True, bnb_4bit_compute_dtype=torch.bfloat16)
+
+        model = AutoModelForCausalLM.from_pretrained(model_name, quantization_config=bnb_config, low_cpu_mem_usage=True, pad_token_id=0)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Batched generation pads prompts on the left
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+        self.pipe = pipeline("text-generation", model=model, tokenizer=tokenizer)
+        self.prefixes = PrefixKVCache(model, max_sessions=prefix_cache_sessions)
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> List[int]:
+        return self.pipe.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def decode(self, ids: List[int]) -> str:
+        return self.pipe.tokenizer.decode(ids)
+
+    def generate(self, messages, max_new_tokens, session_id=None, stats=None) -> str:
+        input_ids, sequences = self._generate_ids(messages, max_new_tokens, session_id, stats)
+        return self.pipe.tokenizer.decode(sequences[0, input_ids.shape[1]:], skip_special_tokens=True)
+
+    def generate_many(self, conversations, max_new_tokens, batch_size) -> List[str]:
+        with self._lock:
+            outs = self.pipe(
+                conversations,
+                batch_size=batch_size,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=2
+            )
+        return [out[0]['generated_text'][-1]['content'] for out in outs]
+
+    def stream(self, messages, max_new_tokens, cancelled, session_id=None, stats=None) -> Iterator[str]:
+        streamer = TextIteratorStreamer(self.pipe.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        failure = []
+
+        def generate():
+            try:
+                self._generate_ids(
+                    messages,
+                    max_new_tokens,
+                    session_id,
+                    stats,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_Cancelled(cancelled)])
+                )
+            except Exception as e:
+                failure.append(e)
+            finally:
+                # Unblock the reader if generation failed
+                streamer.end()
+
+        threading.Thread(target=generate, daemon=True).start()
+        try:
+            for piece in streamer:
+                if piece:
+                    yield piece
+            if failure:
+                raise failure[0]
+        finally:
+            cancelled.set()
+
+    def warm_up(self) -> None:
+        with self._lock:
+            self.pipe([{"role": "user", "content": "Summarize: the meeting started."}], max_new_tokens=8, pad_token_id=2)
+
+    def cache_prefix(self, name, first, second) -> None:
+        try:
+            prefix_ids = self._shared_prefix(first, second)
+            if len(prefix_ids) < 16:
+                logger.info(f"Prompt prefix {name} is too short to cache")
+                return
+            with self._lock:
+                self.prefixes.prefill(name, prefix_ids)
+        except Exception as e:
+            # Generation still works without the cached prefix, only slower
+            logger.error(f"Failed to prefill prompt prefix {name}: {str(e)}")
+
+    def prefix_cache_stats(self) -> Dict[str, float]:
+        return self.prefixes.stats()
+
+    def _generate_ids(
+        self,
+        messages: List[Dict],
+        max_new_tokens: int,
+        session_id: Optional[UUID] = None,
+        stats: Optional[Dict] = None,
+        **kwargs
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Generate from the cached key/value state of the longest known prefix of
+        the prompt, so only the rest of the prompt is prefilled.
+
+        With a `session_id`, everything before the last user turn (the
+        session's graph context) is kept for the session's next question.
+        Returns the prompt and generated token ids.
+        """
+        input_ids = self.pipe.tokenizer.apply_chat_template(messages, add_generation_prompt=True, return_tensors="pt")
+        # Streamed generations take the lock on their own worker thread
+        with self._lock:
+            return self._generate_locked(input_ids, messages, max_new_tokens, session_id, stats, **kwargs)
+
+    def _generate_locked(
+        self,
+        input_ids: torch.Tensor,
+        messages: List[Dict],
+        max_new_tokens: int,
+        session_id: Optional[UUID],
+        stats: Optional[Dict],
+        **kwargs
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        model = self.pipe.model
+        hit = self.prefixes.lookup(input_ids[0], session_id)
+        reused = hit.tokens if hit else 0
+        if hit:
+            kwargs["past_key_values"] = hit.cache
+
+        started = time.perf_counter()
+        input_ids = input_ids.to(model.device)
+        out = model.generate(
+            input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            max_new_tokens=max_new_tokens,
+            pad_token_id=2,
+            return_dict_in_generate=True,
+            **kwargs
+        )
+        if stats is not None:
+            stats["prompt_tokens"] = input_ids.shape[1]
+            stats["prefix_tokens"] = reused
+            stats["prefill_ms_saved"] = hit.saved_ms if hit else 0.0
+        logger.info(f"Generated with {reused}/{input_ids.shape[1]} prompt tokens cached in {time.perf_counter() - started:.2f}s")
+
+        if session_id is not None and len(messages) > 1 and isinstance(out.past_key_values, DynamicCache):
+            prefix_ids = self._shared_prefix(
+                messages[:-1] + [{"role": "user", "content": "?"}],
+                messages[:-1] + [{"role": "user", "content": "!"}]
+            )
+            if len(prefix_ids) > reused and torch.equal(input_ids[0, :len(prefix_ids)].cpu(), prefix_ids):
+                # The generation's own cache covers the prefix; drop everything after it
+                out.past_key_values.crop(len(prefix_ids))
+                self.prefixes.store(session_id, prefix_ids, out.past_key_values)
+        return input_ids, out.sequences
+
+    def _shared_prefix(self, first: List[Dict], second: List[Dict]) -> torch.Tensor:
+        """Leading prompt token ids two conversations have in common."""
+        tokenizer = self.pipe.tokenizer
+        a = tokenizer.apply_chat_template(first, add_generation_prompt=True, return_tensors="pt")[0]
+        b = tokenizer.apply_chat_template(second, add_generation_prompt=True, return_tensors="pt")[0]
+        n = min(len(a), len(b))
+        differs = (a[:n] != b[:n]).nonzero()
+        return a[:differs[0].item() if len(differs) else n]
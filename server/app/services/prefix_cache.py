@@ -0,0 +1,109 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Tuple
+
+import torch
+from transformers import DynamicCache
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrefixHit:
+    cache: DynamicCache
+    tokens: int
+    saved_ms: float
+
+
+class PrefixKVCache:
+    """
+    Key/value states of prompt prefixes shared between generations of one model.
+
+    Named prefixes (the fixed preambles of the prompts) are prefilled once and
+    kept for the lifetime of the model. Per-session prefixes, such as a
+    session's graph context, are taken from finished generations and kept for
+    at most `max_sessions` sessions. A lookup returns a private copy of the
+    longest stored prefix of the prompt, since generation extends the cache
+    it is given.
+
+    """
+
+    def __init__(self, model, max_sessions: int):
+        self.model = model
+        self.max_sessions = max_sessions
+        self._named: Dict[str, Tuple[torch.Tensor, DynamicCache]] = {}
+        self._sessions: "OrderedDict[Hashable, Tuple[torch.Tensor, DynamicCache]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ms_per_token = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._tokens_reused = 0
+        self._saved_ms = 0.0
+
+    def prefill(self, name: str, prefix_ids: torch.Tensor) -> float:
+        """Encode a named prefix and keep its cache. Returns the prefill milliseconds."""
+        started = time.perf_counter()
+        cache = DynamicCache()
+        with torch.inference_mode():
+            self.model(prefix_ids.unsqueeze(0).to(self.model.device), past_key_values=cache, use_cache=True)
+        ms = 1000 * (time.perf_counter() - started)
+        with self._lock:
+            self._named[name] = (prefix_ids.cpu(), cache)
+            # Used to estimate the prefill time saved by any cached prefix
+            self._ms_per_token = ms / max(1, len(prefix_ids))
+        logger.info(f"Prefilled prompt prefix {name}: {len(prefix_ids)} tokens in {ms:.0f}ms")
+        return ms
+
+    def store(self, key: Hashable, prefix_ids: torch.Tensor, cache: DynamicCache) -> None:
+        """Keep the cache of a session prefix; `cache` must cover exactly `prefix_ids`."""
+        with self._lock:
+            self._sessions[key] = (prefix_ids.cpu(), cache)
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def lookup(self, input_ids: torch.Tensor, key: Optional[Hashable] = None) -> Optional[PrefixHit]:
+        """Copy of the cache of the longest stored prefix of `input_ids`, if any."""
+        input_ids = input_ids.cpu()
+        with self._lock:
+            candidates = list(self._named.values())
+            if key in self._sessions:
+                self._sessions.move_to_end(key)
+                candidates.append(self._sessions[key])
+
+            best = None
+            for prefix_ids, cache in candidates:
+                n = len(prefix_ids)
+                # Generation needs at least one uncached prompt token
+                if n >= len(input_ids) or (best is not None and n <= len(best[0])):
+                    continue
+                if torch.equal(input_ids[:n], prefix_ids):
+                    best = (prefix_ids, cache)
+
+            if best is None:
+                self._misses += 1
+                return None
+            tokens = len(best[0])
+            saved_ms = tokens * self._ms_per_token
+            self._hits += 1
+            self._tokens_reused += tokens
+            self._saved_ms += saved_ms
+            cache = copy.deepcopy(best[1])
+        return PrefixHit(cache=cache, tokens=tokens, saved_ms=saved_ms)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "prefixes": len(self._named),
+                "sessions": len(self._sessions),
+                "hits": self._hits,
+                "misses": self._misses,
+                "tokens_reused": self._tokens_reused,
+                "prefill_ms_saved": self._saved_ms
+            }
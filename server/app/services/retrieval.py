@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from app.repository.meetings.abstractions import AudioRepository
+from app.services.knowledge_graph import KnowledgeGraphService
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TextEmbedder:
+    """Sentence embeddings from a small local encoder, mean pooled and L2 normalized."""
+
+    def __init__(self, model_name: str, device: str = "cpu", batch_size: int = 64):
+        started = time.perf_counter()
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).to(torch.device(device)).eval()
+        self.device = device
+        self.batch_size = batch_size
+        self.dim = self.model.config.hidden_size
+        logger.info(f"Loaded {model_name} in {time.perf_counter() - started:.1f}s")
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts as rows of a float32 matrix of unit vectors."""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        batches = []
+        with torch.inference_mode():
+            for i in range(0, len(texts), self.batch_size):
+                encoded = self.tokenizer(
+                    list(texts[i:i + self.batch_size]),
+                    padding=True,
+                    truncation=True,
+                    max_length=256,
+                    return_tensors="pt"
+                ).to(self.device)
+                hidden = self.model(**encoded).last_hidden_state
+                # Average the token vectors, ignoring padding
+                mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+                batches.append(pooled.float().cpu().numpy())
+        return np.concatenate(batches)
+
+
+class VectorIndex:
+    """
+    Growable matrix of unit vectors searched by inner product.
+
+    Removed entries are masked out and the matrix is compacted once they make
+    up half of it.
+
+    """
+
+    def __init__(self, dim: int, capacity: int = 256):
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._keys: List[Hashable] = []
+        self._slots: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def add(self, keys: Sequence[Hashable], vectors: np.ndarray) -> None:
+        needed = len(self._keys) + len(keys)
+        if needed > len(self._vectors):
+            self._grow(max(needed, 2 * len(self._vectors)))
+        for key, vector in zip(keys, vectors):
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = len(self._keys)
+                self._keys.append(key)
+                self._slots[key] = slot
+            self._vectors[slot] = vector
+            self._alive[slot] = True
+
+    def remove(self, key: Hashable) -> None:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        self._alive[slot] = False
+        if len(self._slots) < len(self._keys) // 2:
+            self._compact()
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[Hashable, float]]]:
+        """Top `k` keys by cosine similarity for every query row, best first."""
+        n = len(self._keys)
+        if n == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        scores = queries @ self._vectors[:n].T
+        scores[:, ~self._alive[:n]] = -np.inf
+        k = min(k, len(self._slots))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row[candidates])]
+            results.append([(self._keys[slot], float(row[slot])) for slot in ordered])
+        return results
+
+    def _grow(self, capacity: int) -> None:
+        vectors = np.zeros((capacity, self._vectors.shape[1]), dtype=np.float32)
+        alive = np.zeros(capacity, dtype=bool)
+        vectors[:len(self._keys)] = self._vectors[:len(self._keys)]
+        alive[:len(self._keys)] = self._alive[:len(self._keys)]
+        self._vectors, self._alive = vectors, alive
+
+    def _compact(self) -> None:
+        slots = [self._slots[key] for key in self._keys if key in self._slots]
+        keys = [self._keys[slot] for slot in slots]
+        self._vectors[:len(slots)] = self._vectors[slots]
+        self._alive[:] = False
+        self._alive[:len(slots)] = True
+        self._keys = keys
+        self._slots = {key: slot for slot, key in enumerate(keys)}
+
+
+@dataclass
+class _SessionVectors:
+    index: VectorIndex
+    texts: Dict[Hashable, str] = field(default_factory=dict)
+    triples: Set[tuple] = field(default_factory=set)
+    graph_version: int = -1
+    segments_read: int = 0  # Position of the first segment not embedded yet
+    segments_final: bool = False  # Embedded from the finalized segments
+
+
+class SemanticRetriever:
+    """
+    Per-session dense retrieval over knowledge-graph triples and transcript segments.
+
+    A session's index is brought up to date with the triples and segments
+    added since its last use, so only new texts are embedded. Segments are
+    read by position; after finalization rewrites them they are embedded
+    once more. Indexes of at most `max_sessions` sessions are kept; an
+    evicted one is rebuilt lazily.
+
+    """
+
+    def __init__(
+        self,
+        embedder: TextEmbedder,
+        repository: AudioRepository,
+        max_sessions: int,
+        page_size: int = 256
+    ):
+        self.embedder = embedder
+        self.repository = repository
+        self.max_sessions = max_sessions
+        self.page_size = page_size
+        self._sessions: "OrderedDict[UUID, _SessionVectors]" = OrderedDict()
+        self._session_locks: "weakref.WeakValueDictionary[UUID, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def sync(self, session_id: UUID, graph: KnowledgeGraphService) -> _SessionVectors:
+        """Embed the session's triples and segments added since the last sync."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+
+        async with lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = _SessionVectors(index=VectorIndex(self.embedder.dim))
+                self._sessions[session_id] = state
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+            keys: List[Hashable] = []
+            texts: List[str] = []
+            if graph.version != state.graph_version:
+                current = set(graph.relations)
+                for triple in state.triples - current:
+                    state.index.remove(("triple", *triple))
+                for triple in current - state.triples:
+                    keys.append(("triple", *triple))
+                    texts.append(" ".join(triple))
+                state.triples = current
+                state.graph_version = graph.version
+
+            if not state.segments_final:
+                session = await self.repository.get_session_diarization(session_id, segments_tail=0)
+                if session is not None and session.is_complete:
+                    # Finalization rewrote the segments, so they are embedded again
+                    for key in state.texts:
+                        state.index.remove(key)
+                    state.texts.clear()
+                    state.segments_read = 0
+                    state.segments_final = True
+
+            while True:
+                segments = await self.repository.get_segments_from(
+                    session_id,
+                    state.segments_read,
+                    self.page_size
+                )
+                for segment in segments:
+                    if segment.text.strip():
+                        keys.append(("segment", segment.chunk_sequence, segment.start))
+                        texts.append(f"{segment.speaker}: {segment.text.strip()}")
+                state.segments_read += len(segments)
+                if len(segments) < self.page_size:
+                    break
+
+            if keys:
+                vectors = await asyncio.to_thread(self.embedder.embed, texts)
+                state.index.add(keys, vectors)
+                for key, text in zip(keys, texts):
+                    if key[0] == "segment":
+                        state.texts[key] = text
+            return state
+
+    async def search(
+        self,
+        session_id: UUID,
+        graph: KnowledgeGraphService,
+        questions: Sequence[str],
+        k: int
+    ) -> List[List[Tuple[Hashable, str, float]]]:
+        """Top `k` (key, text, score) matches for each question, as one batched search."""
+        state = await self.sync(session_id, graph)
+        queries = await asyncio.to_thread(self.embedder.embed, list(questions))
+        return [
+            [(key, self.text_of(state, key), score) for key, score in matches]
+            for matches in state.index.search(queries, k)
+        ]
+
+    @staticmethod
+    def text_of(state: _SessionVectors, key: Hashable) -> str:
+        if key[0] == "triple":
+            return f"({key[1]}, {key[2]}, {key[3]})"
+        return state.texts.get(key, "")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Hashable]:
+    """Merge ranked lists by summing 1 / (k + rank) per key."""
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.services.summarize import SummarizationService
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Schedule:
+    chunks: int = 0
+    tokens: int = 0
+    task: Optional[asyncio.Task] = None
+    rerun: bool = False
+
+
+class SummaryScheduler:
+    """
+    Decides when a session's running summary is brought up to date.
+
+    A rolling summary runs in the background once `every_chunks` chunks or
+    `every_tokens` new transcript tokens arrived since the last one (0
+    disables either trigger), and when one is requested. The final
+    map-reduce summary runs when the session ends. A summary requested while
+    one is running is coalesced into a single follow-up run, which picks up
+    everything that arrived meanwhile.
+
+    """
+
+    def __init__(
+        self,
+        summarization: SummarizationService,
+        every_chunks: int,
+        every_tokens: int,
+        max_sessions: int
+    ):
+        self.summarization = summarization
+        self.every_chunks = every_chunks
+        self.every_tokens = every_tokens
+        self.max_sessions = max_sessions
+        self._schedules: "OrderedDict[UUID, _Schedule]" = OrderedDict()
+        self._triggered = 0
+        self._coalesced = 0
+        self._completed = 0
+        self._failed = 0
+
+    def chunk_processed(self, session_id: UUID, text: str) -> bool:
+        """Count a processed chunk's transcript and start a summary if one is due."""
+        schedule = self._schedule(session_id)
+        schedule.chunks += 1
+        if text:
+            schedule.tokens += len(self.summarization.llm.encode(text))
+
+        due = (
+            (self.every_chunks > 0 and schedule.chunks >= self.every_chunks) or
+            (self.every_tokens > 0 and schedule.tokens >= self.every_tokens)
+        )
+        if due:
+            self._trigger(session_id, schedule)
+        return due
+
+    async def request(self, session_id: UUID) -> None:
+        """Bring the session's summary up to date and wait for it; raises if the run failed."""
+        task = self._trigger(session_id, self._schedule(session_id))
+        # Leaving early must not cancel a run other callers may be waiting on
+        failure = await asyncio.shield(task)
+        if failure is not None:
+            raise failure
+
+    async def finalize(self, session_id: UUID, transcript: str, duration: float) -> Tuple[str, List[Dict]]:
+        """Wait for a running summary, then summarize the finished session."""
+        schedule = self._schedules.pop(session_id, None)
+        if schedule is not None and schedule.task is not None:
+            await asyncio.shield(schedule.task)
+        return await self.summarization.final_summary(session_id, transcript, duration)
+
+    async def status(self, session_id: UUID, duration: float) -> Dict:
+        """Latest stored summary of a session and how far behind the transcript it is."""
+        state = await self.summarization.repository.get_session_summary(session_id)
+        schedule = self._schedules.get(session_id)
+        summarized_until = state.summarized_until if state else 0.0
+        return {
+            "summary": state.summary if state else "",
+            "summarized_until": summarized_until,
+            "stale_seconds": max(0.0, duration - summarized_until),
+            "pending": schedule is not None and schedule.task is not None,
+            "updated_at": state.updated_at if state else None
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._schedules),
+            "running": sum(1 for schedule in self._schedules.values() if schedule.task is not None),
+            "triggered": self._triggered,
+            "coalesced": self._coalesced,
+            "completed": self._completed,
+            "failed": self._failed
+        }
+
+    def _schedule(self, session_id: UUID) -> _Schedule:
+        schedule = self._schedules.get(session_id)
+        if schedule is None:
+            schedule = _Schedule()
+            self._schedules[session_id] = schedule
+        self._schedules.move_to_end(session_id)
+        if len(self._schedules) > self.max_sessions:
+            # Forgetting an idle session only resets its counters
+            for stale_id in list(self._schedules)[:len(self._schedules) - self.max_sessions]:
+                if self._schedules[stale_id].task is None:
+                    del self._schedules[stale_id]
+        return schedule
+
+    def _trigger(self, session_id: UUID, schedule: _Schedule) -> asyncio.Task:
+        schedule.chunks = 0
+        schedule.tokens = 0
+        if schedule.task is not None:
+            schedule.rerun = True
+            self._coalesced += 1
+            return schedule.task
+        self._triggered += 1
+        schedule.task = asyncio.create_task(self._run(session_id, schedule))
+        return schedule.task
+
+    async def _run(self, session_id: UUID, schedule: _Schedule) -> Optional[Exception]:
+        """Summarize until no rerun is pending; returns the failure, if any, for `request`."""
+        try:
+            while True:
+                schedule.rerun = False
+                await self.summarization.rolling_summary(session_id)
+                self._completed += 1
+                if not schedule.rerun:
+                    break
+        except Exception as e:
+            # The stored summary stays in place and the next trigger retries
+            self._failed += 1
+            logger.error(f"Summary of session {session_id} failed: {str(e)}")
+            return e
+        finally:
+            schedule.task = None
+        return None
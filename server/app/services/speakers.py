@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from app.dxo.diarization import SpeakerProfileDXO
+
+
+class _SessionSpeakers:
+    """Running speaker centroids of one session."""
+
+    def __init__(self, profiles: Dict[str, SpeakerProfileDXO]):
+        self.labels: List[str] = list(profiles)
+        self.weights = np.array([p.weight for p in profiles.values()], dtype=np.float64)
+        dims = len(next(iter(profiles.values())).centroid) if profiles else 0
+        self.centroids = np.array(
+            [p.centroid for p in profiles.values()],
+            dtype=np.float64
+        ).reshape(len(profiles), dims)
+        self.last_speaker: Optional[str] = None
+
+    def copy(self) -> "_SessionSpeakers":
+        speakers = _SessionSpeakers({})
+        speakers.labels = list(self.labels)
+        speakers.weights = self.weights.copy()
+        speakers.centroids = self.centroids.copy()
+        speakers.last_speaker = self.last_speaker
+        return speakers
+
+    def add(self, label: str, embedding: np.ndarray, weight: float) -> None:
+        if not len(self.centroids):
+            self.centroids = np.empty((0, len(embedding)), dtype=np.float64)
+        self.labels.append(label)
+        self.centroids = np.vstack([self.centroids, embedding])
+        self.weights = np.append(self.weights, weight)
+
+    def update(self, index: int, embedding: np.ndarray, weight: float) -> None:
+        total = self.weights[index] + weight
+        self.centroids[index] = (self.centroids[index] * self.weights[index] + embedding * weight) / total
+        self.weights[index] = total
+
+    def next_label(self) -> str:
+        taken = set(self.labels)
+        index = len(self.labels)
+        while f"SPEAKER_{index:02d}" in taken:
+            index += 1
+        return f"SPEAKER_{index:02d}"
+
+    def profile(self, label: str) -> SpeakerProfileDXO:
+        index = self.labels.index(label)
+        return SpeakerProfileDXO(
+            centroid=self.centroids[index].tolist(),
+            weight=float(self.weights[index])
+        )
+
+
+class SpeakerTracker:
+    """
+    Maps chunk-local pyannote speakers onto session-wide speakers.
+
+    Each session keeps one centroid per known speaker. Local speakers are
+    matched by cosine similarity of their embeddings, so the cost depends on
+    the number of speakers, not on the length of the meeting. Assignments
+    change a staged copy of the centroids until they are committed, so a
+    chunk that is not stored leaves them as they were.
+
+    """
+
+    def __init__(self, similarity_threshold: float, max_sessions: int = 1024):
+        self.similarity_threshold = similarity_threshold
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[UUID, _SessionSpeakers]" = OrderedDict()
+        self._staged: Dict[UUID, _SessionSpeakers] = {}
+
+    def has_session(self, session_id: UUID) -> bool:
+        return session_id in self._sessions
+
+    def load(self, session_id: UUID, profiles: Dict[str, SpeakerProfileDXO]) -> None:
+        """Seed a session's centroids, e.g. from its persisted profiles."""
+        self._sessions[session_id] = _SessionSpeakers(profiles)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def discard(self, session_id: UUID) -> None:
+        self._sessions.pop(session_id, None)
+        self._staged.pop(session_id, None)
+
+    def commit(self, session_id: UUID) -> None:
+        """Keep the centroids changed by the assignments since the last commit."""
+        staged = self._staged.pop(session_id, None)
+        if staged is not None and session_id in self._sessions:
+            self._sessions[session_id] = staged
+
+    def rollback(self, session_id: UUID) -> None:
+        """Drop the centroid changes of the assignments since the last commit."""
+        self._staged.pop(session_id, None)
+
+    def assign(
+        self,
+        session_id: UUID,
+        labels: Sequence[str],
+        embeddings: np.ndarray,
+        weights: Sequence[float]
+    ) -> Dict[str, str]:
+        """
+        Map local labels to session labels and fold the embeddings into the
+        staged centroids, which take effect with `commit`.
+
+        `embeddings` holds one row per local label and `weights` the seconds of
+        speech behind each row.
+
+        """
+        if session_id not in self._sessions:
+            self.load(session_id, {})
+        self._sessions.move_to_end(session_id)
+        session = self._staged.get(session_id)
+        if session is None:
+            session = self._sessions[session_id].copy()
+            self._staged[session_id] = session
+
+        embeddings = np.asarray(embeddings, dtype=np.float64).reshape(len(labels), -1)
+        weights = np.maximum(np.asarray(weights, dtype=np.float64), 1e-3)
+        valid = ~np.isnan(embeddings).any(axis=1)
+        mapping: Dict[str, str] = {}
+
+        # Greedy one-to-one matching on cosine similarity, best pairs first
+        if valid.any() and len(session.labels):
+            local = _normalize(embeddings[valid])
+            known = _normalize(session.centroids)
+            similarity = local @ known.T
+            local_indices = np.nonzero(valid)[0]
+            used = set()
+            for flat in np.argsort(-similarity, axis=None):
+                row, column = np.unravel_index(flat, similarity.shape)
+                if similarity[row, column] < self.similarity_threshold:
+                    break
+                label = labels[local_indices[row]]
+                if label in mapping or column in used:
+                    continue
+                mapping[label] = session.labels[column]
+                used.add(column)
+                session.update(column, embeddings[local_indices[row]], weights[local_indices[row]])
+
+        for index, label in enumerate(labels):
+            if label in mapping:
+                continue
+            if valid[index]:
+                new_label = session.next_label()
+                session.add(new_label, embeddings[index], weights[index])
+                mapping[label] = new_label
+            elif session.last_speaker is not None:
+                # Too little clean speech for an embedding: assume the last speaker
+                mapping[label] = session.last_speaker
+            else:
+                # Reserve the label with a placeholder no embedding will match,
+                # so it is not handed out again
+                new_label = session.next_label()
+                session.add(new_label, np.zeros(embeddings.shape[1]), 0.0)
+                mapping[label] = new_label
+
+        if mapping:
+            heaviest = max(range(len(labels)), key=lambda i: weights[i])
+            session.last_speaker = mapping[labels[heaviest]]
+        return mapping
+
+    def profiles(self, session_id: UUID, labels: Sequence[str]) -> Dict[str, SpeakerProfileDXO]:
+        """Current profiles of the given session labels, staged changes included, for persistence."""
+        session = self._staged.get(session_id) or self._sessions.get(session_id)
+        if session is None:
+            return {}
+        return {label: session.profile(label) for label in set(labels) if label in session.labels}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
@@ -1,65 +1,555 @@
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline, BitsAndBytesConfig
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
 
+from app.dxo.diarization import SpeechSegmentDXO
+from app.dxo.summaries import SessionSummaryDXO
+from app.repository.meetings.abstractions import AudioRepository
+from app.services.answers import AnswerCache, AnswerKey
+from app.services.extraction import KnowledgeExtractionQueue
 from app.services.knowledge_graph import KnowledgeGraphService
+from app.services.knowledge_registry import KnowledgeGraphRegistry
+from app.services.llm import create_llm_backend
+from app.services.retrieval import SemanticRetriever, reciprocal_rank_fusion
 from app.settings.meetings import Settings
-torch.cuda.empty_cache()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+MAP_PROMPT = "You are now a meeting summarizer assistant given a section of a meeting and you will give a summary of it."
+FOLD_PROMPT = "You are now a meeting summarizer assistant. You are given the summary of a meeting so far and the next section of its transcript, and you will give an updated summary of the whole meeting."
+QUESTION_PROMPT = "You are a question answer assistant who uses relations in the knowledge graphs which has the past discussions of the meeting and reply with a satisfactory answer which is true for the knowledge base but you can not let the user know you are using the graph else something very bad will happen. The answer should not be repetitive and should be to the point. If no relevant connections are found answer tell it was not addressed in the meeting but try to answer best as you can do not mention the knowledge graph or something bad will happen"
+REDUCE_PROMPT = "You are now a meeting summarizer assistant given summaries of consecutive parts of a meeting and you will combine them into one summary of the whole meeting."
 
 
 class SummarizationService:
     """Service handling streaming audio summerization logic."""
     
-    def __init__(self, config: Settings, kb: KnowledgeGraphService) -> None:
-        bnb_config = BitsAndBytesConfig(load_in_4bit=True, bnb_4bit_compute_dtype=torch.bfloat16)
-
-        model = AutoModelForCausalLM.from_pretrained(config.sm_model_name, quantization_config=bnb_config, low_cpu_mem_usage=True, pad_token_id=0)
-        tokenizer = AutoTokenizer.from_pretrained(config.sm_model_name)
-        self.pipe = pipeline("text-generation", model=model, tokenizer=tokenizer)
-        self.kb = kb
+    def __init__(
+        self,
+        config: Settings,
+        knowledge: KnowledgeGraphRegistry,
+        repository: AudioRepository,
+        extraction: KnowledgeExtractionQueue,
+        retriever: SemanticRetriever
+    ) -> None:
+        started = time.perf_counter()
+        self.llm = create_llm_backend(config)
+        logger.info(f"Loaded {self.llm.name} LLM backend in {time.perf_counter() - started:.1f}s")
+        self.knowledge = knowledge
+        self.repository = repository
+        self.extraction = extraction
+        self.retriever = retriever
+        self._streams = 0
+        self._cancelled_streams = 0
+        self._ttft_total_ms = 0.0
+        self._ttft_count = 0
+        self._ttft_max_ms = 0.0
+        self.answers = AnswerCache(
+            max_entries=config.answer_cache_size,
+            ttl_seconds=config.answer_cache_ttl_seconds
+        )
+        self.section_tokens = config.summary_section_tokens
+        self.max_summary_tokens = config.summary_max_tokens
+        self.max_segments = config.summary_max_segments
+        self.window_tokens = config.summary_window_tokens
+        self.reduce_fan_out = max(2, config.summary_reduce_fan_out)
+        self.max_depth = max(1, config.summary_max_depth)
+        self.batch_size = config.summary_batch_size
+        self.search_top_k = config.kb_search_top_k
+        self.search_max_tokens = config.kb_search_max_tokens
+        self._session_locks: "weakref.WeakValueDictionary[UUID, asyncio.Lock]" = weakref.WeakValueDictionary()
         
+    async def warm_up(self) -> Dict[str, float]:
+        """Run a short generation so the first summary is not slow."""
+        started = time.perf_counter()
+        await asyncio.to_thread(self.llm.warm_up)
+        seconds = time.perf_counter() - started
+        logger.info(f"summarization_warm_up took {seconds:.2f}s")
+        timings = {"summarization_warm_up": seconds}
         
-    async def summerize(self, script):
-        messages = [
-            {
-                "role": "system",
-                "content": "You are now a meeting summarizer assistant given a section of a meeting and you will give a summary of it.",
-            },
-            {"role": "user", "content": script}
-        ]
+        started = time.perf_counter()
+        await asyncio.to_thread(self._prefill_prefixes)
+        timings["prompt_prefix_prefill"] = time.perf_counter() - started
+        return timings
+    
+    def _prefill_prefixes(self) -> None:
+        """Cache the key/value states of the fixed preambles of the Q&A and KB prompts."""
+        # The shared part of a template is where two renderings with different inputs diverge
+        prefixes = {
+            "question": (self._question_template("?", ""), self._question_template("!", "")),
+            "knowledge": (
+                KnowledgeGraphService().update_messages("?"),
+                KnowledgeGraphService(relations=[("?", "?", "?")]).update_messages("!")
+            )
+        }
+        for name, (first, second) in prefixes.items():
+            self.llm.cache_prefix(name, first, second)
+        
+    async def rolling_summary(self, session_id: UUID) -> str:
+        """
+        Fold the segments added since the last call into the session's running summary.
 
-        out = self.pipe(messages, max_new_tokens=2048, pad_token_id=2)[0]['generated_text'][-1]['content']
-        self.kb.update_mem(out.strip(), self.pipe)
+        Each LLM call sees the previous summary and at most `section_tokens`
+        tokens of new transcript, so its prompt stays bounded however long
+        the meeting runs. Without new segments the stored summary is returned.
+        """
+        async with self._session_lock(session_id):
+            state = await self.repository.get_session_summary(session_id)
+            if state is None:
+                state = SessionSummaryDXO(session_id=session_id)
+            
+            while True:
+                segments = await self.repository.get_segments_from(
+                    session_id,
+                    state.summarized_segments,
+                    self.max_segments
+                )
+                section, consumed = self._build_section(segments)
+                if not consumed:
+                    return state.summary
+                
+                summary = await asyncio.to_thread(self._fold, state.summary, section)
+                self._extract(session_id, section)
+                state = SessionSummaryDXO(
+                    session_id=session_id,
+                    summary=summary,
+                    summarized_until=max(state.summarized_until, *(segment.end for segment in segments[:consumed])),
+                    summarized_segments=state.summarized_segments + consumed
+                )
+                await self.repository.update_session_summary(state)
+    
+    async def final_summary(
+        self,
+        session_id: UUID,
+        transcript: str,
+        duration: float
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Summarize a finished meeting with a map-reduce over its whole transcript.
+
+        The transcript is cut on speaker turns into windows of at most
+        `window_tokens` tokens and the windows are summarized in batches. The
+        summaries are then merged `reduce_fan_out` at a time, level by level,
+        until one is left; from level `max_depth` on a merge takes as many as
+        fit in a window. Summaries are only truncated when no two fit
+        together, which is recorded in the level. Returns the summary with
+        the time spent on every level.
+        """
+        async with self._session_lock(session_id):
+            levels = []
+            started = time.perf_counter()
+            windows = self._pack(transcript.split("\n"))
+            summaries = await asyncio.to_thread(self._generate_many, MAP_PROMPT, windows)
+            levels.append(self._level(0, "map", len(windows), len(summaries), started))
+            
+            depth = 0
+            while len(summaries) > 1:
+                depth += 1
+                started = time.perf_counter()
+                # Past the last level only the token budget limits a group
+                groups = self._group(summaries, self.reduce_fan_out if depth < self.max_depth else len(summaries))
+                truncated = 0
+                if len(groups) == len(summaries):
+                    # No two summaries fit the budget together, so pairs are
+                    # cut to half the budget each to keep reducing
+                    groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+                    texts = []
+                    for group in groups:
+                        parts = [self._truncate(summary, self.window_tokens // 2) for summary in group] if len(group) > 1 else group
+                        truncated += sum(part != summary for part, summary in zip(parts, group))
+                        texts.append("\n\n".join(parts))
+                else:
+                    texts = ["\n\n".join(group) for group in groups]
+                merged = await asyncio.to_thread(
+                    self._generate_many,
+                    REDUCE_PROMPT,
+                    [text for text, group in zip(texts, groups) if len(group) > 1]
+                )
+                # A group of one is already a summary and passes through
+                merged_iter = iter(merged)
+                summaries = [next(merged_iter) if len(group) > 1 else group[0] for group in groups]
+                levels.append(self._level(depth, "reduce", len(texts), len(summaries), started, truncated))
+                if truncated:
+                    logger.warning(f"Final summary reduce level {depth} truncated {truncated} summaries to fit {self.window_tokens} tokens")
+            
+            summary = summaries[0] if summaries else ""
+            for level in levels:
+                logger.info(f"Final summary {level['stage']} level {level['level']}: {level['inputs']} -> {level['outputs']} in {level['seconds']:.2f}s")
+            
+            state = await self.repository.get_session_summary(session_id) or SessionSummaryDXO(session_id=session_id)
+            await self._extract_from(session_id, state.summarized_segments)
+            session = await self.repository.get_session_diarization(session_id, segments_tail=0)
+            # The whole transcript is covered, so nothing is left to fold
+            await self.repository.update_session_summary(state.model_copy(update={
+                "summary": summary,
+                "summarized_until": max(duration, state.summarized_until),
+                "summarized_segments": session.segment_count if session else state.summarized_segments
+            }))
+            return summary, levels
+    
+    async def _extract_from(self, session_id: UUID, offset: int) -> None:
+        """Queue extraction of the segments from `offset` on, which no fold has covered."""
+        while True:
+            segments = await self.repository.get_segments_from(session_id, offset, self.max_segments)
+            section, consumed = self._build_section(segments)
+            if not consumed:
+                return
+            self._extract(session_id, section)
+            offset += consumed
+    
+    def _extract(self, session_id: UUID, section: str) -> None:
+        """
+        Queue knowledge-graph extraction of a transcript section without
+        waiting for it. Only the new section is sent, the graph already holds
+        what earlier sections said.
+        """
+        if not section:
+            return
+        
+        async def work(text: str):
+            # Pinned so the graph is not evicted and reloaded during generation
+            async with self.knowledge.use(session_id) as graph:
+                # Only the generation runs in a thread; the graph is changed on
+                # the loop so concurrent searches and syncs see a consistent state
+                relations = await asyncio.to_thread(
+                    graph.generate_relations, graph.update_messages(text), self._cached_pipe
+                )
+                for relation in relations:
+                    graph.add_relation(relation)
+                await self.knowledge.save(session_id, graph)
+                # Embed the new triples and segments now rather than on the next question
+                await self.retriever.sync(session_id, graph)
+        
+        self.extraction.submit(session_id, section, work)
+    
+    def _session_lock(self, session_id: UUID) -> asyncio.Lock:
+        """Get the lock serializing summary updates of a session."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+    
+    async def _graph_context(self, session_id: UUID, graph, query: str) -> str:
+        """
+        Relations and transcript excerpts relevant to a question, within the
+        prompt budget. Keyword (BM25) and embedding matches are merged with
+        reciprocal rank fusion so paraphrased questions still find context.
+        """
+        keyword = [("triple", *triple) for triple in graph.search(query, self.search_top_k)]
+        dense = (await self.retriever.search(session_id, graph, [query], self.search_top_k))[0]
+        texts = {key: text for key, text, _ in dense}
+        
+        relations, excerpts = [], []
+        used = 0
+        for key in reciprocal_rank_fusion([keyword, [key for key, _, _ in dense]])[:self.search_top_k]:
+            text = texts.get(key) or f"({key[1]}, {key[2]}, {key[3]})"
+            tokens = len(self._token_ids(text))
+            if used + tokens > self.search_max_tokens:
+                break
+            (relations if key[0] == "triple" else excerpts).append(text)
+            used += tokens
         
+        context = "\n".join(relations) if relations else "No relevant relations found."
+        if excerpts:
+            context += "\nThese are relevant excerpts of the meeting transcript:\n" + "\n".join(excerpts)
+        return context
+    
+    def _token_ids(self, text: str) -> List[int]:
+        return self.llm.encode(text)
+    
+    def _pack(self, turns: List[str]) -> List[str]:
+        """Pack speaker turns into windows of at most `window_tokens` tokens."""
+        windows: List[str] = []
+        current: List[str] = []
+        used = 0
+        for turn in turns:
+            if not turn.strip():
+                continue
+            ids = self._token_ids(turn)
+            if len(ids) > self.window_tokens:
+                # A turn longer than a window gets windows of its own
+                pieces = [ids[i:i + self.window_tokens] for i in range(0, len(ids), self.window_tokens)]
+                if current:
+                    windows.append("\n".join(current))
+                windows.extend(self.llm.decode(piece) for piece in pieces)
+                current, used = [], 0
+                continue
+            if used + len(ids) > self.window_tokens:
+                windows.append("\n".join(current))
+                current, used = [], 0
+            current.append(turn)
+            used += len(ids)
+        if current:
+            windows.append("\n".join(current))
+        return windows
+    
+    def _group(self, summaries: List[str], fan_out: int) -> List[List[str]]:
+        """Group consecutive summaries for one reduce call, by count and tokens."""
+        groups: List[List[str]] = []
+        used = 0
+        for summary in summaries:
+            tokens = len(self._token_ids(summary))
+            if not groups or len(groups[-1]) >= fan_out or used + tokens > self.window_tokens:
+                groups.append([])
+                used = 0
+            groups[-1].append(summary)
+            used += tokens
+        return groups
+    
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        ids = self._token_ids(text)
+        if len(ids) <= max_tokens:
+            return text
+        return self.llm.decode(ids[:max_tokens])
+    
+    def _generate_many(self, system_prompt: str, texts: List[str]) -> List[str]:
+        """Run one prompt over several texts as batched generations."""
+        if not texts:
+            return []
+        conversations = [
+            [{"role": "system", "content": system_prompt}, {"role": "user", "content": text}]
+            for text in texts
+        ]
+        outs = self.llm.generate_many(conversations, self.max_summary_tokens, self.batch_size)
+        return [out.strip() for out in outs]
+    
+    @staticmethod
+    def _level(level: int, stage: str, inputs: int, outputs: int, started: float, truncated: int = 0) -> Dict:
+        return {
+            "level": level,
+            "stage": stage,
+            "inputs": inputs,
+            "outputs": outputs,
+            "truncated": truncated,
+            "seconds": time.perf_counter() - started
+        }
+    
+    def _build_section(self, segments: List[SpeechSegmentDXO]) -> Tuple[str, int]:
+        """Render leading segments as speaker lines within the token budget."""
+        lines: List[str] = []
+        speaker = None
+        used = 0
+        consumed = 0
+        for segment in segments:
+            text = segment.text.strip()
+            if text:
+                ids = self._token_ids(text)
+                if used + len(ids) > self.section_tokens:
+                    if consumed:
+                        break
+                    # A single oversized segment is cut rather than skipped
+                    ids = ids[:self.section_tokens]
+                    text = self.llm.decode(ids)
+                used += len(ids)
+                if segment.speaker == speaker:
+                    lines[-1] += f" {text}"
+                else:
+                    lines.append(f"{segment.speaker}: {text}")
+                    speaker = segment.speaker
+            consumed += 1
+        return "\n".join(lines), consumed
+    
+    def _fold(self, summary: str, section: str) -> str:
+        if not section:
+            return summary
+        messages = self._fold_messages(summary, section)
+        out = self.llm.generate(messages, self.max_summary_tokens)
         return out.strip()
     
-    async def query(self, query):
-        messages = [
+    @staticmethod
+    def _fold_messages(summary: str, section: str) -> List[Dict]:
+        return [
             {
                 "role": "system",
-                "content": "You are a question answer assistant who uses relations in the knowledge graphs which has the past discussions of the meeting and reply with a satisfactory answer which is true for the knowledge base but you can not let the user know you are using the graph else something very bad will happen. The answer should not be repetitive and should be to the point. If no relevant connections are found answer tell it was not addressed in the meeting but try to answer best as you can do not mention the knowledge graph or something bad will happen",
+                "content": FOLD_PROMPT,
             },
-            {"role": "user", "content": "hi! I had a question regarding something discussed in the meeting will you answer it? "},
-            {"role": "assistant", "content": "Sure! please give me relevant current state of the graph"},
-            {"role": "user", "content": "these are the relevant relations in the current knowledge graph of the meeting, the knowledge graph is represented as a collection of triples (<head, relation, tail>) where: head: Represents the subject, relation: Represents the type of relation or predicate, tail: Represents the object." + self.kb.search_question(query)},
-            {"role": "assistant", "content": "Thank you for giving me the relevant relations in the graph i will now answer your question please tell me the question."},
-            {"role": "user", "content": "My question is please answer as brief as possible: " + query},
+            {"role": "user", "content": f"Summary so far:\n{summary or '(the meeting just started)'}\n\nNext section:\n{section}"}
         ]
+    
+    async def answer(self, question: str, session_id: UUID, stats: Optional[Dict] = None) -> Tuple[str, bool, int]:
+        """
+        Answer a question about a session, reusing a cached answer while the
+        session's knowledge graph and transcript are unchanged.
 
-        out = self.pipe(messages, max_new_tokens=1048, pad_token_id=2)[0]['generated_text'][-1]['content']
+        Returns the answer, whether it came from the cache and the graph version.
+        `stats` receives the prompt prefix reuse of a generated answer.
+        """
+        key = await self._answer_key(session_id, question)
+        version = key[2]
+        cached = self.answers.get(key)
+        if cached is not None:
+            return cached, True, version
+        
+        answer = await self.query(question, session_id, stats)
+        self.answers.put(key, answer)
+        return answer, False, version
+    
+    async def _answer_key(self, session_id: UUID, question: str) -> AnswerKey:
+        """Cache key of a question in the session's current graph and transcript state."""
+        graph = await self.knowledge.get(session_id)
+        session = await self.repository.get_session_diarization(session_id, segments_tail=0)
+        return self.answers.key(session_id, question, graph.version, session.revision if session else 0)
+    
+    async def query(self, query, session_id: UUID, stats: Optional[Dict] = None):
+        messages = await self._question_messages(query, session_id)
+        out = await asyncio.to_thread(self.llm.generate, messages, 1048, session_id, stats)
         return out.strip()
     
-    async def qna(self, query):
-        messages = [
+    async def _question_messages(self, query: str, session_id: UUID) -> List[Dict]:
+        graph = await self.knowledge.get(session_id)
+        return self._question_template(await self._graph_context(session_id, graph, query), query)
+    
+    @staticmethod
+    def _question_template(context: str, query: str) -> List[Dict]:
+        return [
             {
                 "role": "system",
-                "content": "You are a question answer assistant who uses relations in the knowledge graphs which has the past discussions of the meeting and reply with a satisfactory answer which is true for the knowledge base but you can not let the user know you are using the graph else something very bad will happen. The answer should not be repetitive and should be to the point. If no relevant connections are found answer tell it was not addressed in the meeting but try to answer best as you can do not mention the knowledge graph or something bad will happen",
+                "content": QUESTION_PROMPT,
             },
             {"role": "user", "content": "hi! I had a question regarding something discussed in the meeting will you answer it? "},
             {"role": "assistant", "content": "Sure! please give me relevant current state of the graph"},
-            {"role": "user", "content": "these are the relevant relations in the current knowledge graph of the meeting, the knowledge graph is represented as a collection of triples (<head, relation, tail>) where: head: Represents the subject, relation: Represents the type of relation or predicate, tail: Represents the object." + self.kb.search_question(query)},
+            {"role": "user", "content": "these are the relevant relations in the current knowledge graph of the meeting, the knowledge graph is represented as a collection of triples (<head, relation, tail>) where: head: Represents the subject, relation: Represents the type of relation or predicate, tail: Represents the object." + context},
             {"role": "assistant", "content": "Thank you for giving me the relevant relations in the graph i will now answer your question please tell me the question."},
             {"role": "user", "content": "My question is please answer as brief as possible: " + query},
         ]
+    
+    async def stream_answer(self, question: str, session_id: UUID, stats: Dict) -> AsyncIterator[str]:
+        """
+        Stream an answer to a question as it is generated.
+
+        A cached answer is sent as a single piece. A completed answer is
+        cached; an abandoned one is not. `stats` receives the generation timings.
+        """
+        key = await self._answer_key(session_id, question)
+        cached = self.answers.get(key)
+        stats["cached"] = cached is not None
+        if cached is not None:
+            yield cached
+            return
+        
+        pieces = []
+        messages = await self._question_messages(question, session_id)
+        async for piece in self._stream(messages, 1048, stats, session_id):
+            pieces.append(piece)
+            yield piece
+        self.answers.put(key, "".join(pieces).strip())
+    
+    async def stream_summary(self, session_id: UUID, stats: Dict) -> AsyncIterator[str]:
+        """
+        Stream the next step of the session's running summary as it is generated.
+
+        One bounded section of new segments is folded into the summary, which
+        is stored once generation completes. Without new segments the stored
+        summary is sent as a single piece.
+        """
+        async with self._session_lock(session_id):
+            state = await self.repository.get_session_summary(session_id)
+            if state is None:
+                state = SessionSummaryDXO(session_id=session_id)
+            segments = await self.repository.get_segments_from(
+                session_id,
+                state.summarized_segments,
+                self.max_segments
+            )
+            section, consumed = self._build_section(segments)
+            if not section:
+                yield state.summary
+                return
+            
+            pieces = []
+            async for piece in self._stream(self._fold_messages(state.summary, section), self.max_summary_tokens, stats):
+                pieces.append(piece)
+                yield piece
+            
+            summary = "".join(pieces).strip()
+            self._extract(session_id, section)
+            await self.repository.update_session_summary(SessionSummaryDXO(
+                session_id=session_id,
+                summary=summary,
+                summarized_until=max(state.summarized_until, *(segment.end for segment in segments[:consumed])),
+                summarized_segments=state.summarized_segments + consumed
+            ))
+    
+    async def _stream(
+        self,
+        messages: List[Dict],
+        max_new_tokens: int,
+        stats: Dict,
+        session_id: Optional[UUID] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a generation of the LLM backend, yielding text as it is decoded.
 
-        out = self.pipe(messages, max_new_tokens=1048, pad_token_id=2)[0]['generated_text'][-1]['content']
-        return out.strip()
\ No newline at end of file
+        Generation stops at the next token once the consumer stops iterating,
+        e.g. when an SSE client disconnects. Time to first token and prompt
+        prefix reuse are recorded in `stats`.
+        """
+        cancelled = threading.Event()
+        started = time.perf_counter()
+        pieces = self.llm.stream(messages, max_new_tokens, cancelled, session_id, stats)
+        # Held while a worker thread is inside the generator
+        stepping = threading.Lock()
+        
+        def step() -> Optional[str]:
+            with stepping:
+                piece = next(pieces, None)
+                if cancelled.is_set():
+                    # The consumer left while this step ran and could not close it
+                    pieces.close()
+                return piece
+        
+        completed = False
+        try:
+            while True:
+                piece = await asyncio.to_thread(step)
+                if piece is None:
+                    break
+                if "ttft_ms" not in stats:
+                    stats["ttft_ms"] = 1000 * (time.perf_counter() - started)
+                yield piece
+            completed = True
+        finally:
+            cancelled.set()
+            stats["cancelled"] = not completed
+            stats["generation_ms"] = 1000 * (time.perf_counter() - started)
+            self._record_stream(stats)
+            # A step still running closes the generator itself once it returns
+            if stepping.acquire(blocking=False):
+                try:
+                    pieces.close()
+                finally:
+                    stepping.release()
+    
+    def _cached_pipe(self, messages: List[Dict], max_new_tokens: int, pad_token_id: int = 2) -> List[Dict]:
+        """Drop-in for a text-generation pipeline on one conversation, backed by the LLM backend."""
+        out = self.llm.generate(messages, max_new_tokens)
+        return [{"generated_text": messages + [{"role": "assistant", "content": out}]}]
+    
+    def prefix_cache_stats(self) -> Dict[str, float]:
+        return self.llm.prefix_cache_stats()
+    
+    def _record_stream(self, stats: Dict) -> None:
+        self._streams += 1
+        if stats.get("cancelled"):
+            self._cancelled_streams += 1
+        if "ttft_ms" in stats:
+            self._ttft_total_ms += stats["ttft_ms"]
+            self._ttft_count += 1
+            self._ttft_max_ms = max(self._ttft_max_ms, stats["ttft_ms"])
+        logger.info(f"Streamed generation: ttft {stats.get('ttft_ms', 0.0):.0f}ms, total {stats['generation_ms']:.0f}ms, cancelled {stats['cancelled']}")
+    
+    def streaming_stats(self) -> Dict[str, float]:
+        """Counts and time to first token of streamed generations."""
+        return {
+            "streams": self._streams,
+            "cancelled": self._cancelled_streams,
+            "mean_ttft_ms": self._ttft_total_ms / self._ttft_count if self._ttft_count else 0.0,
+            "max_ttft_ms": self._ttft_max_ms
+        }
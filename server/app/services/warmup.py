@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ModelReadiness:
+    """Eager model loading and warm-up state behind the readiness probe."""
+
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+    async def load(self, factories: Dict[str, Callable[[], Any]]) -> None:
+        """
+        Build every service in parallel, then warm up those exposing `warm_up`.
+
+        Factories run in worker threads because model loading blocks.
+
+        """
+        try:
+            services = await asyncio.gather(*[
+                asyncio.to_thread(self._build, name, factory)
+                for name, factory in factories.items()
+            ])
+            for service in services:
+                warm_up = getattr(service, "warm_up", None)
+                if warm_up is not None:
+                    self.timings.update(await warm_up())
+            self.ready = True
+            logger.info(f"Models ready: {self.timings}")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Failed to load models: {str(e)}")
+
+    def _build(self, name: str, factory: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        service = factory()
+        self.timings[f"{name}_load"] = time.perf_counter() - started
+        logger.info(f"Loaded {name} service in {self.timings[f'{name}_load']:.1f}s")
+        return service
@@ -13,6 +13,63 @@ class Settings(BaseSettings):
     huggingface_auth_token: str
     device: str = "cuda" if torch.cuda.is_available() else "cpu"
     sm_model_name: str
+    llm_backend: str = "transformers"
+    llm_gguf_path: str = ""
+    llm_context_tokens: int = 8192
+    llm_threads: int = 0
+    llm_prompt_cache_bytes: int = 2 << 30
+    llm_stub_latency_ms: float = 50.0
+    llm_stub_token_latency_ms: float = 5.0
+    whisper_model_name: str = "base"
+    
+    # Inference Settings
+    inference_workers: int = 2
+    transcription_max_batch_size: int = 4
+    transcription_max_wait_ms: float = 50.0
+    diarization_max_batch_size: int = 4
+    diarization_max_wait_ms: float = 20.0
+    segmentation_batch_size: int = 32
+    embedding_batch_size: int = 32
+    speaker_similarity_threshold: float = 0.4
+    chunk_overlap_seconds: float = 1.0
+    overlap_buffer_idle_seconds: float = 300.0
+    overlap_buffer_max_sessions: int = 256
+    vad_energy_threshold_db: float = -45.0
+    inference_cache_size: int = 512
+    inference_cache_ttl_seconds: int = 604800
+    
+    # Summarization Settings
+    summary_section_tokens: int = 1024
+    summary_max_tokens: int = 512
+    summary_max_segments: int = 256
+    summary_window_tokens: int = 2048
+    summary_reduce_fan_out: int = 4
+    summary_max_depth: int = 3
+    summary_batch_size: int = 4
+    summary_every_chunks: int = 4
+    summary_every_tokens: int = 256
+    summary_schedule_max_sessions: int = 1024
+    
+    # Knowledge Graph Settings
+    kb_max_sessions: int = 64
+    kb_idle_seconds: float = 900.0
+    kb_max_relations: int = 5000
+    kb_search_top_k: int = 20
+    kb_search_max_tokens: int = 512
+    embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    retrieval_max_sessions: int = 64
+    answer_cache_size: int = 1024
+    answer_cache_ttl_seconds: float = 3600.0
+    prefix_cache_sessions: int = 8
+    
+    # Background Job Settings
+    job_workers: int = 2
+    job_queue_size: int = 64
+    
+    # Streaming Settings
+    stream_min_window_seconds: float = 5.0
+    stream_max_window_seconds: float = 20.0
+    stream_pause_ms: float = 400.0
     
     model_config = SettingsConfigDict(
         env_file='.env',
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark for transcript-to-speaker alignment.
+
+Compares the previous per-turn scan over every transcript segment with the
+sorted `searchsorted` sweep in `app.services.alignment`, on back-to-back turns
+and on a monologue covering the whole chunk with short interjections.
+
+Run from the `server` directory:
+
+    python -m benchmarks.alignment
+
+"""
+import time
+
+import numpy as np
+
+from app.services.alignment import assign_words_to_turns
+
+
+def legacy_alignment(turns, words):
+    """The O(turns x words) overlap scan that alignment replaced."""
+    texts = []
+    for turn_start, turn_end in turns:
+        matching = [
+            text for start, end, text in words
+            if start <= turn_end and end >= turn_start
+        ]
+        texts.append(" ".join(matching))
+    return texts
+
+
+def synthetic_chunk(n_turns: int, words_per_turn: int = 4, seed: int = 0):
+    """Back-to-back turns with slight overlaps and evenly spaced words."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.uniform(0.3, 2.0, n_turns)
+    starts = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+    ends = starts + lengths + rng.uniform(0.0, 0.2, n_turns)
+
+    n_words = n_turns * words_per_turn
+    total = float(ends[-1])
+    word_starts = np.sort(rng.uniform(0.0, total, n_words))
+    word_ends = word_starts + rng.uniform(0.05, 0.4, n_words)
+    return starts, ends, word_starts, word_ends
+
+
+def covered_chunk(n_turns: int, words_per_turn: int = 4, seed: int = 0):
+    """One turn spanning the chunk, overlapped by short interjections."""
+    starts, ends, word_starts, word_ends = synthetic_chunk(n_turns - 1, words_per_turn, seed)
+    rng = np.random.default_rng(seed + 1)
+    lengths = rng.uniform(0.2, 0.6, n_turns - 1)
+    starts = np.concatenate([[0.0], starts])
+    ends = np.concatenate([[float(ends[-1])], starts[1:] + lengths])
+    return starts, ends, word_starts, word_ends
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - began)
+    return min(timings)
+
+
+def main():
+    print(f"{'chunk':>9} {'turns':>8} {'words':>8} {'legacy ms':>12} {'sweep ms':>10} {'speedup':>9}")
+    for (name, make_chunk), n_turns in (
+        (scenario, n_turns)
+        for scenario in (("disjoint", synthetic_chunk), ("covered", covered_chunk))
+        for n_turns in (100, 1000, 2000, 5000)
+    ):
+        starts, ends, word_starts, word_ends = make_chunk(n_turns)
+        turns = list(zip(starts.tolist(), ends.tolist()))
+        words = [(s, e, "w") for s, e in zip(word_starts.tolist(), word_ends.tolist())]
+
+        legacy = best_of(lambda: legacy_alignment(turns, words), repeat=1)
+        sweep = best_of(
+            lambda: assign_words_to_turns(starts, ends, word_starts, word_ends),
+            repeat=5
+        )
+        print(
+            f"{name:>9} {n_turns:>8} {len(words):>8} {legacy * 1e3:>12.1f} "
+            f"{sweep * 1e3:>10.2f} {legacy / sweep:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.alignment import assign_words_to_turns
+
+
+def most_overlapping_turn(turn_starts, turn_ends, word_start, word_end):
+    overlaps = np.minimum(word_end, turn_ends) - np.maximum(word_start, turn_starts)
+    return int(np.argmax(overlaps))
+
+
+def test_words_go_to_the_most_overlapping_turn_under_a_covering_monologue():
+    rng = np.random.default_rng(0)
+    # A monologue over the first half of the chunk, short interjections throughout
+    interjection_starts = np.sort(rng.uniform(0.0, 99.0, 200))
+    turn_starts = np.concatenate([[0.0], interjection_starts])
+    turn_ends = np.concatenate([[50.0], interjection_starts + rng.uniform(0.2, 0.8, 200)])
+    word_starts = np.sort(rng.uniform(0.0, 99.5, 1000))
+    word_ends = word_starts + 0.3
+
+    assignment = assign_words_to_turns(turn_starts, turn_ends, word_starts, word_ends)
+
+    assert assignment.tolist() == [
+        most_overlapping_turn(turn_starts, turn_ends, start, end)
+        for start, end in zip(word_starts, word_ends)
+    ]
+    # Ties go to the monologue, which starts first
+    assert (assignment[word_ends <= 50.0] == 0).all() and (assignment[word_starts > 50.0] > 0).all()
+
+
+def test_words_outside_every_turn_go_to_the_nearest_one():
+    assignment = assign_words_to_turns([0.0, 5.0], [1.0, 6.0], [1.5, 4.0, 7.0], [1.8, 4.5, 7.5])
+
+    assert assignment.tolist() == [0, 1, 1]
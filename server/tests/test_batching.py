@@ -0,0 +1,63 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("whisper")
+
+from app.services.batching import ModelBatcher, _timestamped_segments
+
+
+def test_model_batcher_stacks_calls_from_several_threads():
+    calls = []
+
+    def model(x, masks):
+        calls.append(len(x))
+        return x * 2
+
+    batcher = ModelBatcher("model", model, max_batch_size=3, max_wait_ms=2000)
+    inputs = [np.full((i + 1, 4), i, dtype=np.float32) for i in range(3)]
+    results = [None] * 3
+
+    def worker(i):
+        results[i] = batcher(inputs[i], None)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [6]
+    for x, result in zip(inputs, results):
+        np.testing.assert_array_equal(result, x * 2)
+    assert batcher.stats()["batch_size_histogram"] == {"3": 1}
+
+
+def test_model_batcher_keeps_different_shapes_apart():
+    calls = []
+
+    def model(x):
+        calls.append(x.shape)
+        return x
+
+    batcher = ModelBatcher("model", model, max_batch_size=2, max_wait_ms=50)
+    threads = [
+        threading.Thread(target=batcher, args=(np.zeros((1, n), dtype=np.float32),))
+        for n in (3, 5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == [(1, 3), (1, 5)]
+
+
+def test_trailing_text_starts_at_the_last_timestamp():
+    tokenizer = SimpleNamespace(timestamp_begin=1000, decode=lambda tokens: " ".join(map(str, tokens)))
+    # <0.00> 1 2 <1.00> 3 4  (no closing timestamp)
+    segments = _timestamped_segments([1000, 1, 2, 1050, 3, 4], tokenizer, duration=3.0)
+
+    assert [(s["start"], s["end"]) for s in segments] == [(0.0, 1.0), (1.0, 3.0)]
@@ -0,0 +1,275 @@
+import asyncio
+import weakref
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyannote.audio")
+pytest.importorskip("whisper")
+
+from app.dxo.diarization import SessionDiarizationDXO, SpeechSegmentDXO
+from app.dxo.inference import InferenceResultDXO
+from app.dxo.summaries import SessionSummaryDXO
+from app.services.audio import SAMPLE_RATE, OverlapBuffer
+from app.services.diarization import StreamingDiarizationService
+from app.services.speakers import SpeakerTracker
+
+
+class InMemoryRepository:
+    """The session calls of the Mongo repository, kept in a dict."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.summaries = {}
+
+    async def get_session_diarization(self, session_id, segments_tail=None):
+        session = self.sessions.get(session_id)
+        if session is None or segments_tail is None:
+            return session
+        return session.model_copy(update={"segments": session.segments[-segments_tail:] if segments_tail else []})
+
+    async def append_session_segments(
+        self,
+        session_id,
+        chunk_id,
+        sequence_number,
+        segments,
+        duration,
+        is_final,
+        speaker_profiles=None,
+        skipped_seconds=0.0
+    ):
+        now = datetime.now(timezone.utc)
+        session = self.sessions.get(session_id) or SessionDiarizationDXO(
+            id=str(uuid4()),
+            session_id=session_id,
+            chunks=[],
+            segments=[],
+            total_speakers=0,
+            duration=0.0,
+            created_at=now,
+            last_updated=now,
+            is_complete=False
+        )
+        if sequence_number in session.chunk_sequences:
+            return None
+        speakers = sorted(set(session.speakers) | {s.speaker for s in segments})
+        session = session.model_copy(update={
+            "chunks": session.chunks + [chunk_id],
+            "chunk_sequences": session.chunk_sequences + [sequence_number],
+            "segments": session.segments + list(segments),
+            "speakers": speakers,
+            "speaker_profiles": {**session.speaker_profiles, **(speaker_profiles or {})},
+            "segment_count": session.segment_count + len(segments),
+            "total_speakers": len(speakers),
+            "duration": max(session.duration, duration),
+            "skipped_seconds": session.skipped_seconds + skipped_seconds,
+            "last_updated": now,
+            "is_complete": is_final
+        })
+        self.sessions[session_id] = session
+        return session.model_copy(update={"segments": list(segments), "chunks": [chunk_id]})
+
+    async def update_session_diarization(self, session_dxo):
+        self.sessions[session_dxo.session_id] = session_dxo
+
+    async def get_session_summary(self, session_id):
+        return self.summaries.get(session_id)
+
+    async def update_session_summary(self, summary_dxo):
+        self.summaries[summary_dxo.session_id] = summary_dxo
+
+    async def get_chunk_segments(self, session_id, sequence_number):
+        return [s for s in self.sessions[session_id].segments if s.chunk_sequence == sequence_number]
+
+
+def make_service(repository):
+    """A diarization service with the models replaced by a fixed inference result."""
+    service = StreamingDiarizationService.__new__(StreamingDiarizationService)
+    service.config = SimpleNamespace(vad_energy_threshold_db=-45.0)
+    service.repository = repository
+    service.overlap = OverlapBuffer(overlap_seconds=1.0, idle_seconds=300.0, max_sessions=16)
+    service.boundary_guard_seconds = 0.25
+    service.speakers = SpeakerTracker(0.4)
+    service._session_locks = weakref.WeakValueDictionary()
+    service.inferences = 0
+
+    async def infer(samples, session_id):
+        service.inferences += 1
+        seconds = len(samples) / SAMPLE_RATE
+        return InferenceResultDXO(
+            key=str(service.inferences),
+            labels=["A"],
+            durations=[seconds],
+            embeddings=[[1.0, 0.0, 0.0]],
+            tracks=[(0.0, seconds, "A")],
+            words=[(0.1, 0.4, "hello"), (seconds - 0.8, seconds - 0.5, "again")]
+        )
+
+    service._infer = infer
+    return service
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def test_replayed_final_chunk_is_a_duplicate():
+    repository = InMemoryRepository()
+    service = make_service(repository)
+    session_id = uuid4()
+
+    async def run():
+        await service.process_stored_chunk(tone(3.0), "chunk-0", session_id, 0, False)
+        final = await service.process_stored_chunk(tone(3.0), "chunk-1", session_id, 1, True)
+        finalized = repository.sessions[session_id]
+        inferences = service.inferences
+
+        replay = await service.process_stored_chunk(tone(3.0), "chunk-1-retry", session_id, 1, True)
+        return final, finalized, inferences, replay
+
+    final, finalized, inferences, replay = asyncio.run(run())
+
+    assert finalized.is_complete
+    assert finalized.chunk_sequences == [0, 1]
+    assert finalized.speaker_profiles
+    assert set(finalized.speaker_profiles) <= set(finalized.speakers)
+
+    assert replay.duplicate
+    assert service.inferences == inferences
+    assert repository.sessions[session_id] == finalized
+    assert replay.duration == final.duration
+    assert [s.text for s in replay.segments] == [
+        s.text for s in finalized.segments if s.chunk_sequence == 1
+    ]
+
+
+def test_finalization_rewinds_summary_position_to_unsummarized_speech():
+    repository = InMemoryRepository()
+    service = make_service(repository)
+    session_id = uuid4()
+
+    async def run():
+        await service.process_stored_chunk(tone(3.0), "chunk-0", session_id, 0, False)
+        await service.process_stored_chunk(tone(3.0), "chunk-1", session_id, 1, False)
+        appended = repository.sessions[session_id].segments
+        # Only the first chunk's segments were summarized
+        summarized = len([s for s in appended if s.chunk_sequence == 0])
+        await repository.update_session_summary(
+            SessionSummaryDXO(session_id=session_id, summarized_segments=summarized)
+        )
+        await service.process_stored_chunk(tone(3.0), "chunk-2", session_id, 2, True)
+        return appended, summarized
+
+    appended, summarized = asyncio.run(run())
+    final = repository.sessions[session_id].segments
+    position = repository.summaries[session_id].summarized_segments
+
+    assert position <= len(final)
+    first_pending = min(s.start for s in appended[summarized:])
+    # Everything before the position was summarized, nothing pending is skipped
+    assert all(s.end < first_pending for s in final[:position])
+    assert any(s.end >= first_pending for s in final[position:])
+
+
+def test_skipped_seconds_do_not_count_the_overlap_twice():
+    repository = InMemoryRepository()
+    service = make_service(repository)
+    session_id = uuid4()
+    silence = np.zeros(3 * SAMPLE_RATE, dtype=np.float32)
+
+    async def run():
+        await service.process_stored_chunk(silence, "chunk-0", session_id, 0, False)
+        await service.process_stored_chunk(silence, "chunk-1", session_id, 1, False)
+
+    asyncio.run(run())
+    session = repository.sessions[session_id]
+
+    assert service.inferences == 0
+    assert session.skipped_seconds == pytest.approx(session.duration)
+
+
+def test_lost_append_race_leaves_speaker_centroids_unchanged():
+    repository = InMemoryRepository()
+    service = make_service(repository)
+    session_id = uuid4()
+
+    async def run():
+        await service.process_stored_chunk(tone(3.0), "chunk-0", session_id, 0, False)
+        before = service.speakers.profiles(session_id, ["SPEAKER_00"])
+        # Another worker appends chunk 1 between the duplicate check and the append
+        append = repository.append_session_segments
+
+        async def append_after_other_worker(**kwargs):
+            await append(**{**kwargs, "chunk_id": "other-worker"})
+            return await append(**kwargs)
+
+        repository.append_session_segments = append_after_other_worker
+        response = await service.process_stored_chunk(tone(3.0), "chunk-1", session_id, 1, False)
+        return before, response
+
+    before, response = asyncio.run(run())
+
+    assert response.duplicate
+    assert service.speakers.profiles(session_id, ["SPEAKER_00"]) == before
+
+
+def test_merged_turns_keep_the_words_of_both():
+    service = make_service(InMemoryRepository())
+    merged = service._merge_overlapping_segments([
+        SpeechSegmentDXO(start=2.0, end=4.0, speaker="SPEAKER_00", chunk_sequence=1, text="again"),
+        SpeechSegmentDXO(start=0.0, end=2.05, speaker="SPEAKER_00", chunk_sequence=0, text="hello"),
+        SpeechSegmentDXO(start=4.5, end=5.0, speaker="SPEAKER_01", chunk_sequence=1, text=""),
+    ])
+
+    assert [(s.start, s.end, s.text) for s in merged] == [
+        (0.0, 4.0, "hello again"),
+        (4.5, 5.0, "")
+    ]
+
+
+def test_concurrent_retries_of_a_chunk_append_it_once():
+    repository = InMemoryRepository()
+    service = make_service(repository)
+    session_id = uuid4()
+
+    async def run():
+        return await asyncio.gather(
+            service.process_stored_chunk(tone(3.0), "chunk-0", session_id, 0, False),
+            service.process_stored_chunk(tone(3.0), "chunk-0-retry", session_id, 0, False)
+        )
+
+    first, retry = asyncio.run(run())
+    session = repository.sessions[session_id]
+
+    assert not first.duplicate and retry.duplicate
+    assert session.chunks == ["chunk-0"]
+    assert session.chunk_sequences == [0]
+    assert service.inferences == 1
+    assert [s.text for s in retry.segments] == [s.text for s in first.segments]
+
+
+def test_silent_chunk_skips_the_models():
+    repository = InMemoryRepository()
+    service = make_service(repository)
+    session_id = uuid4()
+
+    async def run():
+        silent = await service.process_stored_chunk(
+            np.zeros(3 * SAMPLE_RATE, dtype=np.float32), "chunk-0", session_id, 0, False
+        )
+        inferences = service.inferences
+        spoken = await service.process_stored_chunk(tone(3.0), "chunk-1", session_id, 1, False)
+        return silent, inferences, spoken
+
+    silent, inferences, spoken = asyncio.run(run())
+    session = repository.sessions[session_id]
+
+    assert inferences == 0 and silent.segments == []
+    assert service.inferences == 1 and spoken.segments
+    assert session.chunk_sequences == [0, 1]
+    assert session.skipped_seconds > 0
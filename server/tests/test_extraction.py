@@ -0,0 +1,67 @@
+import asyncio
+from uuid import uuid4
+
+from app.services.extraction import KnowledgeExtractionQueue
+
+
+def test_pending_sections_are_joined_and_drain_waits_for_them():
+    queue = KnowledgeExtractionQueue()
+    session_id, other_id = uuid4(), uuid4()
+    extracted = []
+
+    async def run():
+        await queue.start()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def first(text):
+            started.set()
+            await release.wait()
+            extracted.append((session_id, text))
+
+        async def work(text):
+            extracted.append((session_id, text))
+
+        async def other(text):
+            extracted.append((other_id, text))
+
+        queue.submit(session_id, "section 1", first)
+        await started.wait()
+        # Submitted while the first extraction runs, so they wait together
+        queue.submit(session_id, "section 2", work)
+        queue.submit(other_id, "other 1", other)
+        queue.submit(session_id, "section 3", work)
+        stats = queue.stats()
+        release.set()
+        await queue.drain()
+        await queue.stop()
+        return stats
+
+    stats = asyncio.run(run())
+
+    assert stats["pending"] == 2 and stats["running"] == 1 and stats["coalesced"] == 1
+    assert extracted == [
+        (session_id, "section 1"),
+        (session_id, "section 2\nsection 3"),
+        (other_id, "other 1"),
+    ]
+    assert queue.stats()["extracted"] == 3 and queue.lag() == 0
+
+
+def test_failed_extraction_does_not_block_drain():
+    queue = KnowledgeExtractionQueue()
+    session_id = uuid4()
+
+    async def run():
+        await queue.start()
+
+        async def fail(text):
+            raise RuntimeError("unparseable relations")
+
+        queue.submit(session_id, "section 1", fail)
+        await asyncio.wait_for(queue.drain(), timeout=5)
+        await queue.stop()
+
+    asyncio.run(run())
+
+    assert queue.stats()["failed"] == 1 and queue.lag() == 0
@@ -0,0 +1,56 @@
+import asyncio
+from uuid import uuid4
+
+from app.dxo.inference import InferenceResultDXO
+from app.services.inference_cache import InferenceResultCache
+
+
+class InMemoryRepository:
+    """The inference cache calls of the Mongo repository, with the sessions using each row."""
+
+    def __init__(self):
+        self.rows = {}
+        self.sessions = {}
+
+    async def get_inference_result(self, key, session_id):
+        if key not in self.rows:
+            return None
+        self.sessions[key].add(session_id)
+        return self.rows[key]
+
+    async def record_inference_use(self, key, session_id):
+        if key not in self.rows:
+            return False
+        self.sessions[key].add(session_id)
+        return True
+
+    async def store_inference_result(self, result_dxo, session_id):
+        self.rows.setdefault(result_dxo.key, result_dxo)
+        self.sessions.setdefault(result_dxo.key, set()).add(session_id)
+
+    def delete_session(self, session_id):
+        for key in [key for key, sessions in self.sessions.items() if sessions == {session_id}]:
+            del self.rows[key], self.sessions[key]
+        for sessions in self.sessions.values():
+            sessions.discard(session_id)
+
+
+def test_memory_hits_record_usage_and_drop_deleted_results():
+    repository = InMemoryRepository()
+    cache = InferenceResultCache(repository, "v1", max_entries=8)
+    owner, reuser, later = uuid4(), uuid4(), uuid4()
+    shared, own = InferenceResultDXO(key="shared"), InferenceResultDXO(key="own")
+
+    async def run():
+        await cache.put(shared, owner)
+        await cache.put(own, owner)
+        reused = await cache.get("shared", reuser)
+        repository.delete_session(owner)
+        return reused, await cache.get("shared", later), await cache.get("own", later)
+
+    reused, still_shared, deleted = asyncio.run(run())
+
+    assert reused == shared and still_shared == shared
+    assert repository.sessions["shared"] == {reuser, later}
+    assert deleted is None and "own" not in repository.rows
+    assert cache.stats() == {"entries": 1, "max_entries": 8, "memory_hits": 2, "store_hits": 0, "misses": 1}
@@ -0,0 +1,23 @@
+from app.services.knowledge_graph import KnowledgeGraphService
+
+
+def test_text_follows_evictions_at_the_cap():
+    graph = KnowledgeGraphService(max_relations=3)
+    for i in range(10):
+        graph.add_relation((f"speaker {i}", "said", f"point {i}"))
+        if i % 3 == 0:
+            graph.fetch_relations()
+
+    assert graph.fetch_relations() == "\n".join(
+        f"(speaker {i}, said, point {i})" for i in range(7, 10)
+    )
+
+
+def test_malformed_relations_are_skipped():
+    graph = KnowledgeGraphService()
+    batch = [("Alice",), "owns", ("Alice", "owns"), 42, ("Bob", "leads", "")]
+
+    added = [graph.add_relation(relation) for relation in batch]
+
+    assert added == [False, False, True, False, True]
+    assert graph.relations == [("Alice", "owns", "Unknown"), ("Bob", "leads", "Unknown")]
@@ -0,0 +1,40 @@
+import asyncio
+from uuid import uuid4
+
+
+
+from app.services.knowledge_registry import KnowledgeGraphRegistry
+
+
+class InMemoryRepository:
+    """The knowledge-graph calls of the Mongo repository, kept in a dict."""
+
+    def __init__(self):
+        self.graphs = {}
+
+    async def get_knowledge_graph(self, session_id):
+        return self.graphs.get(session_id)
+
+    async def update_knowledge_graph(self, graph_dxo):
+        self.graphs[graph_dxo.session_id] = graph_dxo
+
+
+def test_pinned_graph_is_not_evicted_and_reloaded():
+    repository = InMemoryRepository()
+    registry = KnowledgeGraphRegistry(repository, max_sessions=1, idle_seconds=900.0, max_relations=100)
+    pinned_id, other_id = uuid4(), uuid4()
+
+    async def run():
+        async with registry.use(pinned_id) as graph:
+            await registry.get(other_id)
+            graph.add_relation(("Alice", "owns", "budget"))
+            await registry.save(pinned_id, graph)
+            again = await registry.get(pinned_id)
+        return graph, again
+
+    graph, again = asyncio.run(run())
+
+    assert again is graph
+    assert registry.stats()["loads"] == 2
+    assert registry.stats()["pinned"] == 0
+    assert again.exists_relation(("Alice", "owns", "budget"))
@@ -0,0 +1,29 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip("transformers")
+
+from app.services.scheduler import SummaryScheduler
+
+
+def test_requested_summary_raises_when_the_run_fails():
+    async def rolling_summary(session_id):
+        raise RuntimeError("model crashed")
+
+    summarization = SimpleNamespace(rolling_summary=rolling_summary)
+    scheduler = SummaryScheduler(summarization, every_chunks=1, every_tokens=0, max_sessions=8)
+    session_id = uuid4()
+
+    async def run():
+        # A background trigger only logs the failure
+        scheduler.chunk_processed(session_id, "")
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError, match="model crashed"):
+            await scheduler.request(session_id)
+
+    asyncio.run(run())
+
+    assert scheduler.stats()["failed"] == 2 and scheduler.stats()["running"] == 0
@@ -0,0 +1,29 @@
+from uuid import uuid4
+
+import numpy as np
+
+from app.services.speakers import SpeakerTracker
+
+
+def test_speakers_without_embeddings_get_distinct_labels():
+    tracker = SpeakerTracker(0.4)
+    session_id = uuid4()
+
+    first = tracker.assign(session_id, ["A", "B"], np.full((2, 3), np.nan), [1.0, 2.0])
+    later = tracker.assign(session_id, ["C"], np.array([[1.0, 0.0, 0.0]]), [1.0])
+
+    assert first["A"] != first["B"]
+    assert later["C"] not in first.values()
+
+
+def test_assignments_only_count_once_committed():
+    tracker = SpeakerTracker(0.4)
+    session_id = uuid4()
+    tracker.assign(session_id, ["A"], np.array([[1.0, 0.0, 0.0]]), [1.0])
+    tracker.commit(session_id)
+    before = tracker.profiles(session_id, ["SPEAKER_00"])
+
+    tracker.assign(session_id, ["A"], np.array([[0.9, 0.1, 0.0]]), [5.0])
+    tracker.rollback(session_id)
+
+    assert tracker.profiles(session_id, ["SPEAKER_00"]) == before
@@ -0,0 +1,167 @@
+import asyncio
+import weakref
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip("transformers")
+
+from app.dxo.diarization import SpeechSegmentDXO
+from app.dxo.summaries import SessionSummaryDXO
+from app.services.answers import AnswerCache
+from app.services.summarize import SummarizationService
+
+
+class WordLLM:
+    """An LLM whose tokens are words and whose every output is a three word summary."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, ids):
+        return " ".join(ids)
+
+    def generate_many(self, conversations, max_new_tokens, batch_size):
+        self.batches.append(len(conversations))
+        return [f"summary number {i}" for i in range(len(conversations))]
+
+
+class InMemoryRepository:
+    """The summary and segment calls of the Mongo repository, kept in lists."""
+
+    def __init__(self, segments=()):
+        self.segments = list(segments)
+        self.summaries = {}
+        self.revision = len(self.segments)
+
+    def append(self, segment):
+        self.segments.append(segment)
+        self.revision += 1
+
+    def finalize(self, segments):
+        self.segments = list(segments)
+        self.revision += 1
+
+    async def get_session_diarization(self, session_id, segments_tail=None):
+        return SimpleNamespace(segment_count=len(self.segments), revision=self.revision)
+
+    async def get_segments_from(self, session_id, offset, limit):
+        return self.segments[offset:offset + limit]
+
+    async def get_session_summary(self, session_id):
+        return self.summaries.get(session_id)
+
+    async def update_session_summary(self, summary_dxo):
+        self.summaries[summary_dxo.session_id] = summary_dxo
+
+
+def make_service(repository, **settings):
+    """A summarization service over a word-counting LLM that records extraction submissions."""
+    service = SummarizationService.__new__(SummarizationService)
+    service.llm = WordLLM()
+    service.repository = repository
+    service.extracted = []
+    service.extraction = SimpleNamespace(
+        submit=lambda session_id, text, work: service.extracted.append(text)
+    )
+    service.answers = AnswerCache(max_entries=16, ttl_seconds=600.0)
+    service.section_tokens = 100
+    service.max_summary_tokens = 64
+    service.max_segments = 100
+    service.window_tokens = settings.get("window_tokens", 10)
+    service.reduce_fan_out = settings.get("reduce_fan_out", 2)
+    service.max_depth = settings.get("max_depth", 2)
+    service.batch_size = 8
+    service._session_locks = weakref.WeakValueDictionary()
+    return service
+
+
+def segment(i, speaker="SPEAKER_00"):
+    return SpeechSegmentDXO(start=float(i), end=i + 1.0, speaker=speaker, chunk_sequence=i, text=f"point {i}")
+
+
+def test_reduce_levels_past_max_depth_merge_what_fits_a_window():
+    session_id = uuid4()
+    segments = [segment(i, f"SPEAKER_0{i % 2}") for i in range(4)]
+    repository = InMemoryRepository(segments)
+    repository.summaries[session_id] = SessionSummaryDXO(session_id=session_id, summarized_segments=2)
+    service = make_service(repository, window_tokens=10, reduce_fan_out=2, max_depth=2)
+    # Sixteen turns of ten words each fill one window apiece
+    transcript = "\n".join(" ".join(["word"] * 10) for _ in range(16))
+
+    summary, levels = asyncio.run(service.final_summary(session_id, transcript, 4.0))
+
+    assert summary == "summary number 0"
+    assert [(level["stage"], level["inputs"], level["outputs"]) for level in levels] == [
+        ("map", 16, 16),
+        ("reduce", 8, 8),
+        # From max_depth on a merge takes the three summaries that fit ten tokens
+        ("reduce", 3, 3),
+        ("reduce", 1, 1),
+    ]
+    assert all(level["truncated"] == 0 for level in levels)
+    # Only the segments no fold covered are sent to extraction
+    assert service.extracted == ["SPEAKER_00: point 2\nSPEAKER_01: point 3"]
+    state = repository.summaries[session_id]
+    assert state.summary == summary and state.summarized_segments == 4
+
+
+def make_answering_service(repository, graph):
+    """A service over `repository` whose answers are numbered by how often the LLM was asked."""
+    service = make_service(repository)
+    service.knowledge = SimpleNamespace(get=lambda _: asyncio.sleep(0, graph))
+    asked = []
+
+    async def query(question, session_id, stats=None):
+        asked.append(question)
+        return f"answer {len(asked)}"
+
+    service.query = query
+    return service
+
+
+def test_cached_answer_follows_graph_version_and_transcript():
+    session_id = uuid4()
+    repository = InMemoryRepository([segment(0)])
+    graph = SimpleNamespace(version=1)
+    service = make_answering_service(repository, graph)
+
+    async def ask():
+        return await service.answer("Who owns the budget?", session_id)
+
+    first = asyncio.run(ask())
+    again = asyncio.run(ask())
+    repository.append(segment(1))
+    after_segment = asyncio.run(ask())
+    graph.version = 2
+    after_graph = asyncio.run(ask())
+
+    assert first == ("answer 1", False, 1)
+    assert again == ("answer 1", True, 1)
+    assert after_segment == ("answer 2", False, 1)
+    assert after_graph == ("answer 3", False, 2)
+    assert service.answers.stats()["invalidated"] == 2
+
+
+def test_answers_are_cached_after_finalization_shrinks_the_transcript():
+    session_id = uuid4()
+    repository = InMemoryRepository([segment(i) for i in range(3)])
+    service = make_answering_service(repository, SimpleNamespace(version=1))
+
+    async def ask():
+        return await service.answer("Who owns the budget?", session_id)
+
+    before = asyncio.run(ask())
+    # Finalization merges the three segments into one
+    repository.finalize([segment(0)])
+    after = asyncio.run(ask())
+    again = asyncio.run(ask())
+
+    assert before == ("answer 1", False, 1)
+    assert after == ("answer 2", False, 1)
+    assert again == ("answer 2", True, 1)
+    assert service.answers.stats()["hits"] == 1